@@ -2,3 +2,4 @@ from .topologies import *
 from .energy import *
 from .functional_groups import *
 from .molecules import *
+from .store import *
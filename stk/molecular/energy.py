@@ -190,18 +190,28 @@ Notes.
 """
 
 import os
+import glob
+import itertools as it
+import numpy as np
 import rdkit.Chem.AllChem as rdkit
 import subprocess as sp
 import psutil
-import copy
 from uuid import uuid4
-from types import MethodType
-from functools import wraps
+from types import MethodType, SimpleNamespace
+from functools import wraps, partial
+from collections import defaultdict
 from inspect import signature as sig
 import logging
 
-from ..utilities import FunctionData
-from ..optimization.mopac import mopac_opt
+from ..utilities import FunctionData, CACHE_SETTINGS, JobRunner
+from ..optimization.mopac import (_create_batch_mop,
+                                  _mopac_jobs,
+                                  _job_energy,
+                                  _mop_line as _opt_mop_line)
+from ..optimization.macromodel import (_structconvert,
+                                       _structconvert_async,
+                                       _run_bmin,
+                                       _run_bmin_async)
 
 
 logger = logging.getLogger(__name__)
@@ -225,6 +235,10 @@ class EMethod:
     func : :class:`function`
         The method which the descriptor acts as a getter for.
 
+    build_key : :class:`function`
+        Creates the key of :attr:`func` in :attr:`Energy.values`,
+        made once by :func:`_compile_key`.
+
     """
 
     def __init__(self, func):
@@ -239,6 +253,7 @@ class EMethod:
         """
 
         self.func = func
+        self.build_key = _key_builders[func] = _compile_key(func)
 
     def __get__(self, obj, cls):
         """
@@ -275,8 +290,12 @@ class EMethod:
         # attribute returned a modified version of the method. The
         # method is modified so that after the method returns a value,
         # it is stored in the `values` dictionary of the Energy
-        # instance.
-        return e_logger(self.func, obj)
+        # instance. The modified method is saved in the instance
+        # dictionary, so that later lookups do not reach the
+        # descriptor.
+        method = e_logger(self.func, obj, self.build_key)
+        obj.__dict__[self.func.__name__] = method
+        return method
 
 
 class EMeta(type):
@@ -317,7 +336,7 @@ class EMeta(type):
         return type.__new__(cls, cls_name, bases, cls_dict)
 
 
-def e_logger(func, obj):
+def e_logger(func, obj, build_key=None):
     """
     Turns `func` into a version which updates :attr`Energy.values`.
 
@@ -330,27 +349,49 @@ def e_logger(func, obj):
         The :class:`Energy` object on which the method `func` was
         called.
 
+    build_key : :class:`function`, optional
+        Creates the key of `func` from its arguments, see
+        :func:`_compile_key`. If ``None``, :func:`func_key` is used.
+
     Returns
     -------
     :class:`types.MethodType`
         The function `func` bound to `obj` and modified so that when
-        called the results update :attr:`Energy.values`.
+        called the results update :attr:`Energy.values`. If a
+        :class:`.PropertyStore` is held by :data:`.CACHE_SETTINGS`,
+        results are looked up in it before being calculated and are
+        written to it afterwards.
 
     """
 
+    if build_key is None:
+        build_key = partial(func_key, func)
+
     @wraps(func)
     def inner(self, *args, **kwargs):
 
-        # First get the result of the energy calculation.
-        result = func(self, *args, **kwargs)
-
-        # Next create FunctionData object to store the values of the
+        # First create FunctionData object to store the values of the
         # parameters used to run that calculation.
-        key = func_key(func, (self,)+args, kwargs)
+        key = build_key((self, *args), kwargs)
+
+        store = (CACHE_SETTINGS['PROPERTIES'] if
+                 CACHE_SETTINGS['ON'] else None)
+        found = False
+        if store is not None:
+            # The geometry is hashed before the calculation, which
+            # may move the atoms.
+            geometry = store.geometry_hash(self.molecule)
+            found, result = store.get(self.molecule, key, geometry)
+
+        # Next get the result of the energy calculation.
+        if not found:
+            result = func(self, *args, **kwargs)
+            if store is not None:
+                store.put(self.molecule, key, result, geometry)
 
         # Update the `values` dictionary with the results of the
         # calculation.
-        obj.values.update({key: result})
+        obj.values[key] = result
         # Return the result.
         return result
 
@@ -384,37 +425,116 @@ def func_key(func, fargs=None, fkwargs=None):
 
     """
 
-    if fargs is None:
-        fargs = []
-    if fkwargs is None:
-        fkwargs = []
+    builder = _key_builders.get(func)
+    if builder is None:
+        builder = _key_builders[func] = _compile_key(func)
+    return builder(() if fargs is None else fargs,
+                   {} if fkwargs is None else fkwargs)
 
-    # Check if the function has a `key` attribute. If it does use this
-    # to get its key rather than the general purpose code written here.
-    if hasattr(getattr(Energy, func.__name__, False), 'key'):
-        return getattr(Energy, func.__name__).key(fargs, fkwargs)
+
+# Maps functions to the key builders made for them by _compile_key().
+_key_builders = {}
+
+
+def _compile_binder(func):
+    """
+    Makes a function which binds arguments to parameters of `func`.
+
+    The signature of `func` is inspected once, here, instead of every
+    time arguments are bound.
+
+    Parameters
+    ----------
+    func : :class:`function`
+        The function whose arguments are to be bound.
+
+    Returns
+    -------
+    :class:`function`
+        A function which takes a :class:`tuple` of arguments and a
+        :class:`dict` of keyword arguments for `func` and returns a
+        :class:`dict` mapping the name of every parameter of `func`,
+        except ``self``, to its value. Parameters which were not
+        given are mapped to their default value, or to
+        :attr:`inspect.Parameter.empty` if they have none.
+
+    """
 
     fsig = sig(func)
-    # Get a dictionary of all the supplied parameters.
-    bound = dict(fsig.bind_partial(*fargs, **fkwargs).arguments)
-    # Get a dictionary of all the default initialized parameters.
-    default = {key: value.default for key, value in
-               dict(fsig.parameters).items() if
-               key not in bound.keys()}
-    # Combine the two sets of parameters and get rid of the `self`
-    # parameter, if present.
-    bound.update(default)
-    if 'self' in bound.keys():
-        bound.pop('self')
-    # Remove any parameters that should not form key, listed in the
-    # `exclude` attribute.
-    if hasattr(func, 'exclude'):
-        for key in func.exclude:
-            bound.pop(key)
+    params = fsig.parameters
+    defaults = tuple((name, param.default) for
+                     name, param in params.items())
+    positions = {name: i for i, name in enumerate(params)}
+    variadic = any(param.kind in (param.VAR_POSITIONAL,
+                                  param.VAR_KEYWORD) for
+                   param in params.values())
+
+    def bind(fargs, fkwargs):
+        nargs = len(fargs)
+        # Unusual calls, including invalid ones which should raise,
+        # are bound by inspect.
+        if (variadic or
+           nargs > len(defaults) or
+           any(positions.get(key, -1) < nargs for key in fkwargs)):
+            bound = dict(fsig.bind_partial(*fargs, **fkwargs).arguments)
+            for name, default in defaults:
+                bound.setdefault(name, default)
 
-    # Return an FunctionData object representing the function and
-    # chosen parameters.
-    return FunctionData(func.__name__, **bound)
+        else:
+            bound = {
+                name: fargs[i] if i < nargs else fkwargs.get(name, default)
+                for i, (name, default) in enumerate(defaults)
+            }
+
+        bound.pop('self', None)
+        return bound
+
+    return bind
+
+
+def _compile_key(func):
+    """
+    Makes a function which creates the key of `func`.
+
+    Parameters
+    ----------
+    func : :class:`function`
+        The function whose results are to be stored in
+        :attr:`Energy.values`.
+
+    Returns
+    -------
+    :class:`function`
+        A function which takes a :class:`tuple` of arguments and a
+        :class:`dict` of keyword arguments for `func` and returns the
+        :class:`.FunctionData` used as the key in
+        :attr:`Energy.values`.
+
+    """
+
+    bind = _compile_binder(func)
+    name = func.__name__
+    excluded = getattr(func, 'exclude', ())
+
+    def build_key(fargs, fkwargs):
+        # Check if the function has a `key` attribute. If it does use
+        # this to get its key rather than the general purpose code
+        # written here. The attribute may be added after the
+        # :class:`Energy` class is made, so it is checked every time.
+        key = getattr(func, 'key', None)
+        if key is not None:
+            return key(fargs, fkwargs)
+
+        bound = bind(fargs, fkwargs)
+        # Remove any parameters that should not form key, listed in
+        # the `exclude` attribute.
+        for param in excluded:
+            bound.pop(param)
+        # Return an FunctionData object representing the function and
+        # chosen parameters.
+        return FunctionData(name, **bound)
+
+    return build_key
 
 
 def exclude(*args):
@@ -483,6 +603,12 @@ class Energy(metaclass=EMeta):
         self.molecule = molecule
         self.values = {}
 
+    def __getstate__(self):
+        # Bound methods cached by EMethod cannot be pickled and must
+        # not be shared by copies.
+        return {name: value for name, value in vars(self).items() if
+                not isinstance(value, MethodType)}
+
     @exclude('force_e_calc')
     def formation(self,
                   func,
@@ -542,7 +668,10 @@ class Energy(metaclass=EMeta):
             have their energies recalculated. Even if the energy values
             have already been found with the chosen forcefield and
             method. If ``False`` the energy is only calculated if the
-            value has not already been found.
+            value has not already been found. If a
+            :class:`.SharedEnergyMemo` is used, energies of building
+            blocks and products calculated during the current run are
+            taken from it either way, unless their structure changed.
 
         conformer : :class:`int`, optional
             The conformer to use.
@@ -559,20 +688,13 @@ class Energy(metaclass=EMeta):
         # Get the key of the function used to calculate the energies.
         fkey = func_key(efunc, None, func.params)
 
-        # Recalculate energies if requested.
-        if force_e_calc:
-            for _, mol in products:
-                getattr(mol.energy, func.name)(**func.params)
-
         # Get the total energy of the products.
         e_products = 0
         for n, mol in products:
-            # If the energy has not been calculated already, calculate
-            # it now.
-            if fkey not in mol.energy.values.keys():
-                getattr(mol.energy, func.name)(**func.params)
-
-            e_products += n * mol.energy.values[fkey]
+            e_products += n * _component_energy(mol,
+                                                func,
+                                                fkey,
+                                                force_e_calc)
 
         eng = self.pseudoformation(func,
                                    building_blocks,
@@ -624,7 +746,10 @@ class Energy(metaclass=EMeta):
             have their energies recalculated. Even if the energy values
             have already been found with the chosen forcefield and
             method. If ``False`` the energy is only calculated if the
-            value has not already been found.
+            value has not already been found. If a
+            :class:`.SharedEnergyMemo` is used, energies of building
+            blocks and products calculated during the current run are
+            taken from it either way, unless their structure changed.
 
         conformer : :class:`int`, optional
             The conformer to use.
@@ -645,28 +770,19 @@ class Energy(metaclass=EMeta):
             building_blocks = ((n, mol) for mol, n in
                                self.molecule.bb_counter.items())
 
-        # Recalculate energies if requested.
-        if force_e_calc:
-            for _, mol in building_blocks:
-                molf = getattr(mol.energy, func.name)
-                molf(**func.params)
-
-            getattr(self, func.name)(**func.params)
-
         # Sum the energy of building blocks under the chosen
         # forcefield.
         e_reactants = 0
         for n, mol in building_blocks:
-            # If the calculation has not been done already, perform it.
-            if fkey not in mol.energy.values.keys():
-                molf = getattr(mol.energy, func.name)
-                molf(**func.params)
-
-            e_reactants += n * mol.energy.values[fkey]
+            e_reactants += n * _component_energy(mol,
+                                                 func,
+                                                 fkey,
+                                                 force_e_calc)
 
         # Get the energy of `self.molecule`. The only product whose
         # energy matters in pseudoformation.
-        e_products = (self.values[fkey] if fkey in self.values.keys()
+        e_products = (self.values[fkey] if
+                      fkey in self.values and not force_e_calc
                       else getattr(self, func.name)(**func.params))
 
         eng = e_reactants - e_products
@@ -707,6 +823,87 @@ class Energy(metaclass=EMeta):
         eng = ff.CalcEnergy()
         return eng
 
+    @exclude('num_threads')
+    def rdkit_conformers(self,
+                         forcefield,
+                         conformers=None,
+                         optimize=False,
+                         max_iters=200,
+                         num_threads=1):
+        """
+        Uses ``rdkit`` to calculate the energies of many conformers.
+
+        The forcefield is set up only once for all conformers, which
+        is much faster than calling :meth:`rdkit` for each conformer.
+        Each energy is also added to :attr:`values` under the key it
+        would have if :meth:`rdkit` was used to calculate it.
+
+        Parameters
+        ----------
+        forcefield : :class:`str`
+            The name of the forcefield to be used, ``'uff'`` or
+            ``'mmff'``.
+
+        conformers : :class:`list` of :class:`int`, optional
+            The ids of the conformers to use. If ``None``, all
+            conformers are used.
+
+        optimize : :class:`bool`, optional
+            If ``True``, all conformers of the molecule are optimized
+            with the forcefield before the energies are taken. This
+            changes the structure of the molecule.
+
+        max_iters : :class:`int`, optional
+            The maximum number of iterations of each optimization.
+
+        num_threads : :class:`int`, optional
+            The number of threads used for optimization. If ``0``,
+            as many threads as the system supports are used.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The energy of each conformer in `conformers`.
+
+        """
+
+        logger.debug('Starting rdkit conformer energy calculation.')
+        mol = self.molecule.mol
+        if conformers is None:
+            conformers = [conf.GetId() for conf in mol.GetConformers()]
+
+        mol.UpdatePropertyCache()
+        if forcefield == 'mmff':
+            rdkit.GetSSSR(mol)
+
+        if optimize:
+            optimize_confs = (rdkit.UFFOptimizeMoleculeConfs if
+                              forcefield == 'uff' else
+                              rdkit.MMFFOptimizeMoleculeConfs)
+            optimize_confs(mol, numThreads=num_threads, maxIters=max_iters)
+
+        # The forcefield is made for one conformer and then evaluated
+        # with the coordinates of each conformer.
+        if forcefield == 'uff':
+            ff = rdkit.UFFGetMoleculeForceField(mol, confId=conformers[0])
+        if forcefield == 'mmff':
+            ff = rdkit.MMFFGetMoleculeForceField(
+                                    mol,
+                                    rdkit.MMFFGetMoleculeProperties(mol),
+                                    confId=conformers[0])
+
+        energies = np.array([
+            ff.CalcEnergy(
+                mol.GetConformer(conformer).GetPositions().ravel().tolist()
+            )
+            for conformer in conformers
+        ])
+
+        for conformer, energy in zip(conformers, energies):
+            _save_value(self, Energy.rdkit, (forcefield, conformer), energy)
+
+        return energies
+
     @exclude('macromodel_path')
     def macromodel(self, forcefield, macromodel_path, conformer=-1):
         """
@@ -743,73 +940,13 @@ class Energy(metaclass=EMeta):
 
         """
 
-        # To prevent conflicts when running this function in parallel,
-        # a temporary copy of the molecular structure file is made and
-        # used for macromodel calculations.
-
-        # Unique file name is generated by inserting a random int into
-        # the file path.
-        tmp_file = "{}.mol".format(uuid4().int)
-        self.molecule.write(tmp_file, conformer)
-
-        file_root, ext = os.path.splitext(tmp_file)
-        convrt_app = os.path.join(macromodel_path,
-                                  'utilities',
-                                  'structconvert')
-        convrt_cmd = [convrt_app,
-                      tmp_file,
-                      file_root+'.mae']
-        sp.call(convrt_cmd, stdout=sp.PIPE, stderr=sp.PIPE)
-
-        # Create an input file and run it.
-        input_script = (
-         "{0}.mae\n"
-         "{0}-out.maegz\n"
-         " MMOD       0      1      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " FFLD{1:8}      1      0      0     1.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " BGIN       0      0      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " READ      -1      0      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " ELST      -1      0      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " WRIT       0      0      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n"
-         " END       0      0      0      0     0.0000     0.0000     "
-         "0.0000     0.0000\n\n"
-        ).format(file_root, forcefield)
-
-        with open(file_root+'.com', 'w') as f:
-            f.write(input_script)
-
-        cmd = [os.path.join(macromodel_path, 'bmin'),
-               file_root,
-               "-WAIT",
-               "-LOCAL"]
-        sp.call(cmd)
-
-        # Check if the license was found. If not run the function
-        # again.
-        with open(file_root+'.log', 'r') as f:
-            log_content = f.read()
-        if ('FATAL -96: Could not check out a license for mmlibs' in
-           log_content):
-            return self.macromodel(forcefield,
-                                   macromodel_path,
-                                   conformer)
-
-        # Read the .log file and return the energy.
-        with open(file_root+'.log', 'r') as f:
-            for line in f:
-                if "                   Total Energy =" in line:
-                    eng = float(line.split()[-2].replace("=", ""))
-
-        try:
-            return eng
-        except UnboundLocalError:
-            raise EnergyError('MacroModel energy calculation failed.')
+        energy, = _macromodel_energies(molecules=[self.molecule],
+                                       forcefield=forcefield,
+                                       macromodel_path=macromodel_path,
+                                       timeout=None,
+                                       conformer=conformer,
+                                       name=self.molecule.name)
+        return energy
 
     @exclude('mopac_path')
     def mopac(self, mopac_path, settings=None):
@@ -995,6 +1132,10 @@ class Energy(metaclass=EMeta):
         Note that this requires MOPAC to be installed and have a
         valid license.
 
+        The energy of the neutral molecule and of the optimized anion
+        are calculated by two MOPAC runs, which run at the same time.
+        See :func:`mopac_properties`.
+
         Parameters
         ----------
         settings : :class:`dict`, optional
@@ -1044,60 +1185,10 @@ class Energy(metaclass=EMeta):
 
         """
 
-        if settings is None:
-            settings = {}
-
-        # Define default vals for the MOPAC input
-        vals = {
-                'hamiltonian': 'PM7',
-                'method': 'NOOPT',
-                'eps': 80.1,
-                'charge': 0,
-                'timeout': 172800,
-                }
-        vals.update(settings)
-
-        # First check the energy of the neutral system
-        # To prevent conflicts when running this function in parallel,
-        # a temporary copy of the molecular structure file is made and
-        # used for mopac calculations.
-
-        # Unique file name is generated by inserting a random int into
-        # the file path.
-        tmp_file = "{}.mol".format(uuid4().int)
-        self.molecule.write(tmp_file)
-
-        file_root, ext = os.path.splitext(tmp_file)
-
-        # Generate the input file
-        _create_mop(file_root, self.molecule, vals)
-        # Run MOPAC
-        _run_mopac(file_root, mopac_path)
-
-        # Extract the neutral energy
-        en1 = _extract_MOPAC_en(file_root)
-
-        # Update the settings for the anion optimization
-        settings2 = {
-                    'method': 'OPT',
-                    'gradient': 0.01,
-                    'charge': -1,
-                    'fileout': 'PDBOUT'
-                    }
-
-        vals.update(settings2)
-
-        # Now generate a new molecule
-        mol2 = copy.deepcopy(self.molecule)
-        # Run the mopac optimisation
-        mopac_opt(mol2, mopac_path, vals)
-        # Extract the energy by using the self.mopac method
-        vals['method'] = 'NOOPT'
-        del vals['gradient']
-        del vals['fileout']
-        en2 = mol2.energy.mopac(mopac_path, vals)
-        # Calculate the EA (eV)
-        return en2 - en1
+        return mopac_properties(molecules=[self.molecule],
+                                mopac_path=mopac_path,
+                                properties=['ea'],
+                                settings=settings)[0]['ea']
 
     @exclude('mopac_path')
     def mopac_ip(self, mopac_path, settings=None):
@@ -1107,6 +1198,10 @@ class Energy(metaclass=EMeta):
         Note that this requires MOPAC to be installed and have a
         valid license.
 
+        The energy of the neutral molecule and of the optimized cation
+        are calculated by two MOPAC runs, which run at the same time.
+        See :func:`mopac_properties`.
+
         Parameters
         ----------
         settings : :class:`dict`, optional
@@ -1156,10 +1251,92 @@ class Energy(metaclass=EMeta):
 
         """
 
-        if settings is None:
-            settings = {}
+        return mopac_properties(molecules=[self.molecule],
+                                mopac_path=mopac_path,
+                                properties=['ip'],
+                                settings=settings)[0]['ip']
+
+    async def _macromodel_async(self,
+                                forcefield,
+                                macromodel_path,
+                                conformer=-1,
+                                runner=None):
+        """
+        Does the same as :meth:`macromodel`, without blocking.
+
+        Used by :func:`run_energies`. The value is not added to
+        :attr:`values` by this coroutine.
+
+        """
+
+        if runner is None:
+            runner = JobRunner()
+
+        energy, = await _macromodel_energies_async(
+                                        molecules=[self.molecule],
+                                        forcefield=forcefield,
+                                        macromodel_path=macromodel_path,
+                                        timeout=None,
+                                        conformer=conformer,
+                                        name=self.molecule.name,
+                                        runner=runner)
+        return energy
+
+    async def _mopac_async(self, mopac_path, settings=None, runner=None):
+        """
+        Does the same as :meth:`mopac`, without blocking.
+
+        Used by :func:`run_energies`. The value is not added to
+        :attr:`values` by this coroutine.
+
+        """
+
+        file_root = await self._run_mopac_async(mopac_path,
+                                                settings,
+                                                runner)
+        return _extract_MOPAC_en(file_root)
+
+    async def _mopac_dipole_async(self,
+                                  mopac_path,
+                                  settings=None,
+                                  runner=None):
+        """
+        Does the same as :meth:`mopac_dipole`, without blocking.
+
+        Used by :func:`run_energies`. The value is not added to
+        :attr:`values` by this coroutine.
+
+        """
+
+        file_root = await self._run_mopac_async(mopac_path,
+                                                settings,
+                                                runner)
+        return _extract_MOPAC_dipole(file_root)
+
+    async def _run_mopac_async(self, mopac_path, settings, runner):
+        """
+        Runs a MOPAC single point calculation with a :class:`.JobRunner`.
+
+        Parameters
+        ----------
+        mopac_path : :class:`str`
+            The full path to the MOPAC installation.
+
+        settings : :class:`dict`
+            The settings of the calculation. See :meth:`mopac`. May be
+            ``None``.
+
+        runner : :class:`.JobRunner`
+            The runner used to run MOPAC. If ``None``, a new one is
+            used.
+
+        Returns
+        -------
+        :class:`str`
+            The name of the MOPAC output files, without extensions.
+
+        """
 
-        # Define default vals for the MOPAC input
         vals = {
                 'hamiltonian': 'PM7',
                 'method': 'NOOPT',
@@ -1167,49 +1344,23 @@ class Energy(metaclass=EMeta):
                 'charge': 0,
                 'timeout': 172800,
                 }
-        vals.update(settings)
-
-        # First check the energy of the neutral system
-        # To prevent conflicts when running this function in parallel,
-        # a temporary copy of the molecular structure file is made and
-        # used for mopac calculations.
-
-        # Unique file name is generated by inserting a random int into
-        # the file path.
-        tmp_file = "{}.mol".format(uuid4().int)
-        self.molecule.write(tmp_file)
+        if settings is not None:
+            vals.update(settings)
 
-        file_root, ext = os.path.splitext(tmp_file)
+        if runner is None:
+            runner = JobRunner()
 
-        # Generate the input file
+        file_root = str(uuid4().int)
+        self.molecule.write(file_root+'.mol')
         _create_mop(file_root, self.molecule, vals)
-        # Run MOPAC
-        _run_mopac(file_root, mopac_path)
+        logger.info(f'Running MOPAC - {file_root}.')
+        await runner.run(cmd=[mopac_path, file_root],
+                         timeout=vals['timeout'],
+                         stop=partial(_kill_mopac, file_root))
+        return file_root
 
-        # Extract the neutral energy
-        en1 = _extract_MOPAC_en(file_root)
 
-        # Update the settings for the cation optimization
-        settings2 = {
-                    'method': 'OPT',
-                    'gradient': 0.01,
-                    'charge': 1,
-                    'fileout': 'PDBOUT'
-                    }
-
-        vals.update(settings2)
-
-        # Now generate a new molecule
-        mol2 = copy.deepcopy(self.molecule)
-        # Run the mopac optimisation
-        mopac_opt(mol2, mopac_path, vals)
-        # Extract the energy by using the self.mopac method
-        vals['method'] = 'NOOPT'
-        del vals['gradient']
-        del vals['fileout']
-        en2 = mol2.energy.mopac(mopac_path, vals)
-        # Calculate the IP (eV)
-        return en2 - en1
+_bind_formation = _compile_binder(Energy.formation)
 
 
 def formation_key(fargs, fkwargs):
@@ -1234,20 +1385,8 @@ def formation_key(fargs, fkwargs):
 
     """
 
-    fsig = sig(Energy.formation)
-
-    # Get a dictionary of all the supplied parameters.
-    bound = dict(fsig.bind_partial(*fargs, **fkwargs).arguments)
-    # Get a dictionary of all the default initialized parameters.
-    default = {key: value.default for key, value in
-               dict(fsig.parameters).items() if
-               key not in bound.keys()}
-
-    # Combine the two sets of parameters and get rid of the `self`
-    # parameter, if present.
-    bound.update(default)
-    if 'self' in bound.keys():
-        bound.pop('self')
+    # Get a dictionary of all the parameters, without `self`.
+    bound = _bind_formation(fargs, fkwargs)
 
     # Replace the energy function to be used with the key of the
     # energy function to be used.
@@ -1267,6 +1406,9 @@ def formation_key(fargs, fkwargs):
 Energy.formation.key = formation_key
 
 
+_bind_pseudoformation = _compile_binder(Energy.pseudoformation)
+
+
 def pseudoformation_key(fargs, fkwargs):
     """
     Generates key of the :meth:`Energy.pseudoformation`.
@@ -1290,20 +1432,8 @@ def pseudoformation_key(fargs, fkwargs):
 
     """
 
-    fsig = sig(Energy.pseudoformation)
-
-    # Get a dictionary of all the supplied parameters.
-    bound = dict(fsig.bind_partial(*fargs, **fkwargs).arguments)
-    # Get a dictionary of all the default initialized parameters.
-    default = {key: value.default for key, value in
-               dict(fsig.parameters).items() if
-               key not in bound.keys()}
-
-    # Combine the two sets of parameters and get rid of the `self`
-    # parameter, if present.
-    bound.update(default)
-    if 'self' in bound.keys():
-        bound.pop('self')
+    # Get a dictionary of all the parameters, without `self`.
+    bound = _bind_pseudoformation(fargs, fkwargs)
 
     # Replace the energy function to be used with the key of the
     # energy function to be used.
@@ -1323,6 +1453,815 @@ def pseudoformation_key(fargs, fkwargs):
 Energy.pseudoformation.key = pseudoformation_key
 
 
+def mopac_energies(molecules, mopac_path, settings=None):
+    """
+    Calculates the energies of many molecules with one MOPAC run.
+
+    All molecules are written as separate jobs into one ``.mop`` file,
+    so that MOPAC is only started once. The energy of each job is then
+    read from the output and added to :attr:`Energy.values` of its
+    molecule, under the same key :meth:`Energy.mopac` would use.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose energies are calculated.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC installation.
+
+    settings : :class:`dict`, optional
+        The settings of the calculation. See :meth:`Energy.mopac`.
+        The `timeout` applies to the whole run.
+
+    Returns
+    -------
+    :class:`list` of :class:`float`
+        The energy of each molecule in `molecules`.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If no energy was found for some of the molecules. The energies
+        of the other molecules are still saved.
+
+    """
+
+    vals = {
+            'hamiltonian': 'PM7',
+            'method': 'NOOPT',
+            'eps': 80.1,
+            'charge': 0,
+            'timeout': 172800,
+            }
+    if settings is not None:
+        vals.update(settings)
+
+    file_root = str(uuid4().int)
+    _create_batch_mop(file_root, molecules, _mop_line(vals))
+    _run_mopac(file_root, mopac_path, vals['timeout'])
+
+    energies = [_job_energy(job) for
+                job in _mopac_jobs(file_root, len(molecules))]
+    for molecule, energy in zip(molecules, energies):
+        if energy is not None:
+            _save_value(molecule.energy,
+                        Energy.mopac,
+                        (mopac_path, settings),
+                        energy)
+
+    if None in energies:
+        failed = [molecule.name for molecule, energy in
+                  zip(molecules, energies) if energy is None]
+        raise EnergyError(f'MOPAC energy calculation failed for {failed}.')
+
+    return energies
+
+
+def macromodel_energies(molecules,
+                        forcefield,
+                        macromodel_path,
+                        timeout=None,
+                        conformer=-1):
+    """
+    Calculates the energies of many molecules with one MacroModel job.
+
+    All molecules are written into one multi-structure ``.mae`` file,
+    whose energies are listed by a single ``bmin`` job. This means
+    that ``bmin`` is started, and a license checked out, only once.
+    Each energy is added to :attr:`Energy.values` of its molecule,
+    under the same key :meth:`Energy.macromodel` would use.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose energies are calculated.
+
+    forcefield : :class:`int`
+        The id number of the forcefield to be used by macromodel.
+
+    macromodel_path : :class:`str`
+        The full path to the Schrodinger suite within the
+        user's machine.
+
+    timeout : :class:`float`, optional
+        The amount in seconds the job is allowed to run before being
+        terminated. ``None`` means there is no timeout.
+
+    conformer : :class:`int`, optional
+        The conformer of each molecule to use.
+
+    Returns
+    -------
+    :class:`list` of :class:`float`
+        The energy of each molecule in `molecules`.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If the number of energies in the ``.log`` file does not match
+        the number of molecules.
+
+    """
+
+    energies = _macromodel_energies(
+                                molecules=molecules,
+                                forcefield=forcefield,
+                                macromodel_path=macromodel_path,
+                                timeout=timeout,
+                                conformer=conformer,
+                                name=f'batch of {len(molecules)} molecules')
+
+    for molecule, energy in zip(molecules, energies):
+        _save_value(molecule.energy,
+                    Energy.macromodel,
+                    (forcefield, macromodel_path, conformer),
+                    energy)
+
+    return energies
+
+
+def _macromodel_energies(molecules,
+                         forcefield,
+                         macromodel_path,
+                         timeout,
+                         conformer,
+                         name):
+    """
+    Runs a MacroModel job listing the energies of molecules.
+
+    The files of the job are removed once it is done.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose energies are calculated.
+
+    forcefield : :class:`int`
+        The id number of the forcefield to be used by macromodel.
+
+    macromodel_path : :class:`str`
+        The full path to the Schrodinger suite within the
+        user's machine.
+
+    timeout : :class:`float`
+        The amount in seconds the job is allowed to run before being
+        terminated. ``None`` means there is no timeout.
+
+    conformer : :class:`int`
+        The conformer of each molecule to use.
+
+    name : :class:`str`
+        The name of the job, used for logging.
+
+    Returns
+    -------
+    :class:`list` of :class:`float`
+        The energy of each molecule in `molecules`.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If the number of energies in the ``.log`` file does not match
+        the number of molecules.
+
+    """
+
+    job = _macromodel_energy_job(molecules, forcefield, conformer, name)
+    file_root, _ = os.path.splitext(job._file)
+    try:
+        _structconvert(file_root+'.sdf',
+                       file_root+'.mae',
+                       macromodel_path)
+        _run_bmin(job, macromodel_path, timeout)
+        return _macromodel_log_energies(file_root, len(molecules))
+
+    finally:
+        _remove_job_files(file_root)
+
+
+async def _macromodel_energies_async(molecules,
+                                     forcefield,
+                                     macromodel_path,
+                                     timeout,
+                                     conformer,
+                                     name,
+                                     runner):
+    """
+    Does the same as :func:`_macromodel_energies`, without blocking.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose energies are calculated.
+
+    forcefield : :class:`int`
+        The id number of the forcefield to be used by macromodel.
+
+    macromodel_path : :class:`str`
+        The full path to the Schrodinger suite within the
+        user's machine.
+
+    timeout : :class:`float`
+        The amount in seconds the job is allowed to run before being
+        terminated. ``None`` means there is no timeout.
+
+    conformer : :class:`int`
+        The conformer of each molecule to use.
+
+    name : :class:`str`
+        The name of the job, used for logging.
+
+    runner : :class:`.JobRunner`
+        The runner used to run MacroModel.
+
+    Returns
+    -------
+    :class:`list` of :class:`float`
+        The energy of each molecule in `molecules`.
+
+    """
+
+    job = _macromodel_energy_job(molecules, forcefield, conformer, name)
+    file_root, _ = os.path.splitext(job._file)
+    try:
+        await _structconvert_async(file_root+'.sdf',
+                                   file_root+'.mae',
+                                   macromodel_path,
+                                   runner)
+        await _run_bmin_async(job, macromodel_path, timeout, runner)
+        return _macromodel_log_energies(file_root, len(molecules))
+
+    finally:
+        _remove_job_files(file_root)
+
+
+def _macromodel_energy_job(molecules, forcefield, conformer, name):
+    """
+    Writes the input files of a MacroModel energy job.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose energies are calculated.
+
+    forcefield : :class:`int`
+        The id number of the forcefield to be used by macromodel.
+
+    conformer : :class:`int`
+        The conformer of each molecule to use.
+
+    name : :class:`str`
+        The name of the job, used for logging.
+
+    Returns
+    -------
+    :class:`types.SimpleNamespace`
+        The job. :func:`_run_bmin` only needs the name of its input
+        file and a name to use in log messages.
+
+    """
+
+    file_root = str(uuid4().int)
+    with open(file_root+'.sdf', 'w') as f:
+        for molecule in molecules:
+            f.write(molecule.mdl_mol_block(conformer))
+    _create_macromodel_com(file_root, forcefield)
+    return SimpleNamespace(_file=file_root+'.mol', name=name)
+
+
+def _macromodel_log_energies(file_root, num_molecules):
+    """
+    Reads the energies listed by a MacroModel energy job.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the job, without the extension.
+
+    num_molecules : :class:`int`
+        The number of molecules in the job.
+
+    Returns
+    -------
+    :class:`list` of :class:`float`
+        The energy of each molecule.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If the number of energies in the ``.log`` file does not match
+        the number of molecules.
+
+    """
+
+    with open(file_root+'.log', 'r') as f:
+        energies = [float(line.split()[-2].replace("=", "")) for
+                    line in f if
+                    "                   Total Energy =" in line]
+
+    if len(energies) != num_molecules:
+        raise EnergyError(
+            (f'MacroModel listed {len(energies)} energies '
+             f'for {num_molecules} molecules.'))
+
+    return energies
+
+
+def run_energies(molecules, func_data, runner):
+    """
+    Calculates the same value for many molecules concurrently.
+
+    The external programs needed for the calculations are run by
+    `runner`, so that many of them can run at the same time while
+    only this process is used. The values are saved in
+    :attr:`Energy.values` of each molecule, and in the property store
+    if one is used, just as if the :class:`Energy` method had been
+    called on each molecule.
+
+    Only :meth:`Energy.macromodel`, :meth:`Energy.mopac` and
+    :meth:`Energy.mopac_dipole` can currently be run in this way.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules for which the value is calculated.
+
+    func_data : :class:`.FunctionData`
+        The name of an :class:`Energy` method and the arguments it
+        should be called with.
+
+    runner : :class:`.JobRunner`
+        Runs the external programs.
+
+    Returns
+    -------
+    :class:`list`
+        The value calculated for each molecule. If the calculation
+        failed on a molecule, the exception raised is placed in the
+        :class:`list` instead.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If the :class:`Energy` method cannot be run concurrently.
+
+    """
+
+    coroutine = getattr(Energy, f'_{func_data.name}_async', None)
+    if coroutine is None:
+        raise EnergyError(
+            f'Energy.{func_data.name}() cannot be run by a JobRunner.')
+
+    build_key = _key_builders[getattr(Energy, func_data.name)]
+    store = CACHE_SETTINGS['PROPERTIES'] if CACHE_SETTINGS['ON'] else None
+
+    async def calculate(energy):
+        key = build_key((energy, ), func_data.params)
+        found = False
+        if store is not None:
+            geometry = store.geometry_hash(energy.molecule)
+            found, result = store.get(energy.molecule, key, geometry)
+
+        if not found:
+            result = await coroutine(energy,
+                                     runner=runner,
+                                     **func_data.params)
+            if store is not None:
+                store.put(energy.molecule, key, result, geometry)
+
+        energy.values[key] = result
+        return result
+
+    return runner.run_all(calculate(molecule.energy) for
+                          molecule in molecules)
+
+
+def pool_energies(molecules, func_data, pool):
+    """
+    Calculates the same value for many molecules in worker processes.
+
+    The values are saved in :attr:`Energy.values` of each molecule,
+    just as if the :class:`Energy` method had been called on each
+    molecule. Unlike :func:`run_energies`, any :class:`Energy` method
+    can be used.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules for which the value is calculated.
+
+    func_data : :class:`.FunctionData`
+        The name of an :class:`Energy` method and the arguments it
+        should be called with.
+
+    pool : :class:`.WorkerPool`
+        The workers which carry out the calculations.
+
+    Returns
+    -------
+    :class:`list`
+        The value calculated for each molecule. If the calculation
+        failed on a molecule, the exception raised is placed in the
+        :class:`list` instead.
+
+    """
+
+    build_key = _key_builders[getattr(Energy, func_data.name)]
+    results = pool.map(partial(_pool_energy, func_data), molecules)
+    for molecule, result in zip(molecules, results):
+        if not isinstance(result, Exception):
+            key = build_key((molecule.energy, ), func_data.params)
+            molecule.energy.values[key] = result
+    return results
+
+
+def _pool_energy(func_data, molecule):
+    """
+    Calculates a value of `molecule` in a worker process.
+
+    Parameters
+    ----------
+    func_data : :class:`.FunctionData`
+        The name of an :class:`Energy` method and the arguments it
+        should be called with.
+
+    molecule : :class:`.Molecule`
+        The molecule for which the value is calculated.
+
+    Returns
+    -------
+    :class:`object`
+        The calculated value or the exception raised while
+        calculating it.
+
+    """
+
+    try:
+        return getattr(molecule.energy, func_data.name)(
+                                                **func_data.params)
+    except Exception as ex:
+        logger.error(f'Energy calculation failed on "{molecule.name}".',
+                     exc_info=True)
+        return ex
+
+
+def mopac_properties(molecules,
+                     mopac_path,
+                     properties=('energy', 'dipole', 'ip', 'ea'),
+                     settings=None,
+                     runner=None):
+    """
+    Calculates a set of MOPAC properties with as few runs as possible.
+
+    Asking for each property separately means running MOPAC at least
+    once per property. Instead, this function plans the runs needed
+    for all `properties` together:
+
+        * a single point calculation of the neutral molecule, which
+          gives the energy and the dipole moment
+        * an optimization of the cation, if the ionization potential
+          is needed
+        * an optimization of the anion, if the electron affinity is
+          needed
+
+    The energies of the ions are the final energies of their
+    optimizations, so no extra single point calculations are needed.
+    The runs of all molecules are independent and run at the same
+    time, using `runner`. All values found in a ``.arc`` file are
+    read in a single pass.
+
+    Each property is saved in :attr:`Energy.values` under the key of
+    the :class:`Energy` method which calculates it on its own, i.e.
+    :meth:`~Energy.mopac`, :meth:`~Energy.mopac_dipole`,
+    :meth:`~Energy.mopac_ip` and :meth:`~Energy.mopac_ea`. Properties
+    which are already held by :attr:`Energy.values`, or by the
+    property store, are not calculated again.
+
+    Parameters
+    ----------
+    molecules : :class:`list` of :class:`.Molecule`
+        The molecules whose properties are calculated.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC installation.
+
+    properties : :class:`tuple` of :class:`str`, optional
+        The properties to calculate. Can contain ``'energy'``,
+        ``'dipole'``, ``'ip'`` and ``'ea'``.
+
+    settings : :class:`dict`, optional
+        The settings of the calculations. See :meth:`Energy.mopac`.
+
+    runner : :class:`.JobRunner`, optional
+        Runs MOPAC. If ``None``, a new one is used.
+
+    Returns
+    -------
+    :class:`list` of :class:`dict`
+        For each molecule, a :class:`dict` which maps the name of each
+        property in `properties` to its value.
+
+    Raises
+    ------
+    :class:`EnergyError`
+        If a property could not be calculated for some molecule. The
+        properties which were calculated are still saved.
+
+    """
+
+    methods = {
+        'energy': Energy.mopac,
+        'dipole': Energy.mopac_dipole,
+        'ip': Energy.mopac_ip,
+        'ea': Energy.mopac_ea
+    }
+
+    vals = {
+            'hamiltonian': 'PM7',
+            'method': 'NOOPT',
+            'eps': 80.1,
+            'charge': 0,
+            'timeout': 172800,
+            }
+    if settings is not None:
+        vals.update(settings)
+
+    if runner is None:
+        runner = JobRunner()
+
+    store = CACHE_SETTINGS['PROPERTIES'] if CACHE_SETTINGS['ON'] else None
+
+    # Find the properties which are already known, and plan the runs
+    # needed by the rest. Runs are identified by the charge of the
+    # molecule. The neutral run is needed by every property.
+    results, runs = [], []
+    for molecule in molecules:
+        energy = molecule.energy
+        result = {}
+        for name in properties:
+            key = _key_builders[methods[name]](
+                                (energy, mopac_path, settings), {})
+            if key in energy.values:
+                result[name] = energy.values[key]
+            elif store is not None:
+                found, value = store.get(molecule, key)
+                if found:
+                    result[name] = energy.values[key] = value
+        results.append(result)
+
+        missing = {name for name in properties if name not in result}
+        if missing:
+            runs.append((molecule, 0))
+        if 'ip' in missing:
+            runs.append((molecule, 1))
+        if 'ea' in missing:
+            runs.append((molecule, -1))
+
+    outputs = runner.run_all(
+        _mopac_properties_run(molecule, mopac_path, vals, charge, runner)
+        for molecule, charge in runs
+    )
+
+    found = defaultdict(dict)
+    for (molecule, charge), output in zip(runs, outputs):
+        if isinstance(output, Exception):
+            logger.error(f'MOPAC failed on "{molecule.name}".',
+                         exc_info=output)
+        else:
+            found[id(molecule), charge] = output
+
+    failed = []
+    for molecule, result in zip(molecules, results):
+        neutral = found[id(molecule), 0]
+        values = {
+            'energy': neutral.get('energy'),
+            'dipole': neutral.get('dipole'),
+        }
+        for name, charge in (('ip', 1), ('ea', -1)):
+            ion = found[id(molecule), charge].get('energy')
+            if ion is not None and values['energy'] is not None:
+                values[name] = ion - values['energy']
+
+        for name in properties:
+            if name in result:
+                continue
+            if values.get(name) is None:
+                failed.append((molecule.name, name))
+                continue
+            result[name] = values[name]
+            _save_value(molecule.energy,
+                        methods[name],
+                        (mopac_path, settings),
+                        values[name])
+
+    if failed:
+        raise EnergyError(f'MOPAC calculations failed for {failed}.')
+
+    return results
+
+
+async def _mopac_properties_run(molecule, mopac_path, vals, charge, runner):
+    """
+    Runs MOPAC for :func:`mopac_properties`.
+
+    Parameters
+    ----------
+    molecule : :class:`.Molecule`
+        The molecule to run MOPAC on.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC installation.
+
+    vals : :class:`dict`
+        The settings of the calculation.
+
+    charge : :class:`int`
+        ``0`` for a single point calculation of the molecule with the
+        charge given in `vals`. Otherwise, the ion with this charge is
+        optimized.
+
+    runner : :class:`.JobRunner`
+        Runs MOPAC.
+
+    Returns
+    -------
+    :class:`dict`
+        The values found in the ``.arc`` file, see
+        :func:`_extract_MOPAC_properties`.
+
+    """
+
+    if charge == 0:
+        mop_line = _mop_line(vals)
+    else:
+        mop_line = _opt_mop_line({**vals,
+                                  'method': 'OPT',
+                                  'gradient': 0.01,
+                                  'charge': charge,
+                                  'fileout': 'PDBOUT'})
+
+    file_root = str(uuid4().int)
+    _create_batch_mop(file_root, [molecule], mop_line)
+    logger.info(f'Running MOPAC - {file_root}.')
+    await runner.run(cmd=[mopac_path, file_root],
+                     timeout=vals['timeout'],
+                     stop=partial(_kill_mopac, file_root))
+    return _extract_MOPAC_properties(file_root)
+
+
+def _component_energy(mol, func, fkey, force_e_calc):
+    """
+    Returns the energy of a building block or product.
+
+    The energy is taken from :attr:`Energy.values` of `mol`, then from
+    the :class:`.SharedEnergyMemo` if one is used. Only if both fail
+    is it calculated, in which case it is added to the memo.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The building block or product.
+
+    func : :class:`.FunctionData`
+        Describes the :class:`Energy` method used to calculate the
+        energy.
+
+    fkey : :class:`.FunctionData`
+        The key of `func` in :attr:`Energy.values`.
+
+    force_e_calc : :class:`bool`
+        If ``True``, :attr:`Energy.values` of `mol` is not used.
+
+    Returns
+    -------
+    :class:`float`
+        The energy of `mol`.
+
+    """
+
+    if not force_e_calc and fkey in mol.energy.values:
+        return mol.energy.values[fkey]
+
+    memo = CACHE_SETTINGS['ENERGIES'] if CACHE_SETTINGS['ON'] else None
+    if memo is not None:
+        found, value = memo.get_or_claim(mol, fkey)
+        if found:
+            mol.energy.values[fkey] = value
+            return value
+
+    try:
+        value = getattr(mol.energy, func.name)(**func.params)
+    except Exception:
+        if memo is not None:
+            memo.release(mol, fkey)
+        raise
+
+    if memo is not None:
+        memo.put(mol, fkey, value)
+    return value
+
+
+def _save_value(energy, method, args, value):
+    """
+    Adds a value calculated outside of a :class:`Energy` method.
+
+    The value is saved in :attr:`Energy.values` and in the property
+    store, if one is used, exactly as if `method` had returned it.
+
+    Parameters
+    ----------
+    energy : :class:`Energy`
+        The :class:`Energy` instance which gets the value.
+
+    method : :class:`function`
+        The :class:`Energy` method which would calculate `value`.
+
+    args : :class:`tuple`
+        The positional arguments, excluding ``self``, with which
+        `method` would calculate `value`.
+
+    value : :class:`object`
+        The calculated value.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    key = _key_builders[method]((energy, *args), {})
+    energy.values[key] = value
+    store = CACHE_SETTINGS['PROPERTIES'] if CACHE_SETTINGS['ON'] else None
+    if store is not None:
+        store.put(energy.molecule, key, value)
+
+
+def _remove_job_files(file_root):
+    """
+    Removes the files written by a job.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name shared by the files of the job, without the
+        extension.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    for path in it.chain(glob.glob(file_root+'.*'),
+                         glob.glob(file_root+'-*')):
+        os.remove(path)
+
+
+def _create_macromodel_com(file_root, forcefield):
+    """
+    Creates a ``.com`` file listing the energy of each structure.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the ``.mae`` file holding the structures, without
+        the extension.
+
+    forcefield : :class:`int`
+        The id number of the forcefield to be used by macromodel.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    # The commands between ``BGIN`` and ``END`` are repeated for each
+    # structure in the ``.mae`` file.
+    input_script = (
+     "{0}.mae\n"
+     "{0}-out.maegz\n"
+     " MMOD       0      1      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " FFLD{1:8}      1      0      0     1.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " BGIN       0      0      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " READ      -1      0      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " ELST      -1      0      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " WRIT       0      0      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n"
+     " END       0      0      0      0     0.0000     0.0000     "
+     "0.0000     0.0000\n\n"
+    ).format(file_root, forcefield)
+
+    with open(file_root+'.com', 'w') as f:
+        f.write(input_script)
+
+
 def _run_mopac(file_root, mopac_path, timeout=3600):
 
     mop_file = file_root + '.mop'
@@ -1464,6 +2403,35 @@ def _extract_MOPAC_en(file_root):
     return energy_val
 
 
+def _extract_MOPAC_properties(file_root):
+    """
+    Reads all values of interest from a ``.arc`` file in one pass.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the MOPAC output files, without extensions.
+
+    Returns
+    -------
+    :class:`dict`
+        Holds the ``'energy'`` and the ``'dipole'`` found in the file.
+        Missing values are left out.
+
+    """
+
+    properties = {}
+    with open(file_root + '.arc') as arc:
+        for line in arc:
+            if 'energy' not in properties and 'TOTAL ENERGY' in line:
+                properties['energy'] = float(line.split()[3])
+            elif 'dipole' not in properties and 'DIPOLE' in line:
+                properties['dipole'] = float(line.split()[2])
+            if len(properties) == 2:
+                break
+    return properties
+
+
 def _extract_MOPAC_dipole(file_root):
     mopac_out = file_root + '.arc'
 
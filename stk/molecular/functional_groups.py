@@ -299,6 +299,133 @@ def react(mol, del_atoms, *fgs):
     return emol.GetMol(), 1
 
 
+def react_many(mol, del_atoms, fg_pairs):
+    """
+    Creates bonds between many pairs of functional groups at once.
+
+    The result is the same as calling :func:`react` on each member of
+    `fg_pairs` in turn. However, reactions which are not handled by
+    :data:`custom_reactions` are carried out together. The atoms of
+    `mol` are scanned only once, all bonds are added to a single
+    editable molecule and all deleted atoms are removed in a single
+    batch. This means the cost of the reactions grows linearly with
+    the size of `mol`, rather than quadratically.
+
+    Parameters
+    ----------
+    mol : :class:`rdkit.Chem.rdchem.Mol`
+        A molecule being assembled.
+
+    del_atoms : :class:`bool`
+        Toggles if atoms with the ``'del'`` property are deleted.
+
+    fg_pairs : :class:`iterable` of :class:`tuple` of :class:`int`
+        Each :class:`tuple` holds the ids of functional groups which
+        react with each other. The ids are held by atoms of `mol` in
+        the ``'fg_id'`` property.
+
+    Returns
+    -------
+    :class:`tuple`
+        The first element is an :class:`rdkit.Chem.rdchem.Mol`. It is
+        the molecule with bonds added between the functional groups.
+
+        The second element is a :class:`int`. It is the number
+        of bonds added.
+
+    """
+
+    fg_pairs = list(fg_pairs)
+    reacting = {fg for fgs in fg_pairs for fg in fgs}
+
+    # Collect the name, bonder atoms and deleter atoms of every
+    # reacting functional group in a single pass.
+    names, bonders, deleters = {}, {}, []
+    for atom in mol.GetAtoms():
+        if not atom.HasProp('fg_id'):
+            continue
+        fg = atom.GetIntProp('fg_id')
+        if fg not in reacting:
+            continue
+        names.setdefault(fg, atom.GetProp('fg'))
+        if atom.HasProp('bonder'):
+            bonders.setdefault(fg, []).append(atom.GetIdx())
+        if atom.HasProp('del'):
+            deleters.append((fg, atom.GetIdx()))
+
+    for fg in reacting:
+        if fg not in names:
+            raise RuntimeError(
+                f'No functional group with id {fg} found.')
+
+    simple, custom = [], []
+    for fgs in fg_pairs:
+        reaction_key = FGKey([names[fg] for fg in fgs])
+        if reaction_key in custom_reactions or len(fgs) != 2:
+            custom.append(fgs)
+        else:
+            simple.append((fgs, reaction_key))
+
+    rwmol = rdkit.RWMol(mol)
+    simple_fgs = set()
+    for (fg1, fg2), reaction_key in simple:
+        bond = bond_orders.get(reaction_key,
+                               rdkit.rdchem.BondType.SINGLE)
+        bonder1, = bonders[fg1]
+        bonder2, = bonders[fg2]
+        rwmol.AddBond(bonder1, bonder2, bond)
+        simple_fgs.update((fg1, fg2))
+
+    mol = rwmol.GetMol()
+    if del_atoms:
+        mol = _remove_atoms(mol, {atom_id for fg, atom_id in deleters
+                                  if fg in simple_fgs})
+
+    bonds_made = len(simple)
+    # Reactions with their own functions are carried out one by one.
+    for fgs in custom:
+        mol, new_bonds = react(mol, del_atoms, *fgs)
+        bonds_made += new_bonds
+
+    return mol, bonds_made
+
+
+def _remove_atoms(mol, atom_ids):
+    """
+    Returns a copy of `mol` without the atoms in `atom_ids`.
+
+    Removing atoms one at a time renumbers the entire molecule after
+    each removal. Instead, the removals are made as a single batch
+    edit, so that the molecule is renumbered once. Everything else
+    held by `mol`, such as bond stereochemistry, properties and
+    conformers, is kept.
+
+    Parameters
+    ----------
+    mol : :class:`rdkit.Chem.rdchem.Mol`
+        The molecule from which atoms are removed.
+
+    atom_ids : :class:`set` of :class:`int`
+        The ids of atoms to be removed.
+
+    Returns
+    -------
+    :class:`rdkit.Chem.rdchem.Mol`
+        The molecule without the removed atoms.
+
+    """
+
+    if not atom_ids:
+        return mol
+
+    rwmol = rdkit.RWMol(mol)
+    rwmol.BeginBatchEdit()
+    for atom_id in atom_ids:
+        rwmol.RemoveAtom(atom_id)
+    rwmol.CommitBatchEdit()
+    return rwmol.GetMol()
+
+
 def periodic_react(mol, del_atoms, direction, *fgs):
     """
     Like :func:`react` but returns periodic bonds.
@@ -158,7 +158,13 @@ class does the assembly of the macromolecule from the building blocks.
 import tempfile
 import warnings
 import logging
+import threading
+import time
+import weakref
 import json
+import pickle
+import hashlib
+import heapq
 import os
 import numpy as np
 import networkx as nx
@@ -175,7 +181,9 @@ from scipy.spatial.distance import euclidean
 from scipy.optimize import minimize
 from sklearn.metrics.pairwise import euclidean_distances
 
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, OrderedDict
+from collections.abc import MutableMapping
+from multiprocessing.reduction import ForkingPickler
 from inspect import signature
 
 from . import topologies
@@ -191,39 +199,360 @@ from ..utilities import (flatten,
                          rotation_matrix_arbitrary_axis,
                          atom_vdw_radii,
                          Cell,
-                         remake)
+                         remake,
+                         CacheStats,
+                         CACHE_STATS,
+                         CACHE_SETTINGS,
+                         reduce_by_reference)
 
 
 logger = logging.getLogger(__name__)
-# Toggles caching when making molecules.
-CACHE_SETTINGS = {'ON': True}
+
+
+class MoleculeCache(MutableMapping):
+    """
+    A size bounded cache of molecules.
+
+    The cache behaves like a :class:`dict` but evicts entries once
+    the limits in :data:`.CACHE_SETTINGS` are exceeded. The limits are
+    read every time a molecule is added, so changes to
+    :data:`.CACHE_SETTINGS` take effect on the next insertion.
+
+    Attributes
+    ----------
+    entries : :class:`collections.OrderedDict`
+        Maps the key of each cached molecule to a :class:`tuple` of
+        the form ``(ref, nbytes)``. ``ref`` is a callable which
+        returns the molecule, or ``None`` if the molecule has been
+        garbage collected. ``nbytes`` is the approximate size of the
+        molecule in bytes. Entries are ordered from least to most
+        recently used.
+
+    nbytes : :class:`int`
+        The approximate total size of the cached molecules in bytes.
+
+    lock : :class:`threading.RLock`
+        Guards modifications to the cache.
+
+    stats : :class:`CacheStats`
+        Counts how the cache is used.
+
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.RLock()
+        self.stats = CacheStats()
+        # A heap of (rank, use, key) tuples, which orders the entries
+        # for the "least-fit" policy. Heap items whose use is not the
+        # latest use of their key are out of date and skipped.
+        self._heap = []
+        self._uses = it.count()
+        self._latest = {}
+        # The number of entries picked since the heap was rebuilt.
+        self._picks = 0
+        # Keys and references of molecules which were garbage
+        # collected but are still in the cache.
+        self._dead = []
+
+    @staticmethod
+    def mol_size(obj):
+        """
+        Estimates the memory used by a molecule.
+
+        Parameters
+        ----------
+        obj : :class:`Molecule`
+            The molecule whose size is estimated.
+
+        Returns
+        -------
+        :class:`int`
+            The size of the binary representation of the
+            ``rdkit`` molecule held by `obj`, or ``0`` if `obj` does
+            not hold one.
+
+        """
+
+        mol = getattr(obj, 'mol', None)
+        if mol is None:
+            return 0
+        return len(mol.ToBinary())
+
+    @staticmethod
+    def _rank(obj):
+        # Molecules without a fitness value are evicted first.
+        fitness = getattr(obj, 'fitness', None)
+        return (0, 0) if fitness is None else (1, fitness)
+
+    def evict(self):
+        """
+        Removes entries until the cache is within its limits.
+
+        The most recently added entry is never removed.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        max_entries = CACHE_SETTINGS.get('MAX_ENTRIES')
+        max_bytes = CACHE_SETTINGS.get('MAX_BYTES')
+
+        with self.lock:
+            self._purge()
+            while len(self.entries) > 1 and (
+                   (max_entries is not None and
+                    len(self.entries) > max_entries) or
+                   (max_bytes is not None and
+                    self.nbytes > max_bytes)):
+                self._pop(self._victim())
+                self.stats.count('evictions')
+
+    def _victim(self):
+        """
+        Returns the key of the next entry to be evicted.
+
+        With the "least-fit" policy, molecules without a fitness value
+        go first, followed by the least fit molecule. Ties are broken
+        by picking the least recently used entry. Otherwise, the least
+        recently used entry is picked.
+
+        The "least-fit" policy keeps the entries in a heap, ranked by
+        the fitness value a molecule had when it was last used. The
+        rank of the picked entry is always checked against its
+        current fitness value. A molecule whose fitness value dropped
+        while it was not used keeps its old rank until the heap is
+        rebuilt, which happens at least once per
+        ``len(self.entries)`` evictions.
+
+        Returns
+        -------
+        :class:`object`
+            The key of the entry to evict.
+
+        """
+
+        if CACHE_SETTINGS.get('EVICTION', 'lru') != 'least-fit':
+            # The most recently added entry is last, so it is never
+            # picked while there are others.
+            return next(iter(self.entries))
+
+        self._picks += 1
+        if self._picks >= len(self.entries):
+            self._rebuild_heap()
+
+        newest = next(reversed(self.entries))
+        skipped = None
+        while True:
+            rank, use, key = self._heap[0]
+            if self._latest.get(key) != use:
+                heapq.heappop(self._heap)
+            elif key == newest:
+                # The most recently added entry is never evicted.
+                skipped = heapq.heappop(self._heap)
+            else:
+                # Fitness values can change after a molecule was
+                # cached, so the rank is checked again before the
+                # entry is picked.
+                obj = self.entries[key][0]()
+                current = (0, 0) if obj is None else self._rank(obj)
+                if current == rank:
+                    break
+                heapq.heapreplace(self._heap, (current, use, key))
+
+        if skipped is not None:
+            heapq.heappush(self._heap, skipped)
+        return key
+
+    def _rebuild_heap(self):
+        self._picks = 0
+        self._heap = []
+        for key, (ref, _) in self.entries.items():
+            obj = ref()
+            rank = (0, 0) if obj is None else self._rank(obj)
+            self._heap.append((rank, self._latest[key], key))
+        heapq.heapify(self._heap)
+
+    def _used(self, key, obj):
+        use = next(self._uses)
+        self._latest[key] = use
+        heapq.heappush(self._heap, (self._rank(obj), use, key))
+        # Out of date heap items are dropped once they are the
+        # majority.
+        if len(self._heap) > 2*len(self.entries) + 64:
+            self._rebuild_heap()
+
+    def _collected(self, key, ref):
+        # The garbage collector can call this while the lock is held
+        # by this thread, so the entry is removed later by _purge().
+        self._dead.append((key, ref))
+
+    def _purge(self):
+        while self._dead:
+            key, ref = self._dead.pop()
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is ref:
+                self._pop(key)
+                self.stats.count('evictions')
+
+    def _pop(self, key):
+        _, nbytes = self.entries.pop(key)
+        self.nbytes -= nbytes
+        del self._latest[key]
+
+    def __getitem__(self, key):
+        with self.lock:
+            ref, _ = self.entries[key]
+            obj = ref()
+            if obj is None:
+                self._pop(key)
+                self.stats.count('evictions')
+                raise KeyError(key)
+            self.entries.move_to_end(key)
+            self._used(key, obj)
+            return obj
+
+    def __setitem__(self, key, obj):
+        if CACHE_SETTINGS.get('WEAKREF', False):
+            ref = weakref.ref(obj, partial(self._collected, key))
+        else:
+            def ref():
+                return obj
+
+        nbytes = (self.mol_size(obj) if
+                  CACHE_SETTINGS.get('MAX_BYTES') is not None else 0)
+
+        with self.lock:
+            if key in self.entries:
+                self._pop(key)
+            self.entries[key] = (ref, nbytes)
+            self.nbytes += nbytes
+            self._used(key, obj)
+            self.evict()
+
+    def __delitem__(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            if entry[0]() is None:
+                self._pop(key)
+                self.stats.count('evictions')
+                return False
+            return True
+
+    def __iter__(self):
+        with self.lock:
+            self._purge()
+            keys = list(self.entries)
+        return iter(keys)
+
+    def __len__(self):
+        with self.lock:
+            self._purge()
+            return len(self.entries)
+
+    def __repr__(self):
+        return '{}({} entries)'.format(self.__class__.__name__, len(self))
 
 
 class Cached(type):
     """
     A metaclass for creating classes which create cached instances.
 
+    Attributes
+    ----------
+    key_args : :class:`tuple` of :class:`int`
+        The positions of the `building_blocks` and `topology`
+        parameters of the initializer, excluding ``self``. Used to
+        find the arguments needed by ``gen_key()`` without binding a
+        signature on every call.
+
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.cache = dict()
+        self.cache = MoleculeCache()
+        CACHE_STATS[self.__name__] = self.cache.stats
+        params = list(signature(self.__init__).parameters)[1:]
+        self.key_args = (params.index('building_blocks'),
+                         params.index('topology'))
+
+    def _timed_init(self, key, topology, args, kwargs):
+        start = time.perf_counter()
+        obj = super().__call__(*args, **kwargs)
+        self.cache.stats.record_build(time.perf_counter()-start,
+                                      topology)
+        obj.key = key
+        return obj
 
     def __call__(self, *args, **kwargs):
-        sig = signature(self.__init__)
-        sig = sig.bind_partial(self, *args, **kwargs)
-        sig.apply_defaults()
-        sig = sig.arguments
-        key = self.gen_key(sig['building_blocks'], sig['topology'])
+        bb_index, top_index = self.key_args
+        try:
+            building_blocks = (args[bb_index] if bb_index < len(args)
+                               else kwargs['building_blocks'])
+            topology = (args[top_index] if top_index < len(args)
+                        else kwargs['topology'])
+        except KeyError:
+            # Let the initializer raise the usual TypeError.
+            return super().__call__(*args, **kwargs)
+
+        key = self.gen_key(building_blocks, topology)
+
+        if not CACHE_SETTINGS['ON']:
+            return self._timed_init(key, topology, args, kwargs)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.stats.count('hits')
+            return cached
+        self.cache.stats.count('misses')
+
+        shared = CACHE_SETTINGS.get('SHARED')
+        obj = None
+        if shared is not None:
+            obj = shared.load_or_claim(self,
+                                       key,
+                                       building_blocks,
+                                       topology)
+        if obj is not None:
+            self.cache.stats.count('shared_loads')
+        else:
+            try:
+                obj = self._load_or_init(key,
+                                         building_blocks,
+                                         topology,
+                                         args,
+                                         kwargs)
+            except Exception:
+                if shared is not None:
+                    shared.release(self, key)
+                raise
+            if shared is not None:
+                shared.put(obj)
+
+        self.cache[key] = obj
+        return obj
 
-        if key in self.cache and CACHE_SETTINGS['ON']:
-            return self.cache[key]
+    def _load_or_init(self, key, building_blocks, topology, args, kwargs):
+        store = CACHE_SETTINGS.get('STORE')
+        obj = None
+        if store is not None:
+            obj = store.load(self, key, building_blocks, topology)
+        if obj is not None:
+            self.cache.stats.count('store_loads')
         else:
-            obj = super().__call__(*args, **kwargs)
-            obj.key = key
-            if CACHE_SETTINGS['ON']:
-                self.cache[key] = obj
-            return obj
+            obj = self._timed_init(key, topology, args, kwargs)
+            if store is not None:
+                store.put(obj)
+        return obj
 
 
 class CachedStructUnit(type):
@@ -234,7 +563,11 @@ class CachedStructUnit(type):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.cache = dict()
+        self.cache = MoleculeCache()
+        CACHE_STATS[self.__name__] = self.cache.stats
+        # Building blocks are shared by many macromolecules, so
+        # send them to worker processes only once.
+        ForkingPickler.register(self, _reduce_struct_unit)
 
     def __call__(self, *args, **kwargs):
         # Get the arguments given to the initializer as a dictionary
@@ -262,16 +595,50 @@ class CachedStructUnit(type):
                        x.name in sig['file']), None)
 
         key = self.gen_key(mol, fg)
-        if key in self.cache and CACHE_SETTINGS['ON']:
-            return self.cache[key]
+        cached = self.cache.get(key) if CACHE_SETTINGS['ON'] else None
+        if cached is not None:
+            self.cache.stats.count('hits')
+            return cached
         else:
+            if CACHE_SETTINGS['ON']:
+                self.cache.stats.count('misses')
+            start = time.perf_counter()
             obj = super().__call__(*args, **kwargs)
+            self.cache.stats.record_build(time.perf_counter()-start)
             obj.key = key
             if CACHE_SETTINGS['ON']:
                 self.cache[key] = obj
             return obj
 
 
+def _reduce_struct_unit(struct_unit):
+    """
+    Pickles a :class:`StructUnit` sent to another process.
+
+    Parameters
+    ----------
+    struct_unit : :class:`StructUnit`
+        The building block being sent.
+
+    Returns
+    -------
+    :class:`tuple`
+        The reduce value of `struct_unit`.
+
+    """
+
+    if hasattr(struct_unit, 'key'):
+        # The structure is part of the reference because building
+        # blocks with the same key can still differ in geometry.
+        structure = hashlib.blake2b(struct_unit.mol.ToBinary(),
+                                    digest_size=16).digest()
+        ref = (struct_unit.__class__, struct_unit.key, structure)
+        reduced = reduce_by_reference(struct_unit, ref)
+        if reduced is not None:
+            return reduced
+    return struct_unit.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+
+
 class Molecule:
     """
     The most basic class representing molecules.
@@ -717,6 +1084,53 @@ class Molecule:
             raise RuntimeError(f'No fg_id of {fg_id}.')
         return s / c
 
+    def fg_centroids(self, fg_ids, conformer=-1):
+        """
+        The centroids of bonder atoms in multiple functional groups.
+
+        Unlike calling :meth:`fg_centroid` for each fg, the atoms of
+        the molecule are only scanned once.
+
+        Parameters
+        ----------
+        fg_ids : :class:`list` of :class:`int`
+            The ids of the functional groups.
+
+        conformer : :class:`int`, optional
+            The conformer to use.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            An array of shape ``[n, 3]``, where ``n`` is the length of
+            `fg_ids`. Row ``i`` holds the bonder centroid of the fg
+            ``fg_ids[i]``.
+
+        Raises
+        ------
+        :class:`RuntimeError`
+            If any fg in `fg_ids` is not found on any atoms.
+
+        """
+
+        rows = {fg_id: i for i, fg_id in
+                enumerate(dict.fromkeys(fg_ids))}
+        coords = self.mol.GetConformer(conformer).GetPositions()
+        sums = np.zeros((len(rows), 3))
+        counts = np.zeros(len(rows))
+        for a in self.mol.GetAtoms():
+            if a.HasProp('fg_id') and a.HasProp('bonder'):
+                row = rows.get(a.GetIntProp('fg_id'))
+                if row is not None:
+                    sums[row] += coords[a.GetIdx()]
+                    counts[row] += 1
+
+        if not counts.all():
+            missing = [fg for fg, i in rows.items() if not counts[i]]
+            raise RuntimeError(f'No fg_id of {missing[0]}.')
+        centroids = sums / counts[:, np.newaxis]
+        return centroids[[rows[fg_id] for fg_id in fg_ids]]
+
     def fg_distance(self, fg1, fg2, conformer=-1):
         """
         The distance between the bonder centroids of two fgs.
@@ -1475,6 +1889,23 @@ class Molecule:
         with open(path, 'w') as pdb:
             pdb.write(new_content)
 
+    def __getstate__(self):
+        state = dict(vars(self))
+        # The atom properties are kept by the binary form of the
+        # rdkit molecule, so there is no need to send them twice.
+        if 'mol' in state:
+            state['mol'] = self.mol.ToBinary(
+                                rdkit.PropertyPickleOptions.AllProps)
+            state.pop('atom_props', None)
+            state.pop('bonder_ids', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(state.get('mol'), bytes):
+            self.mol = rdkit.Mol(state['mol'])
+            self.save_atom_props()
+
 
 class StructUnit(Molecule, metaclass=CachedStructUnit):
     """
@@ -2269,9 +2700,14 @@ class StructUnit(Molecule, metaclass=CachedStructUnit):
         rdkit.SanitizeMol(mol)
         mol = rdkit.AddHs(mol)
         key = cls.gen_key(mol, functional_group)
-        if key in cls.cache and CACHE_SETTINGS['ON']:
-            return cls.cache[key]
+        cached = cls.cache.get(key) if CACHE_SETTINGS['ON'] else None
+        if cached is not None:
+            cls.cache.stats.count('hits')
+            return cached
+        if CACHE_SETTINGS['ON']:
+            cls.cache.stats.count('misses')
 
+        start = time.perf_counter()
         rdkit.EmbedMolecule(mol, rdkit.ETKDG())
         obj = cls.__new__(cls)
         obj.file = smiles
@@ -2283,6 +2719,7 @@ class StructUnit(Molecule, metaclass=CachedStructUnit):
             obj.tag_atoms()
 
         Molecule.__init__(obj, note, name)
+        cls.cache.stats.record_build(time.perf_counter()-start)
 
         cls.cache[key] = obj
         return obj
@@ -2965,18 +3402,18 @@ class MacroMolecule(Molecule, metaclass=Cached):
         obj.name = json_dict['name'] if json_dict['load_names'] else ""
         obj.key = key
         obj.building_blocks = bbs
-        obj.atom_props = {int(key): value for key, value in
-                          json_dict['atom_props'].items()}
-
-        # Remake bonder_ids
-        obj.bonder_ids = bonder_ids = []
-        for atom_id, props in obj.atom_props.items():
-            if 'bonder' in props:
-                fg_id = props['fg_id']
-                if len(bonder_ids) < fg_id + 1:
-                    diff = fg_id + 1 - len(bonder_ids)
-                    bonder_ids.extend([] for i in range(diff))
-                bonder_ids[fg_id].append(atom_id)
+
+        # Put the atom properties back on the rdkit molecule, where
+        # they are kept by all other molecules, and remake
+        # atom_props and bonder_ids from them.
+        for atom_id, props in json_dict['atom_props'].items():
+            atom = obj.mol.GetAtomWithIdx(int(atom_id))
+            for name, value in props.items():
+                if isinstance(value, int):
+                    atom.SetIntProp(name, value)
+                else:
+                    atom.SetProp(name, str(value))
+        obj.save_atom_props()
 
         if CACHE_SETTINGS['ON']:
             cls.cache[key] = obj
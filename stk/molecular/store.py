@@ -0,0 +1,1147 @@
+"""
+Defines :class:`MoleculeStore`, a persistent store of molecules.
+
+The caches held by :class:`.Cached` classes only live as long as the
+process which made them. A :class:`MoleculeStore` keeps molecules in
+an SQLite database on disk, so that molecules which were already
+built or optimized do not have to be remade after a restart.
+
+The store is opt-in. It is used once it is placed in
+:data:`.CACHE_SETTINGS`:
+
+.. code-block:: python
+
+    CACHE_SETTINGS['STORE'] = MoleculeStore('molecules.db')
+
+After this, creating a :class:`.MacroMolecule` first looks for it in
+the store and :meth:`.Population.optimize` skips any molecule whose
+optimized structure is already held by the store. Newly built and
+newly optimized molecules are written to the store as they are made.
+
+Entries are keyed by the class and :attr:`~.MacroMolecule.key` of the
+molecule together with the :class:`.FunctionData` of the optimization
+function used on it. Molecules which were not optimized are stored
+under the ``None`` optimization.
+
+An :class:`OptimizationCheckpoint` keeps the molecules optimized by a
+single :meth:`.Population.optimize` call in an append-only file, each
+one written as soon as it is done. A run which was interrupted can be
+resumed without repeating the optimizations which had finished:
+
+.. code-block:: python
+
+    with OptimizationCheckpoint('generation_12.ckpt') as checkpoint:
+        pop.optimize(func_data, checkpoint=checkpoint)
+
+A :class:`PropertyStore` keeps the results of :class:`.Energy`
+calculations in the same way. It is used once it is placed in
+:data:`.CACHE_SETTINGS`:
+
+.. code-block:: python
+
+    CACHE_SETTINGS['PROPERTIES'] = PropertyStore('properties.db')
+
+A :class:`SharedMoleculeCache` holds molecules in a
+:mod:`multiprocessing` manager process instead of a file. It lets the
+processes of a pool share the molecules they build, so that each
+molecule is built at most once:
+
+.. code-block:: python
+
+    with SharedMoleculeCache() as shared:
+        CACHE_SETTINGS['SHARED'] = shared
+        with mp.Pool(initializer=shared.install) as pool:
+            ...
+
+A :class:`SharedEnergyMemo` does the same for the energies of building
+blocks and products needed by formation energies. Each of them is
+then calculated once, by one process, however many molecules are
+made from it:
+
+.. code-block:: python
+
+    with SharedEnergyMemo() as memo:
+        CACHE_SETTINGS['ENERGIES'] = memo
+        with mp.Pool(initializer=memo.install) as pool:
+            ...
+
+"""
+
+from abc import ABC, abstractmethod
+import hashlib
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+import rdkit.Chem.AllChem as rdkit
+
+from .energy import Energy
+from ..utilities import FunctionData, CACHE_SETTINGS
+
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical(obj):
+    """
+    Returns a representation of `obj` which is stable across runs.
+
+    The iteration order of sets and the order in which parameters
+    were given to a :class:`.FunctionData` do not affect the
+    result.
+
+    Parameters
+    ----------
+    obj : :class:`object`
+        The object to represent. Usually a molecule key or a
+        :class:`.FunctionData` instance.
+
+    Returns
+    -------
+    :class:`str`
+        The representation of `obj`.
+
+    """
+
+    if isinstance(obj, (set, frozenset)):
+        return '{' + ', '.join(sorted(_canonical(x) for x in obj)) + '}'
+    if isinstance(obj, (tuple, list)):
+        return '(' + ', '.join(_canonical(x) for x in obj) + ')'
+    if isinstance(obj, dict):
+        items = sorted(f'{key!r}: {_canonical(value)}' for
+                       key, value in obj.items())
+        return '{' + ', '.join(items) + '}'
+    if isinstance(obj, FunctionData):
+        return f'FunctionData({obj.name!r}, {_canonical(obj.params)})'
+    return repr(obj)
+
+
+class _MoleculeBlobs(ABC):
+    """
+    Saves molecules as compressed binary blobs.
+
+    Subclasses decide where the blobs are kept by implementing
+    :meth:`_read` and :meth:`_write`.
+
+    """
+
+    # Attributes of a molecule which are not saved, either because
+    # they are provided when the molecule is loaded or because they
+    # are saved separately.
+    _skip = {'building_blocks', 'topology', 'key', 'energy',
+             'bb_counter', 'mol'}
+
+    @staticmethod
+    def _keys(mol_class, key, func_data):
+        return (f'{mol_class.__name__}{_canonical(key)}',
+                '' if func_data is None else _canonical(func_data))
+
+    @abstractmethod
+    def _read(self, keys):
+        """
+        Returns the blob saved under `keys`.
+
+        Parameters
+        ----------
+        keys : :class:`tuple` of :class:`str`
+            The molecule and optimization keys of the blob.
+
+        Returns
+        -------
+        :class:`bytes`
+            The blob, or ``None`` if there is none.
+
+        """
+
+    @abstractmethod
+    def _write(self, keys, blob):
+        """
+        Saves a blob under `keys`, replacing any previous one.
+
+        Parameters
+        ----------
+        keys : :class:`tuple` of :class:`str`
+            The molecule and optimization keys of the blob.
+
+        blob : :class:`bytes`
+            The blob to save.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+    def _fetch(self, mol_class, key, func_data):
+        """
+        Returns the saved attributes of a molecule.
+
+        Parameters
+        ----------
+        mol_class : :class:`type`
+            The class of the molecule.
+
+        key : :class:`object`
+            The key of the molecule.
+
+        func_data : :class:`.FunctionData`
+            The optimization function applied to the molecule.
+
+        Returns
+        -------
+        :class:`dict`
+            The saved attributes of the molecule, or ``None`` if the
+            molecule is not saved.
+
+        """
+
+        blob = self._read(self._keys(mol_class, key, func_data))
+        if blob is None:
+            return None
+
+        state = pickle.loads(zlib.decompress(blob))
+        state['mol'] = rdkit.Mol(state['mol'])
+        return state
+
+    @staticmethod
+    def _restore(obj, state):
+        """
+        Sets the attributes of `obj` from a saved state.
+
+        The building blocks of `obj` must already be set.
+
+        Parameters
+        ----------
+        obj : :class:`.Molecule`
+            The molecule to update.
+
+        state : :class:`dict`
+            The saved attributes of a molecule.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        energy_values = state.pop('energy_values')
+        if 'bb_counter' in state:
+            bbs = {bb.key: bb for bb in obj.building_blocks}
+            obj.bb_counter = Counter({bbs[key]: count for
+                                      key, count in
+                                      state.pop('bb_counter')})
+        obj.__dict__.update(state)
+        obj.energy = Energy(obj)
+        obj.energy.values = energy_values
+
+    def load(self,
+             mol_class,
+             key,
+             building_blocks,
+             topology,
+             func_data=None):
+        """
+        Creates a saved molecule.
+
+        Parameters
+        ----------
+        mol_class : :class:`type`
+            The class of the molecule.
+
+        key : :class:`object`
+            The key of the molecule.
+
+        building_blocks : :class:`list` of :class:`.StructUnit`
+            The building blocks of the molecule.
+
+        topology : :class:`.Topology`
+            The topology of the molecule.
+
+        func_data : :class:`.FunctionData`, optional
+            The optimization function applied to the molecule.
+
+        Returns
+        -------
+        :class:`.MacroMolecule`
+            The molecule, or ``None`` if it is not saved.
+
+        """
+
+        state = self._fetch(mol_class, key, func_data)
+        if state is None:
+            return None
+
+        obj = mol_class.__new__(mol_class)
+        obj.building_blocks = building_blocks
+        obj.topology = topology
+        obj.key = key
+        self._restore(obj, state)
+        logger.debug(f'Loaded "{obj.name}" from {self}.')
+        return obj
+
+    def update(self, mol, func_data=None):
+        """
+        Updates a molecule with its saved structure.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule to update.
+
+        func_data : :class:`.FunctionData`, optional
+            The optimization function applied to the saved molecule.
+
+        Returns
+        -------
+        :class:`bool`
+            ``True`` if `mol` was saved and has been updated.
+
+        """
+
+        state = self._fetch(mol.__class__, mol.key, func_data)
+        if state is None:
+            return False
+
+        self._restore(mol, state)
+        logger.debug(f'Loaded "{mol.name}" from {self}.')
+        return True
+
+    def put(self, mol, func_data=None):
+        """
+        Saves a molecule.
+
+        Any molecule saved with the same key is replaced.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule to save.
+
+        func_data : :class:`.FunctionData`, optional
+            The optimization function applied to `mol`.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        state = {attr: val for attr, val in vars(mol).items() if
+                 attr not in self._skip}
+        state['mol'] = mol.mol.ToBinary(
+                                rdkit.PropertyPickleOptions.AllProps)
+        state['energy_values'] = mol.energy.values
+        if hasattr(mol, 'bb_counter'):
+            state['bb_counter'] = [(bb.key, count) for
+                                   bb, count in mol.bb_counter.items()]
+        self._write(self._keys(mol.__class__, mol.key, func_data),
+                    zlib.compress(pickle.dumps(state)))
+
+
+class MoleculeStore(_MoleculeBlobs):
+    """
+    A persistent store of molecules held in an SQLite database.
+
+    The ``rdkit`` molecule is saved in its binary form, together
+    with the remaining attributes of the molecule, and compressed.
+    Building blocks and topologies are not saved, they are provided
+    by the code loading the molecule.
+
+    Attributes
+    ----------
+    path : :class:`str`
+        The path to the database file.
+
+    db : :class:`sqlite3.Connection`
+        The connection to the database.
+
+    lock : :class:`threading.Lock`
+        Serializes access to :attr:`db`, so that the store can be
+        shared between threads.
+
+    """
+
+    def __init__(self, path):
+        """
+        Initializes a :class:`MoleculeStore`.
+
+        Parameters
+        ----------
+        path : :class:`str`
+            The path to the database file. It is created if it does
+            not exist.
+
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS molecules ('
+                            'mol_key TEXT NOT NULL, '
+                            'func_key TEXT NOT NULL, '
+                            'state BLOB NOT NULL, '
+                            'PRIMARY KEY (mol_key, func_key))')
+
+    def _read(self, keys):
+        with self.lock:
+            row = self.db.execute(
+                'SELECT state FROM molecules '
+                'WHERE mol_key = ? AND func_key = ?', keys).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, keys, blob):
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO molecules VALUES (?, ?, ?)',
+                (*keys, blob))
+
+    def close(self):
+        """
+        Closes the connection to the database.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            self.db.close()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+
+class OptimizationCheckpoint(_MoleculeBlobs):
+    """
+    An append-only file of optimized molecules.
+
+    :meth:`.Population.optimize` writes each molecule to the
+    checkpoint as soon as its optimization is done. If the process
+    dies, giving the same checkpoint to :meth:`.Population.optimize`
+    again restores the molecules which were finished and only the
+    others are optimized.
+
+    Each molecule is appended to the file as a record holding its
+    length and checksum, and the file is flushed to disk after every
+    record. A record cut short by a crash is dropped when the file is
+    opened again. If a molecule is saved more than once, the last
+    record is used.
+
+    Attributes
+    ----------
+    path : :class:`str`
+        The path to the checkpoint file.
+
+    lock : :class:`threading.Lock`
+        Serializes writes to the file, so that the checkpoint can be
+        shared between threads.
+
+    """
+
+    _header = struct.Struct('<II')
+
+    def __init__(self, path):
+        """
+        Initializes a :class:`OptimizationCheckpoint`.
+
+        Parameters
+        ----------
+        path : :class:`str`
+            The path to the checkpoint file. It is created if it does
+            not exist, otherwise the molecules saved in it are read.
+
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self._blobs = {}
+        self._file = open(path, 'a+b')
+        self._file.seek(0)
+        end = 0
+        while True:
+            header = self._file.read(self._header.size)
+            if len(header) < self._header.size:
+                break
+            size, checksum = self._header.unpack(header)
+            record = self._file.read(size)
+            if len(record) < size or zlib.crc32(record) != checksum:
+                break
+            keys, blob = pickle.loads(record)
+            self._blobs[keys] = blob
+            end = self._file.tell()
+
+        if end != os.path.getsize(path):
+            logger.warning(f'Dropping an incomplete record at the end '
+                           f'of "{path}".')
+            self._file.truncate(end)
+
+    def _read(self, keys):
+        return self._blobs.get(keys)
+
+    def _write(self, keys, blob):
+        record = pickle.dumps((keys, blob), pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._file.write(self._header.pack(len(record),
+                                               zlib.crc32(record)))
+            self._file.write(record)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._blobs[keys] = blob
+
+    def close(self):
+        """
+        Closes the checkpoint file.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+
+class _SharedClaims(ABC):
+    """
+    Values shared by the processes of a machine.
+
+    The values are held by a :mod:`multiprocessing` manager process.
+    Instances can be pickled and sent to other processes, which then
+    use the same values.
+
+    Before a process makes a value, it claims it. Other processes and
+    threads which want the same value wait for it to be published
+    rather than making it a second time.
+
+    Attributes
+    ----------
+    claims : :class:`multiprocessing.managers.DictProxy`
+        Maps the keys of values which are being made to a
+        :class:`str` identifying the process and thread making them.
+
+    timeout : :class:`float`
+        The number of seconds to wait for a value claimed by someone
+        else. Once this runs out, the value is made anyway.
+
+    poll : :class:`float`
+        The number of seconds between checks for a claimed value.
+
+    """
+
+    # The key of the instance in CACHE_SETTINGS.
+    _setting = None
+
+    def __init__(self, manager, timeout, poll):
+        self._owns_manager = manager is None
+        self._manager = mp.Manager() if manager is None else manager
+        self.claims = self._manager.dict()
+        self.timeout = timeout
+        self.poll = poll
+
+    @staticmethod
+    def _token():
+        return f'{os.getpid()}:{threading.get_ident()}'
+
+    @abstractmethod
+    def _published(self, keys):
+        """
+        Returns ``True`` if the value of `keys` was published.
+
+        """
+
+    def _claim(self, keys, lookup):
+        """
+        Returns a value or claims the right to make it.
+
+        If someone else is making the value, this waits until they
+        publish it, up to :attr:`timeout` seconds.
+
+        Parameters
+        ----------
+        keys : :class:`tuple`
+            The keys of the value.
+
+        lookup : :class:`function`
+            Called without arguments to get the value. Returns
+            ``None`` if the value was not published.
+
+        Returns
+        -------
+        :class:`object`
+            The value, or ``None`` if the caller should make it and
+            publish it, or :meth:`_release` it on failure.
+
+        """
+
+        token = self._token()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            value = lookup()
+            if value is not None:
+                return value
+
+            if self.claims.setdefault(keys, token) == token:
+                # The value may have been published between the
+                # failed lookup and the claim.
+                if not self._published(keys):
+                    return None
+                self._release(keys)
+
+            elif time.monotonic() > deadline:
+                logger.warning(f'Timed out waiting for {keys}.')
+                return None
+
+            else:
+                time.sleep(self.poll)
+
+    def _release(self, keys):
+        if self.claims.get(keys) == self._token():
+            self.claims.pop(keys, None)
+
+    def install(self):
+        """
+        Makes this process use this instance.
+
+        This is meant to be used as the `initializer` of a
+        :class:`multiprocessing.pool.Pool`.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        CACHE_SETTINGS[self._setting] = self
+
+    def close(self):
+        """
+        Shuts down the manager, if it was started by this instance.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        if self._owns_manager:
+            self._manager.shutdown()
+
+    def __getstate__(self):
+        state = dict(vars(self))
+        # Managers cannot be pickled, only their proxies can.
+        state['_manager'] = None
+        state['_owns_manager'] = False
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+class SharedMoleculeCache(_SharedClaims, _MoleculeBlobs):
+    """
+    A cache of molecules shared by the processes of a machine.
+
+    The molecules are held as compressed binary blobs by a
+    :mod:`multiprocessing` manager process. Instances can be pickled
+    and sent to other processes, which then use the same cache.
+
+    Before a process builds a molecule, it claims it. Other
+    processes and threads which want the same molecule wait for it
+    to be published rather than building it a second time.
+
+    Attributes
+    ----------
+    blobs : :class:`multiprocessing.managers.DictProxy`
+        Maps the keys of a molecule to its blob.
+
+    claims : :class:`multiprocessing.managers.DictProxy`
+        Maps the keys of molecules which are being built to a
+        :class:`str` identifying the process and thread building it.
+
+    timeout : :class:`float`
+        The number of seconds to wait for a molecule claimed by
+        someone else. Once this runs out, the molecule is built
+        anyway.
+
+    poll : :class:`float`
+        The number of seconds between checks for a claimed molecule.
+
+    """
+
+    _setting = 'SHARED'
+
+    def __init__(self, manager=None, timeout=600, poll=0.05):
+        """
+        Initializes a :class:`SharedMoleculeCache`.
+
+        Parameters
+        ----------
+        manager : :class:`multiprocessing.managers.SyncManager`, optional
+            The manager which holds the molecules. If ``None``, a new
+            manager is started and it is shut down by :meth:`close`.
+
+        timeout : :class:`float`, optional
+            The number of seconds to wait for a molecule claimed by
+            someone else.
+
+        poll : :class:`float`, optional
+            The number of seconds between checks for a claimed
+            molecule.
+
+        """
+
+        super().__init__(manager, timeout, poll)
+        self.blobs = self._manager.dict()
+
+    def _published(self, keys):
+        return keys in self.blobs
+
+    def _read(self, keys):
+        return self.blobs.get(keys)
+
+    def _write(self, keys, blob):
+        self.blobs[keys] = blob
+        self.claims.pop(keys, None)
+
+    def load_or_claim(self, mol_class, key, building_blocks, topology):
+        """
+        Returns a molecule or claims the right to build it.
+
+        If someone else is building the molecule, this waits until
+        they publish it, up to :attr:`timeout` seconds.
+
+        Parameters
+        ----------
+        mol_class : :class:`type`
+            The class of the molecule.
+
+        key : :class:`object`
+            The key of the molecule.
+
+        building_blocks : :class:`list` of :class:`.StructUnit`
+            The building blocks of the molecule.
+
+        topology : :class:`.Topology`
+            The topology of the molecule.
+
+        Returns
+        -------
+        :class:`.MacroMolecule`
+            The molecule, or ``None`` if the caller should build it
+            and then :meth:`put` it, or :meth:`release` it on
+            failure.
+
+        """
+
+        keys = self._keys(mol_class, key, None)
+        return self._claim(
+            keys,
+            lambda: self.load(mol_class, key, building_blocks, topology))
+
+    def release(self, mol_class, key):
+        """
+        Gives up a claim made by :meth:`load_or_claim`.
+
+        Parameters
+        ----------
+        mol_class : :class:`type`
+            The class of the molecule.
+
+        key : :class:`object`
+            The key of the molecule.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        self._release(self._keys(mol_class, key, None))
+
+
+class SharedEnergyMemo(_SharedClaims):
+    """
+    Energies of molecules shared by the processes of a machine.
+
+    Used by :meth:`.Energy.formation` and
+    :meth:`.Energy.pseudoformation` for the energies of building
+    blocks and products, once placed in :data:`.CACHE_SETTINGS`.
+    Energies are keyed by the class and key of a molecule, a hash of
+    its geometry and the :class:`.FunctionData` of the energy
+    calculation. As with :class:`PropertyStore`, an energy is not
+    returned once the structure of the molecule changes. Molecules
+    without a key are not memoized.
+
+    As with :class:`SharedMoleculeCache`, a process claims an energy
+    before calculating it, and other processes wait for the result
+    rather than calculating it a second time.
+
+    Attributes
+    ----------
+    values : :class:`multiprocessing.managers.DictProxy`
+        Maps the keys of an energy to its value.
+
+    claims : :class:`multiprocessing.managers.DictProxy`
+        Maps the keys of energies which are being calculated to a
+        :class:`str` identifying the process and thread doing it.
+
+    timeout : :class:`float`
+        The number of seconds to wait for an energy claimed by
+        someone else. Once this runs out, it is calculated anyway.
+
+    poll : :class:`float`
+        The number of seconds between checks for a claimed energy.
+
+    """
+
+    _setting = 'ENERGIES'
+
+    def __init__(self, manager=None, timeout=600, poll=0.05):
+        """
+        Initializes a :class:`SharedEnergyMemo`.
+
+        Parameters
+        ----------
+        manager : :class:`multiprocessing.managers.SyncManager`, optional
+            The manager which holds the energies. If ``None``, a new
+            manager is started and it is shut down by :meth:`close`.
+
+        timeout : :class:`float`, optional
+            The number of seconds to wait for an energy claimed by
+            someone else.
+
+        poll : :class:`float`, optional
+            The number of seconds between checks for a claimed energy.
+
+        """
+
+        super().__init__(manager, timeout, poll)
+        self.values = self._manager.dict()
+
+    @staticmethod
+    def _keys(mol, func_data):
+        key = getattr(mol, 'key', None)
+        if key is None:
+            return None
+        return (f'{mol.__class__.__name__}{_canonical(key)}',
+                PropertyStore.geometry_hash(mol),
+                _canonical(func_data))
+
+    def _published(self, keys):
+        return keys in self.values
+
+    def get_or_claim(self, mol, func_data):
+        """
+        Returns an energy or claims the right to calculate it.
+
+        If someone else is calculating the energy, this waits until
+        they :meth:`put` it, up to :attr:`timeout` seconds.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule whose energy is needed.
+
+        func_data : :class:`.FunctionData`
+            The key of the energy calculation in
+            :attr:`.Energy.values`.
+
+        Returns
+        -------
+        :class:`tuple`
+            ``(True, value)`` if the energy was found. Otherwise
+            ``(False, None)``, in which case the caller should
+            calculate the energy and then :meth:`put` it, or
+            :meth:`release` it on failure.
+
+        """
+
+        keys = self._keys(mol, func_data)
+        if keys is None:
+            return False, None
+
+        value = self._claim(keys, lambda: self.values.get(keys))
+        return value is not None, value
+
+    def put(self, mol, func_data, value):
+        """
+        Saves an energy and releases any claim on it.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule whose energy was calculated.
+
+        func_data : :class:`.FunctionData`
+            The key of the energy calculation in
+            :attr:`.Energy.values`.
+
+        value : :class:`float`
+            The energy.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        keys = self._keys(mol, func_data)
+        if keys is not None:
+            self.values[keys] = value
+            self.claims.pop(keys, None)
+
+    def release(self, mol, func_data):
+        """
+        Gives up a claim made by :meth:`get_or_claim`.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule whose energy was claimed.
+
+        func_data : :class:`.FunctionData`
+            The key of the energy calculation in
+            :attr:`.Energy.values`.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        keys = self._keys(mol, func_data)
+        if keys is not None:
+            self._release(keys)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PropertyStore:
+    """
+    A persistent store of calculated molecular properties.
+
+    Values are keyed by the class and key of the molecule, a hash of
+    its geometry and the :class:`.FunctionData` of the calculation.
+    Because the geometry is part of the key, values calculated for a
+    structure are not returned once the structure changes, for
+    example after an optimization.
+
+    The values are held in an SQLite database, which can be used by
+    many processes at once. Instances can be pickled and sent to
+    other processes, which then use the same database.
+
+    Attributes
+    ----------
+    path : :class:`str`
+        The path to the database file.
+
+    timeout : :class:`float`
+        The number of seconds to wait for another process to finish
+        writing to the database.
+
+    db : :class:`sqlite3.Connection`
+        The connection to the database.
+
+    lock : :class:`threading.Lock`
+        Serializes access to :attr:`db`, so that the store can be
+        shared between threads.
+
+    """
+
+    def __init__(self, path, timeout=60):
+        """
+        Initializes a :class:`PropertyStore`.
+
+        Parameters
+        ----------
+        path : :class:`str`
+            The path to the database file. It is created if it does
+            not exist.
+
+        timeout : :class:`float`, optional
+            The number of seconds to wait for another process to
+            finish writing to the database.
+
+        """
+
+        self.path = path
+        self.timeout = timeout
+        self._connect()
+
+    def _connect(self):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path,
+                                  timeout=self.timeout,
+                                  check_same_thread=False)
+        # Write ahead logging lets processes read while another one
+        # is writing.
+        self.db.execute('PRAGMA journal_mode=WAL')
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS properties ('
+                            'mol_key TEXT NOT NULL, '
+                            'geometry TEXT NOT NULL, '
+                            'func_key TEXT NOT NULL, '
+                            'value BLOB NOT NULL, '
+                            'PRIMARY KEY (mol_key, geometry, func_key))')
+
+    @staticmethod
+    def geometry_hash(mol):
+        """
+        Returns a hash of the coordinates of all conformers of `mol`.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule whose geometry is hashed.
+
+        Returns
+        -------
+        :class:`str`
+            The hash.
+
+        """
+
+        geometry = hashlib.sha1()
+        for conformer in mol.mol.GetConformers():
+            # Adding 0 turns -0 into 0, which has different bytes.
+            coords = np.round(conformer.GetPositions(), 6) + 0.
+            geometry.update(coords.tobytes())
+        return geometry.hexdigest()
+
+    def _keys(self, mol, func_data, geometry):
+        mol_key, func_key = _MoleculeBlobs._keys(mol.__class__,
+                                                 mol.key,
+                                                 func_data)
+        if geometry is None:
+            geometry = self.geometry_hash(mol)
+        return mol_key, geometry, func_key
+
+    def get(self, mol, func_data, geometry=None):
+        """
+        Returns a stored value.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule for which the value was calculated.
+
+        func_data : :class:`.FunctionData`
+            The calculation which produced the value.
+
+        geometry : :class:`str`, optional
+            The :meth:`geometry_hash` of the structure the value was
+            calculated from. If ``None``, the current geometry of
+            `mol` is used.
+
+        Returns
+        -------
+        :class:`tuple`
+            A :class:`bool` which is ``True`` if the value was found
+            and the value itself, or ``None`` if it was not found.
+
+        """
+
+        if getattr(mol, 'key', None) is None:
+            return False, None
+
+        with self.lock:
+            row = self.db.execute(
+                'SELECT value FROM properties WHERE mol_key = ? AND '
+                'geometry = ? AND func_key = ?',
+                self._keys(mol, func_data, geometry)).fetchone()
+
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def put(self, mol, func_data, value, geometry=None):
+        """
+        Stores a value.
+
+        Any value stored with the same key is replaced. Molecules
+        without a key are ignored.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule for which the value was calculated.
+
+        func_data : :class:`.FunctionData`
+            The calculation which produced the value.
+
+        value : :class:`object`
+            The value.
+
+        geometry : :class:`str`, optional
+            The :meth:`geometry_hash` of the structure the value was
+            calculated from. If ``None``, the current geometry of
+            `mol` is used. It should be given if the calculation
+            changed the structure.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        if getattr(mol, 'key', None) is None:
+            return
+
+        keys = self._keys(mol, func_data, geometry)
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?)',
+                (*keys, pickle.dumps(value)))
+
+    def close(self):
+        """
+        Closes the connection to the database.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            self.db.close()
+
+    def __getstate__(self):
+        return {'path': self.path, 'timeout': self.timeout}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._connect()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
@@ -66,57 +66,46 @@ topology is at the origin.
 
 import rdkit.Chem.AllChem as rdkit
 import numpy as np
+import copy
 from inspect import signature
 
-from ..functional_groups import react
+from ..functional_groups import react_many
 from ...utilities import dedupe, add_fragment_props, remake
 
 
-def remove_confs(building_blocks, keep):
+def working_copy(bb, conformer):
     """
-    Removes all conformers from `building_blocks` except `keep`.
+    Returns a copy of `bb` which can be modified while building.
 
-    All kept conformers have their id set to ``0``.
+    Only the ``rdkit`` molecule is copied, all other attributes are
+    shared with `bb`.
 
     Parameters
     ----------
-    building_blocks : :class:`iterable` of :class:`.StructUnit`
-        A set of :class:`.StructUnit` instances which represent the
-        building blocks forming a macromolecule.
+    bb : :class:`.StructUnit`
+        A building block of a macromolecule being built.
 
-    keep : :class:`list` of :class:`int`
-        The ids of the building block conformers to be used for
-        assembling the :class:`.MacroMolecule`. Must be equal in length
-        to `building_blocks` and orders must correspond.
+    conformer : :class:`int`
+        The id of the conformer of `bb` used for the build. It is the
+        only conformer in the copy and has its id set to ``0``.
 
     Returns
     -------
-    :class:`list`
-        A :class:`list` of the form,
-
-        .. code-block:: python
-
-            returned = [[conf1, conf2, conf3],
-                        [conf4, conf5],
-                        [conf6, conf7, conf8, conf9]]
-
-        where each sublist holds all the original conformers of a
-        particular building block.
+    :class:`.StructUnit`
+        The copy of `bb`.
 
     """
 
-    keep_ids = [bb.mol.GetConformer(id_).GetId() for
-                bb, id_ in zip(building_blocks, keep)]
+    bb_copy = bb.__class__.__new__(bb.__class__)
+    bb_copy.__dict__.update(vars(bb))
 
-    original_confs = [[rdkit.Conformer(conf) for
-                       conf in bb.mol.GetConformers()]
-                      for bb in building_blocks]
-    for bb, conf in zip(building_blocks, keep_ids):
-        keep_conf = rdkit.Conformer(bb.mol.GetConformer(conf))
-        keep_conf.SetId(0)
-        bb.mol.RemoveAllConformers()
-        bb.mol.AddConformer(keep_conf)
-    return original_confs
+    conf_id = bb.mol.GetConformer(conformer).GetId()
+    bb_copy.mol = rdkit.Mol(bb.mol, confId=conf_id)
+    bb_copy.mol.GetConformer().SetId(0)
+    # When running ``build()`` in parallel, the atom tags are cleared
+    # by the multiprocessing module. Make sure to reapply the tags.
+    bb_copy.tag_atoms()
+    return bb_copy
 
 
 class TopologyMeta(type):
@@ -208,37 +197,62 @@ class Topology(metaclass=TopologyMeta):
             bb_conformers = [-1 for _ in
                              range(len(macro_mol.building_blocks))]
 
-        # When running ``build()`` in parallel, the atom tags are
-        # cleared by the multiprocessing module. Make sure to reapply
-        # the tags before running ``build()``.
-        for bb in macro_mol.building_blocks:
-            bb.tag_atoms()
-
-        # When building, only a single conformer should exist per
-        # building block. Otherwise, rdkit.CombineMols won't work. It
-        # only combines conformers with the same id.
-        original_confs = remove_confs(macro_mol.building_blocks,
-                                      bb_conformers)
-
-        macro_mol.bonds_made = 0
-        self.place_mols(macro_mol)
-        self.prepare(macro_mol)
-        for fgs in self.bonded_fgs(macro_mol):
-            macro_mol.mol, new_bonds = react(macro_mol.mol,
-                                             self.react_del,
-                                             *fgs)
-            macro_mol.bonds_made += new_bonds
-        self.cleanup(macro_mol)
+        # Building modifies the building blocks and the topology. So
+        # that different molecules can be built at the same time,
+        # without affecting each other, the build is done with private
+        # copies of both. Only a single conformer exists in each
+        # building block copy, because rdkit.CombineMols only combines
+        # conformers with the same id.
+        building_blocks = macro_mol.building_blocks
+        macro_mol.building_blocks = [
+            working_copy(bb, conformer) for
+            bb, conformer in zip(building_blocks, bb_conformers)
+        ]
+        context = self.build_context()
+
+        try:
+            context.place_mols(macro_mol)
+            context.prepare(macro_mol)
+            # All bonds are made in a single batch.
+            macro_mol.mol, macro_mol.bonds_made = react_many(
+                                            macro_mol.mol,
+                                            context.react_del,
+                                            context.bonded_fgs(macro_mol))
+            context.cleanup(macro_mol)
+
+        finally:
+            # Put back the original building blocks and count them
+            # instead of the copies.
+            copies = macro_mol.building_blocks
+            macro_mol.building_blocks = building_blocks
+            for bb_copy, bb in zip(copies, building_blocks):
+                count = macro_mol.bb_counter.pop(bb_copy, 0)
+                if count:
+                    macro_mol.bb_counter[bb] += count
 
         # Make sure that the property cache of each atom is up to date.
         for atom in macro_mol.mol.GetAtoms():
             atom.UpdatePropertyCache()
 
-        # Restore the original conformers.
-        for bb, confs in zip(macro_mol.building_blocks, original_confs):
-            bb.mol.RemoveAllConformers()
-            for conf in confs:
-                bb.mol.AddConformer(conf)
+    def build_context(self):
+        """
+        Returns a copy of the topology for use in a single build.
+
+        Topologies may store the state of a build, for example which
+        functional groups sit on which vertex, on themselves. A copy is
+        made for every build, so that the topology itself and any
+        class attributes it holds, are never modified by a build.
+        Subclasses holding state in mutable attributes must extend this
+        method so that the attributes are copied too.
+
+        Returns
+        -------
+        :class:`Topology`
+            The copy of the topology.
+
+        """
+
+        return copy.copy(self)
 
     def place_mols(self, macro_mol):
         """
@@ -294,7 +308,10 @@ class Topology(metaclass=TopologyMeta):
         bonded to create the final macromolecule. It then yields the
         ids functional groups as a :class:`tuple`.
 
-        This :class:`tuple` gets passed to :func:`.react`.
+        The yielded :class:`tuple` instances are collected and passed
+        to :func:`.react_many`, which makes all the bonds in a single
+        batch. This means that no bonds have been made while this
+        method is running.
 
         Parameters
         ----------
@@ -498,6 +515,11 @@ class Linear(Topology):
         Functional groups are tagged with ``'fg_id'`` such that
         ``'fg_id'`` increases along the x-axis.
 
+        Each distinct combination of monomer and orientation is only
+        placed once, by :meth:`_monomer_template`. The polymer is then
+        made by tiling the coordinates of these templates along the
+        x-axis, which means it is built in linear time.
+
         Parameters
         ----------
         macro_mol : :class:`.Polymer`
@@ -523,48 +545,104 @@ class Linear(Topology):
         # not just the repeating unit.
         dirs = self.orientation*self.n
 
-        # Go through the repeating unit and place each monomer.
-        macro_mol.mol = rdkit.Mol()
-
+        polymer_mol = rdkit.RWMol()
+        positions = []
+        templates = {}
+        max_x = 0
         for i, (label, mdir) in enumerate(zip(polymer, dirs)):
-            bb = mapping[label]
-            original_position = bb.position_matrix()
-
             # Flip or not flip the monomer as given by the probability
             # in `mdir`.
             mdir = np.random.choice([1, -1], p=[mdir, 1-mdir])
-            bb.set_orientation2([mdir, 0, 0])
+            if (label, mdir) not in templates:
+                templates[label, mdir] = self._monomer_template(
+                                                macro_mol,
+                                                mapping[label],
+                                                mdir)
+            mol, coords, bb_len, fg_atoms = templates[label, mdir]
+
+            # The first building block should be placed at 0, the
+            # others are placed about 3 A away from the end of the
+            # chain.
+            x_coord = max_x + bb_len + 3 if i else 0
+            max_x = max(max_x, x_coord + coords[:, 0].max())
+            positions.append(coords + [x_coord, 0, 0])
+
+            offset = polymer_mol.GetNumAtoms()
+            polymer_mol.InsertMol(mol)
+
+            # Add fragment and fg_id tags. The fg at the back gets the
+            # id 2*i and the one at the front 2*i+1.
+            for atom_id in range(offset, polymer_mol.GetNumAtoms()):
+                polymer_mol.GetAtomWithIdx(atom_id).SetIntProp(
+                                                        'mol_index', i)
+            for atom_id, front in fg_atoms:
+                polymer_mol.GetAtomWithIdx(offset+atom_id).SetIntProp(
+                                                    'fg_id', 2*i+front)
+
+        conf = rdkit.Conformer(polymer_mol.GetNumAtoms())
+        for atom_id, coord in enumerate(np.concatenate(positions)):
+            conf.SetAtomPosition(atom_id, coord.tolist())
+        macro_mol.mol = polymer_mol.GetMol()
+        macro_mol.mol.AddConformer(conf)
+
+    def _monomer_template(self, macro_mol, bb, mdir):
+        """
+        Places a single monomer for tiling along the chain.
 
-            # The first building block should be placed at 0, the others
-            # have positions calculated based on bb size.
-            x_coord = self._x_position(macro_mol, bb) if i else 0
-            monomer_mol = bb.set_bonder_centroid([x_coord, 0, 0])
-            monomer_mol = rdkit.Mol(monomer_mol)
+        Parameters
+        ----------
+        macro_mol : :class:`.Polymer`
+            The polymer being assembled.
 
-            bb_index = macro_mol.building_blocks.index(bb)
-            add_fragment_props(monomer_mol, bb_index, i)
+        bb : :class:`.StructUnit`
+            The monomer to be placed.
 
-            # Add fg_id tags.
+        mdir : :class:`int`
+            ``1`` if the monomer is not flipped and ``-1`` if it is.
 
-            # Check which funcitonal group is at the back and which
-            # one at the front.
-            if len(bb.bonder_ids) == 1:
-                c1, c2 = bb.bonder_centroid(), bb.centroid()
-            else:
-                c1, c2 = list(bb.bonder_centroids())
-            front = 1 if c1[0] < c2[0] else 0
-            back = 1 if front != 1 else 0
+        Returns
+        -------
+        :class:`tuple`
+            The first element is a copy of the ``rdkit`` molecule of
+            `bb`, without conformers and with fragment properties
+            added. The second element is a :class:`numpy.ndarray` of
+            shape ``[n, 3]`` holding the coordinates of the monomer,
+            when oriented along the x-axis and with its bonder
+            centroid at the origin. The third element is the distance
+            along the x-axis between the centroid of the monomer and
+            its atom with the smallest x coordinate. The fourth element
+            is a :class:`list` holding a :class:`tuple` for each atom
+            in a functional group. The :class:`tuple` holds the id of
+            the atom and ``1`` if the functional group is at the front
+            of the monomer or ``0`` if it is at the back.
+
+        """
+
+        original_position = bb.position_matrix()
+
+        bb.set_orientation2([mdir, 0, 0])
+        mol = rdkit.Mol(bb.set_bonder_centroid([0, 0, 0]))
+        coords = mol.GetConformer().GetPositions()
+        bb_len = bb.centroid()[0] - coords[:, 0].min()
 
-            for atom in monomer_mol.GetAtoms():
-                if atom.HasProp('fg'):
-                    fg_id = atom.GetIntProp('fg_id')
-                    fg_id = 2*i if fg_id == back else 2*i+1
-                    atom.SetIntProp('fg_id', fg_id)
+        # Check which funcitonal group is at the back and which
+        # one at the front.
+        if len(bb.bonder_ids) == 1:
+            c1, c2 = bb.bonder_centroid(), bb.centroid()
+        else:
+            c1, c2 = list(bb.bonder_centroids())
+        front = 1 if c1[0] < c2[0] else 0
+        back = 1 if front != 1 else 0
 
-            macro_mol.mol = rdkit.CombineMols(macro_mol.mol,
-                                              monomer_mol)
+        fg_atoms = [
+            (atom.GetIdx(), 0 if atom.GetIntProp('fg_id') == back else 1)
+            for atom in mol.GetAtoms() if atom.HasProp('fg')
+        ]
 
-            bb.set_position_from_matrix(original_position)
+        mol.RemoveAllConformers()
+        add_fragment_props(mol, macro_mol.building_blocks.index(bb), 0)
+        bb.set_position_from_matrix(original_position)
+        return mol, coords, bb_len, fg_atoms
 
     def bonded_fgs(self, macro_mol):
         """
@@ -584,34 +662,3 @@ class Linear(Topology):
 
         for i in range(1, 2*len(self.repeating_unit)*self.n-1, 2):
             yield i, i+1
-
-    def _x_position(self, macro_mol, bb):
-        """
-        Calculates the x coordinate on which to place `bb`.
-
-        Does this by checking the most how for down the x axis
-        `macro_mol` stretches and checking the distance between
-        the minimum x position of `bb` and its centroid.
-        It then tries to place `bb` about 3 A away from `macro_mol`.
-
-        Parameters
-        ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being assembled.
-
-        bb : :class:`.StructUnit`
-            The building block to be added to `macro_mol`.
-
-        Returns
-        -------
-        :class:`float`
-            The x coordinate on which to place `bb`.
-
-        """
-
-        mm_max_x = max(macro_mol.all_atom_coords(),
-                       key=lambda x: x[1][0])[1][0]
-        bb_min_x = min(bb.all_atom_coords(),
-                       key=lambda x: x[1][0])[1][0]
-        bb_len = bb.centroid()[0] - bb_min_x
-        return mm_max_x + bb_len + 3
@@ -1,6 +1,8 @@
 import itertools
-from collections import deque
-from scipy.spatial.distance import euclidean
+import copy
+from collections import deque, defaultdict
+from scipy.spatial.distance import cdist
+from scipy.optimize import linear_sum_assignment
 import numpy as np
 import rdkit.Chem.AllChem as rdkit
 
@@ -11,6 +13,54 @@ from ....utilities import (centroid,
                            normalize_vector)
 
 
+def rotation_group(*rotations):
+    """
+    Returns every rotation generated by `rotations`.
+
+    Used by cage topologies to declare
+    :attr:`CageTopology.symmetry_ops`. Only the generators of the
+    point group need to be provided, the remaining rotations are
+    found by multiplying them together until no new rotation is
+    produced.
+
+    Parameters
+    ----------
+    rotations : :class:`tuple`
+        Each :class:`tuple` holds the order of a rotation axis and
+        the axis itself. For example, ``(3, [0, 0, 1])`` is a
+        rotation by 120 degrees about the z-axis.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        An array of shape ``[n, 3, 3]`` holding the rotation matrices
+        of the group, including the identity.
+
+    """
+
+    generators = []
+    for order, axis in rotations:
+        # normalize_vector() rounds, which would stop the rotations
+        # from forming a closed group, so normalize exactly here.
+        x, y, z = np.array(axis, dtype=float) / np.linalg.norm(axis)
+        k = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+        angle = 2*np.pi / order
+        generators.append(np.identity(3) +
+                          np.sin(angle)*k +
+                          (1-np.cos(angle))*k@k)
+
+    group = [np.identity(3)]
+    seen = {tuple(np.round(np.identity(3), 6).flatten())}
+    for op in group:
+        for generator in generators:
+            new_op = generator @ op
+            key = tuple(np.round(new_op, 6).flatten())
+            if key not in seen:
+                seen.add(key)
+                group.append(new_op)
+    return np.array(group)
+
+
 class Vertex:
     """
     Used to represent the vertices of cage polyhedra.
@@ -75,6 +125,12 @@ class Vertex:
         block being placed is derived from the bonder atoms in the
         conncected vertices.
 
+    unit_geometry : :class:`dict`
+        Holds the geometry of the connected edges at a scale of ``1``,
+        as calculated by :meth:`calc_unit_geometry`. The methods
+        which describe the connected edges read from here and only
+        multiply by the scale. ``None`` until calculated.
+
     """
 
     def __init__(self, x, y, z, id_=None, custom_position=True):
@@ -107,6 +163,7 @@ class Vertex:
         self.fg_position_pairs = []
         self.distances = []
         self.id = id_
+        self.unit_geometry = None
 
     @classmethod
     def vertex_init(cls, *vertices):
@@ -197,33 +254,132 @@ class Vertex:
         """
 
         icoord = building_block.position_matrix()
-        # Flush the list of data from previous molecules.
-        self.distances = []
+
+        centroid, normal, vector = self.placement_frame(scale,
+                                                        aligner_edge,
+                                                        macro_mol)
 
         # The method first aligns the normal of the fg plane
         # to the normal of the edge plane. This means the bulk of the
         # building block is always pointed away from the center of the
         # molecule.
-        building_block.set_orientation2(self.edge_plane_normal(scale))
-
-        # Next, define the direction vector going from the edge
-        # centroid to the edge with which the fg is aligned.
+        building_block.set_orientation2(normal)
 
-        building_block.set_bonder_centroid(
-                            self.bonder_centroid(macro_mol, scale))
-        vector = (self.connected[aligner_edge].coord*scale -
-                  self.edge_centroid(scale))
-
-        # Minimize the angle between these things by rotating about the
-        # normal of the edge plane.
-        building_block.minimize_theta2(aligner,
-                                       vector,
-                                       self.edge_plane_normal(scale))
+        # Next, place the building block and minimize the angle
+        # between the aligned fg and the direction vector going from
+        # the edge centroid to the edge with which the fg is aligned,
+        # by rotating about the normal of the edge plane.
+        building_block.set_bonder_centroid(centroid)
+        building_block.minimize_theta2(aligner, vector, normal)
 
         mol = rdkit.Mol(building_block.mol)
         building_block.set_position_from_matrix(icoord)
         return mol
 
+    def placement_frame(self, scale, aligner_edge=0, macro_mol=None):
+        """
+        Returns the vectors which determine placement on the vertex.
+
+        A building block placed by :meth:`place_mol` has its bonder
+        centroid on the first row, the normal of its fg plane along
+        the second row and its aligned fg rotated towards the third
+        row. Two vertices with frames related by a rotation about the
+        origin will therefore have placed building blocks related by
+        the same rotation.
+
+        Parameters
+        ----------
+        scale : :class:`float`
+            The amount by which the size of the topology is scaled.
+
+        aligner_edge : :class:`int`, optional
+            The index of an edge in :attr:`connected`. It is the edge
+            with which the aligned fg is aligned.
+
+        macro_mol : :class:`.MacroMolecule`, optional
+            The macromolecule being built.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            An array of shape ``[3, 3]``.
+
+        """
+
+        return np.array([
+            self.bonder_centroid(macro_mol, scale),
+            self.edge_plane_normal(scale),
+            (self.connected[aligner_edge].coord*scale -
+             self.edge_centroid(scale))
+        ])
+
+    def calc_unit_geometry(self):
+        """
+        Calculates the geometry of the connected edges at unit scale.
+
+        The result is placed in :attr:`unit_geometry`. This is called
+        once for every vertex of a :class:`CageTopology` subclass,
+        when the subclass is defined, so that vertices are not
+        modified while molecules are built.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        coords = np.array([x.coord for x in self.connected], dtype=float)
+        directions = [
+            normalize_vector(coord1-coord2) for coord1, coord2 in
+            itertools.combinations(coords, 2)
+        ]
+
+        normal = None
+        if len(directions) >= 2:
+            # To get the normal to the plane get the cross product of
+            # two of the direction vectors running between the edges.
+            # Normalize it.
+            normal = normalize_vector(np.cross(directions[0],
+                                               directions[1]))
+
+            # To check that the normal is pointing away from the center
+            # of cage, find the angle, `theta`, between it and one of
+            # the position vectors of the edges on the plane. Assuming
+            # that the center of the cage is at the origin, which it
+            # should be as this is specified in the documentation, if
+            # the angle between the normal the position vector is less
+            # than 90 degrees they point in the same general direction.
+            # If the angle is greater than 90 degrees it means that
+            # they are pointing in opposite directions. If this is the
+            # case make sure to multiply the nomral by -1 in all axes
+            # so that it points in the correct direction while still
+            # acting as the normal to the plane.
+            if vector_theta(normal, coords[0]) > np.pi/2:
+                normal *= -1
+
+        self.unit_geometry = {
+            'edge_coords': coords,
+            'edge_centroid': (coords.mean(axis=0) if len(coords) else
+                              np.zeros(3)),
+            'edge_direction_vectors': directions,
+            'edge_plane_normal': normal
+        }
+
+    def _unit_geometry(self):
+        """
+        Returns :attr:`unit_geometry`, calculating it if needed.
+
+        Returns
+        -------
+        :class:`dict`
+            The :attr:`unit_geometry` of the vertex.
+
+        """
+
+        if self.unit_geometry is None:
+            self.calc_unit_geometry()
+        return self.unit_geometry
+
     def edge_plane_normal(self, scale):
         """
         Return the normal of the plane formed by the connected edges.
@@ -242,30 +398,18 @@ class Vertex:
             A normalized vector which defines the normal pointed away
             from the origin.
 
-        """
-        # Get two of the direction vectors running between the edges.
-        v1, v2 = itertools.islice(self.edge_direction_vectors(scale), 2)
-        # To get the normal to the plane get the cross product of these
-        # vectors. Normalize it.
-        normal = normalize_vector(np.cross(v1, v2))
-
-        # To check that the normal is pointing away from the center of
-        # cage, find the angle, `theta`, between it and one of the
-        # position vectors of the edges on the plane. Assuming that the
-        # center of the cage is at the origin, which it should be as
-        # this is specified in the documentation, if the angle between
-        # the normal the position vector is less than 90 degrees they
-        # point in the same general direction. If the angle is greater
-        # than 90 degrees it means that they are pointing in opposite
-        # directions. If this is the case make sure to multiply the
-        # nomral by -1 in all axes so that it points in the correct
-        # direction while still acting as the normal to the plane.
-        theta = vector_theta(normal, self.connected[0].coord*scale)
+        Raises
+        ------
+        :class:`ValueError`
+            If fewer than 3 edges are connected to the vertex.
 
-        if theta > np.pi/2:
-            normal *= -1
+        """
 
-        return normal
+        normal = self._unit_geometry()['edge_plane_normal']
+        if normal is None:
+            raise ValueError('Fewer than 3 edges are connected to the '
+                             'vertex, so they do not define a plane.')
+        return np.array(normal)
 
     def edge_plane(self, scale):
         """
@@ -302,9 +446,10 @@ class Vertex:
 
         """
 
-        edge_coord = self.edges[0].coord*scale
-        d = -np.sum(self.edge_plane_normal(scale) * edge_coord)
-        return np.append(self.edge_plane_normal(scale), d)
+        normal = self.edge_plane_normal(scale)
+        edge_coord = self._unit_geometry()['edge_coords'][0]
+        d = -scale*np.sum(normal * edge_coord)
+        return np.append(normal, d)
 
     def edge_direction_vectors(self, scale):
         """
@@ -323,8 +468,8 @@ class Vertex:
 
         """
 
-        for edge1, edge2 in itertools.combinations(self.connected, 2):
-            yield normalize_vector(scale*(edge1.coord-edge2.coord))
+        for direction in self._unit_geometry()['edge_direction_vectors']:
+            yield np.array(direction)
 
     def edge_coord_matrix(self, scale):
         """
@@ -344,10 +489,7 @@ class Vertex:
 
         """
 
-        coords = []
-        for edge in self.connected:
-            coords.append(edge.coord*scale)
-        return np.matrix(coords)
+        return np.matrix(self._unit_geometry()['edge_coords']*scale)
 
     def edge_centroid(self, scale):
         """
@@ -366,11 +508,7 @@ class Vertex:
 
         """
 
-        # The connected edges are held in the `edges`. To get the
-        # centroid, add up all the x, y and z coordinates (separately)
-        # and divide each sum by the number of edges.
-        return (sum(edge.coord*scale for edge in self.connected) /
-                len(self.connected))
+        return self._unit_geometry()['edge_centroid']*scale
 
     def bonder_centroid(self, macro_mol, scale):
         """
@@ -506,19 +644,49 @@ class Edge(Vertex):
 
         icoord = linker.position_matrix()
 
-        # Flush the lists from data of previous molecules.
-        self.distances = []
-
         # Align then place the linker.
-        linker.set_orientation2(self.direction(macro_mol, scale)*alignment)
-        linker.minimize_theta2(self.coord*scale,
-                               self.direction(macro_mol, scale))
-        linker.set_bonder_centroid(self.bonder_centroid(macro_mol, scale))
+        centroid, direction, coord = self.placement_frame(
+                                                scale,
+                                                macro_mol=macro_mol)
+        linker.set_orientation2(direction*alignment)
+        linker.minimize_theta2(coord, direction)
+        linker.set_bonder_centroid(centroid)
 
         mol = rdkit.Mol(linker.mol)
         linker.set_position_from_matrix(icoord)
         return mol
 
+    def placement_frame(self, scale, aligner_edge=0, macro_mol=None):
+        """
+        Returns the vectors which determine placement on the edge.
+
+        A linker placed by :meth:`place_mol` has its bonder centroid
+        on the first row and its fgs aligned with the second row. It
+        is then rotated about the second row towards the third row.
+
+        Parameters
+        ----------
+        scale : :class:`float`
+            The amount by which the size of the topology is scaled.
+
+        aligner_edge : :class:`int`, optional
+            Not used. Present so that vertices and edges can be used
+            interchangeably.
+
+        macro_mol : :class:`.MacroMolecule`, optional
+            The macromolecule being built.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            An array of shape ``[3, 3]``.
+
+        """
+
+        return np.array([self.bonder_centroid(macro_mol, scale),
+                         self.direction(macro_mol, scale),
+                         self.coord*scale])
+
     def __repr__(self):
         v1, v2 = self.connected
         return f"Edge({v1}, {v2})"
@@ -622,8 +790,36 @@ class CageTopology(Topology):
 
         If ``None`` then building blocks are assigned at random.
 
+    symmetry_ops : :class:`numpy.ndarray`
+        Class attribute which can be added when defining a subclass.
+        An array of shape ``[n, 3, 3]`` holding the rotation matrices
+        of the point group of the topology, usually made with
+        :func:`rotation_group`. During :meth:`place_mols` the
+        orientation procedure is only run once per symmetry-unique
+        site, the building blocks on the other sites are generated by
+        rotating the coordinates of an already placed one. If
+        ``None``, every site is placed with the orientation procedure.
+
+        The two do not give identical structures. The result of the
+        orientation procedure depends slightly on how far the
+        building block has to be rotated to reach a site, so sites
+        placed by it separately are not exact rotations of one
+        another. Sites generated by symmetry are, and their atoms can
+        lie up to about 0.35 A from where the orientation procedure
+        would place them.
+
     """
 
+    symmetry_ops = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The geometry of the topology is fixed, so calculate it once
+        # here rather than during every build.
+        for position in itertools.chain(getattr(cls, 'positions_A', []),
+                                        getattr(cls, 'positions_B', [])):
+            position.calc_unit_geometry()
+
     def __init__(self,
                  A_alignments=None,
                  B_alignments=None,
@@ -644,6 +840,32 @@ class CageTopology(Topology):
         self.edge_alignments = edge_alignments
         self.bb_assignments = bb_assignments
 
+    def build_context(self):
+        """
+        Returns a copy of the topology for use in a single build.
+
+        The vertices in :attr:`positions_A` and :attr:`positions_B`
+        store the functional groups placed on them, so they are
+        copied too.
+
+        Returns
+        -------
+        :class:`CageTopology`
+            The copy of the topology.
+
+        """
+
+        context = super().build_context()
+        # Use a single memo so that the connections between the
+        # copied vertices are kept.
+        memo = {}
+        for name in ('positions_A', 'positions_B'):
+            if hasattr(self, name):
+                setattr(context,
+                        name,
+                        copy.deepcopy(getattr(self, name), memo))
+        return context
+
     def _bb_maps(self, macro_mol):
         """
 
@@ -691,29 +913,76 @@ class CageTopology(Topology):
 
         """
 
-        # This loop finds all the distances between a fg paired with
-        # a postion and all other fgs at the paired position.
-        for position in self.positions_A:
-            for fg1, vertex in position.fg_position_pairs:
-                # Get all the distances between the fg and the other
-                # fgs on the vertex. Store this information
-                # on the vertex.
-                for fg2 in vertex.fg_ids:
-                    distance = macro_mol.fg_distance(fg1, fg2)
-                    position.distances.append((distance, fg1, fg2))
+        fg_vertex_pairs = [
+            pair for position in self.positions_A
+            for pair in position.fg_position_pairs
+        ]
+        yield from self._pair_fgs(macro_mol, fg_vertex_pairs)
+
+    @staticmethod
+    def _pair_fgs(macro_mol, fg_vertex_pairs):
+        """
+        Pairs fgs with fgs on the vertices they were matched with.
+
+        A single distance matrix between every fg in `fg_vertex_pairs`
+        and every fg on the matched vertices is built. Entries for
+        fgs which are not on the matched vertex are disallowed. The
+        assignment which minimizes the total bond length is then found
+        with :func:`scipy.optimize.linear_sum_assignment`.
+
+        Parameters
+        ----------
+        macro_mol : :class:`.MacroMolecule`
+            The macromolecule being assembled.
+
+        fg_vertex_pairs : :class:`list` of :class:`tuple`
+            Each :class:`tuple` holds the id of a fg and the
+            :class:`Vertex` it was paired with.
+
+        Yields
+        ------
+        :class:`tuple` of :class:`int`
+            The ``fg_ids`` of functional groups to be bonded.
+
+        """
+
+        if not fg_vertex_pairs:
+            return
 
-        # This loop creates bonds between fgs at two different
-        # positions so that each fg only bonds once and so that the
-        # total length of all bonds made is minimzed.
+        fg1s = [fg for fg, _ in fg_vertex_pairs]
+        fg2s = list(dict.fromkeys(
+            fg for _, vertex in fg_vertex_pairs for fg in vertex.fg_ids
+        ))
+        cols = {fg: i for i, fg in enumerate(fg2s)}
+
+        allowed = np.zeros((len(fg1s), len(fg2s)), dtype=bool)
+        for row, (_, vertex) in enumerate(fg_vertex_pairs):
+            allowed[row, [cols[fg] for fg in vertex.fg_ids]] = True
+
+        fgs = list(dict.fromkeys(fg1s + fg2s))
+        coords = dict(zip(fgs, macro_mol.fg_centroids(fgs)))
+        distances = cdist([coords[fg] for fg in fg1s],
+                          [coords[fg] for fg in fg2s])
+
+        # Disallowed pairings get a cost larger than any possible sum
+        # of allowed ones, so they are only chosen if nothing else is
+        # left.
+        costs = np.where(allowed, distances, distances.sum() + 1)
+        rows, columns = linear_sum_assignment(costs)
+
+        # Yield the shortest bonds first. Topologies without linkers
+        # have fgs which act as both rows and columns, so make sure
+        # that each fg only bonds once.
         paired = set()
-        for position in self.positions_A:
-            for _, fg1, fg2 in sorted(position.distances):
-                if fg1 in paired or fg2 in paired:
-                    continue
+        for row, col in sorted(zip(rows, columns),
+                               key=lambda rc: distances[rc]):
+            fg1, fg2 = fg1s[row], fg2s[col]
+            if not allowed[row, col] or fg1 in paired or fg2 in paired:
+                continue
 
-                yield fg1, fg2
-                paired.add(fg1)
-                paired.add(fg2)
+            yield fg1, fg2
+            paired.add(fg1)
+            paired.add(fg2)
 
     def pair_fgs_with_positions(self, scale, macro_mol, vertex):
         """
@@ -746,35 +1015,22 @@ class CageTopology(Topology):
 
         """
 
-        # This loop looks at each fg which forms a new bond and all
-        # the positions (not fgs) to which it may end up bonding. It
-        # finds the distances of all the options.
-        distances = []
-        for fg in vertex.fg_ids:
-            fg_coord = macro_mol.fg_centroid(fg)
-            for position in vertex.connected:
-                distance = euclidean(fg_coord, position.coord*scale)
-                distances.append((distance, fg, position))
-
-        # Sort the pairings of fgs with potential bonding position,
-        # smallest first.
-        distances.sort(key=lambda x: x[0])
-
-        # This loop looks at all the potential pairings of fgs to
-        # positions. It pairs the shortest combinations of fgs and
-        # positions, making sure that each fg and position is only
-        # paired once. The pairings are saved to the `
-        # fg_positions_pairs` attribute of the position on which all
-        # the fgs are placed.
-        paired_pos = set()
-        paired_ids = set()
-        vertex.fg_position_pairs = []
-        for _, fg, pos in distances:
-            if fg in paired_ids or pos in paired_pos:
-                continue
-            vertex.fg_position_pairs.append((fg, pos))
-            paired_ids.add(fg)
-            paired_pos.add(pos)
+        # Get the distance of every fg which forms a new bond to every
+        # position (not fg) to which it may end up bonding.
+        fg_coords = macro_mol.fg_centroids(vertex.fg_ids)
+        position_coords = [position.coord*scale for
+                           position in vertex.connected]
+        distances = cdist(fg_coords, position_coords)
+
+        # Pair fgs and positions so that each is only paired once and
+        # the total distance of the pairings is minimized. The pairings
+        # are saved to the `fg_position_pairs` attribute of the
+        # position on which all the fgs are placed.
+        rows, cols = linear_sum_assignment(distances)
+        vertex.fg_position_pairs = [
+            (vertex.fg_ids[row], vertex.connected[col]) for
+            row, col in zip(rows, cols)
+        ]
 
     def place_mols(self, macro_mol):
         """
@@ -805,21 +1061,32 @@ class CageTopology(Topology):
         # with the positions to which they will be bonding. It also
         # counts the nubmer of building-blocks* which make up the
         # structure.
+        # Holds the frame and the placed molecule of every site on
+        # which the orientation procedure was run, grouped by building
+        # block and alignment. Other sites with the same building
+        # block and alignment are generated from these by symmetry,
+        # where possible.
+        placed = defaultdict(list)
         for i, position in enumerate(self.positions_A):
             bb = bb_map[i]
+            bb_index = macro_mol.building_blocks.index(bb)
+            alignment = int(self.A_alignments[i])
             n_bb = len(bb.functional_group_atoms())
             # Position the molecule on the vertex.
             aligner_edge_id = self.edge_alignments[i]
             aligner_edge = next((position.connected.index(x) for x in
                                  position.connected if
                                  x.id == aligner_edge_id), 0)
-            bb_mol = position.place_mol(scale,
-                                        bb,
-                                        int(self.A_alignments[i]),
-                                        aligner_edge)
-            add_fragment_props(bb_mol,
-                               macro_mol.building_blocks.index(bb),
-                               i)
+            frame = position.placement_frame(scale, aligner_edge)
+            bb_mol = self._symmetric_mol(placed[bb_index, alignment],
+                                         frame)
+            if bb_mol is None:
+                bb_mol = position.place_mol(scale,
+                                            bb,
+                                            alignment,
+                                            aligner_edge)
+                placed[bb_index, alignment].append((frame, bb_mol))
+            add_fragment_props(bb_mol, bb_index, i)
 
             bb_mol = self.update_fg_id(macro_mol, bb_mol)
             macro_mol.mol = rdkit.CombineMols(macro_mol.mol, bb_mol)
@@ -844,14 +1111,19 @@ class CageTopology(Topology):
         # make up the structure.
         for i, position in enumerate(self.positions_B):
             lk = lk_map[i]
+            lk_index = macro_mol.building_blocks.index(lk)
+            alignment = int(self.B_alignments[i])
             n_lk = len(lk.functional_group_atoms())
-            lk_mol = position.place_mol(scale,
-                                        lk,
-                                        int(self.B_alignments[i]),
-                                        macro_mol=macro_mol)
-            add_fragment_props(lk_mol,
-                               macro_mol.building_blocks.index(lk),
-                               i)
+            frame = position.placement_frame(scale, macro_mol=macro_mol)
+            lk_mol = self._symmetric_mol(placed[lk_index, alignment],
+                                         frame)
+            if lk_mol is None:
+                lk_mol = position.place_mol(scale,
+                                            lk,
+                                            alignment,
+                                            macro_mol=macro_mol)
+                placed[lk_index, alignment].append((frame, lk_mol))
+            add_fragment_props(lk_mol, lk_index, i)
             lk_mol = self.update_fg_id(macro_mol, lk_mol)
             macro_mol.mol = rdkit.CombineMols(macro_mol.mol, lk_mol)
             # Update the counter each time a linker is added.
@@ -867,6 +1139,50 @@ class CageTopology(Topology):
             # Save the ids of fgs which form new bonds.
             position.fg_ids = list(fg_ids)
 
+    def _symmetric_mol(self, placed, frame):
+        """
+        Generates a placed building block by symmetry.
+
+        Parameters
+        ----------
+        placed : :class:`list` of :class:`tuple`
+            Each :class:`tuple` holds the frame of a site, as given by
+            :meth:`Vertex.placement_frame`, and the ``rdkit`` molecule
+            placed on it. All molecules are of the same building
+            block, placed with the same alignment.
+
+        frame : :class:`numpy.ndarray`
+            The frame of the site on which the building block is to
+            be placed.
+
+        Returns
+        -------
+        :class:`rdkit.Chem.rdchem.Mol`
+            The building block placed on the site with `frame`. If
+            no operation in :attr:`symmetry_ops` maps the frame of a
+            site in `placed` onto `frame`, ``None`` is returned.
+
+        """
+
+        if self.symmetry_ops is None:
+            return None
+
+        for placed_frame, mol in placed:
+            # Apply every symmetry operation to the frame at once.
+            rotated = placed_frame @ self.symmetry_ops.transpose(0, 2, 1)
+            matches = np.all(np.isclose(rotated, frame, atol=1e-3),
+                             axis=(1, 2))
+            if matches.any():
+                rotation = self.symmetry_ops[matches.argmax()]
+                mol = rdkit.Mol(mol)
+                conf = mol.GetConformer()
+                coords = conf.GetPositions() @ rotation.T
+                for atom_id, coord in enumerate(coords):
+                    conf.SetAtomPosition(atom_id, coord.tolist())
+                return mol
+
+        return None
+
 
 class VertexOnlyCageTopology(CageTopology):
     """
@@ -905,9 +1221,15 @@ class NoLinkerCageTopology(CageTopology):
 
         self.alignments = alignments
         self.bb_assignments = bb_assignments
-        self.connect()
         self.react_del = True
 
+    def __init_subclass__(cls, **kwargs):
+        # The vertices must be connected before their geometry is
+        # calculated.
+        if 'connections' in cls.__dict__:
+            cls.connect()
+        super().__init_subclass__(**kwargs)
+
     def place_mols(self, macro_mol):
 
         macro_mol.mol = rdkit.Mol()
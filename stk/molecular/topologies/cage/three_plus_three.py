@@ -31,31 +31,16 @@ class OnePlusOne(NoLinkerCageTopology):
 
     def bonded_fgs(self, macro_mol):
 
+        fg_vertex_pairs = []
         for position in self.positions_A:
             other_position = next(x for x in self.positions_A if
                                   x is not position)
 
             position.fg_position_pairs = [(fg, other_position) for
                                           fg in position.fg_ids]
+            fg_vertex_pairs.extend(position.fg_position_pairs)
 
-            for fg1, vertex in position.fg_position_pairs:
-                # Get all the distances between the fg and the fgs
-                # on the vertex. Store this information on the vertex.
-
-                for fg2 in vertex.fg_ids:
-                    distance = macro_mol.fg_distance(fg1, fg2)
-                    position.distances.append((distance, fg1, fg2))
-
-        paired = set()
-        for position in self.positions_A:
-            for _, fg1, fg2 in sorted(position.distances):
-                if fg1 in paired or fg2 in paired:
-                    continue
-
-                # Add the bond.
-                yield fg1, fg2
-                paired.add(fg1)
-                paired.add(fg2)
+        yield from self._pair_fgs(macro_mol, fg_vertex_pairs)
 
 
 class TwoPlusTwo(NoLinkerCageTopology):
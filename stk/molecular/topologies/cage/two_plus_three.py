@@ -5,7 +5,7 @@ Defines cage topologies from 2 and 3 functionalized building blocks.
 
 import numpy as np
 
-from .base import CageTopology, Vertex, Edge
+from .base import CageTopology, Vertex, Edge, rotation_group
 
 
 class TwoPlusThree(CageTopology):
@@ -51,6 +51,8 @@ class FourPlusSix(CageTopology):
                    Edge(v0, v3, (0, 3)), Edge(v1, v2, (1, 2)),
                    Edge(v1, v3, (1, 3)), Edge(v2, v3, (2, 3))]
 
+    symmetry_ops = rotation_group((3, v0.coord), (3, v1.coord))
+
     n_windows = 4
     n_window_types = 1
 
@@ -143,6 +145,8 @@ class EightPlusTwelve(CageTopology):
                    Edge(c, g),
                    Edge(d, h)]
 
+    symmetry_ops = rotation_group((4, [0, 0, 1]), (4, [1, 0, 0]))
+
     n_windows = 6
     n_window_types = 1
 
@@ -188,5 +192,9 @@ class Dodecahedron(CageTopology):
          Edge(I, L), Edge(I, M), Edge(I, P), Edge(J, K), Edge(J, R),
          Edge(J, Q), Edge(K, S), Edge(K, T), Edge(L, O), Edge(L, N)]
 
+    symmetry_ops = rotation_group((2, [0, 0, 1]),
+                                  (3, [1, 1, 1]),
+                                  (5, [0, phi, 1]))
+
     n_windows = 12
     n_window_types = 1
@@ -67,10 +67,10 @@ are registered in :attr:`.Periodic.periodic_bonds`.
 
 """
 
+import copy
 import rdkit.Chem.AllChem as rdkit
 import numpy as np
 from scipy.spatial.distance import euclidean
-from collections import deque
 
 from .base import Topology
 from ...utilities import (PeriodicBond,
@@ -129,10 +129,7 @@ class Vertex:
         mol.set_orientation2([0, 0, 1])
 
         mol.set_bonder_centroid(coord)
-        aligner_edge = next((e for e in self.connected if
-                             all(b == 0 for b in e.bond)),
-                            self.connected[0])
-        vector = (aligner_edge.calc_coord(cell_params) - coord)
+        vector = (self.aligner_edge().calc_coord(cell_params) - coord)
 
         mol.minimize_theta2(aligner, vector, [0, 0, 1])
 
@@ -166,26 +163,24 @@ class Vertex:
 
         return coord
 
-    def create_fg_map(self,
-                      macro_mol,
-                      cell_params,
-                      nfgs,
-                      aligned_fg):
+    def create_fg_map(self, fg_ids, fg_coords, cell_params, aligned_fg):
         """
         Creates the attribute :attr:`fg_map`.
 
         Parameters
         ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being built.
+        fg_ids : :class:`list` of :class:`int`
+            The ``fg_ids`` of the functional groups of the building
+            block placed on the vertex. These are the ids in the
+            macromolecule, in the order in which they appear in the
+            atoms of the building block.
+
+        fg_coords : :class:`list` of :class:`numpy.array`
+            The bonder centroid of each functional group in `fg_ids`.
 
         cell_params : :class:`list` of :class:`numpy.array`
             The ``a``, ``b`` and ``c`` vectors of the unit cell.
 
-        nfgs : :class:`int`
-            The number of functional groups the building block placed
-            on the vertex has.
-
         aligned_fg : :class:`int`
             The ``fg_id`` of a functional group. This is the
             fg which gets aligned with an edge. The ``fg_id``
@@ -198,18 +193,12 @@ class Vertex:
         """
 
         center = self.calc_coord(cell_params)
-
-        # Get all the fg ids.
-        fg_ids = deque(maxlen=nfgs)
-        for a in macro_mol.mol.GetAtoms():
-            if a.HasProp('fg_id') and a.GetIntProp('fg_id') not in fg_ids:
-                fg_ids.append(a.GetIntProp('fg_id'))
+        nfgs = len(fg_ids)
 
         start = np.array([0, 1])
         angles = []
-        for fg in fg_ids:
-            fg_coords = macro_mol.fg_centroid(fg) - center
-            x, y, _ = normalize_vector(fg_coords)
+        for fg, fg_coord in zip(fg_ids, fg_coords):
+            x, y, _ = normalize_vector(fg_coord - center)
             angle = np.arccos(start@np.array([x, y]))
             if x < 0:
                 angle = 2*np.pi - angle
@@ -229,6 +218,22 @@ class Vertex:
         for fg, position in zip(fgs, positions):
             self.fg_map[position] = fg
 
+    def aligner_edge(self):
+        """
+        Returns the edge with which :meth:`place_mol` aligns a fg.
+
+        Returns
+        -------
+        :class:`Edge`
+            The first non-periodic edge connected to the vertex. If
+            there is no such edge, the first connected edge.
+
+        """
+
+        return next((e for e in self.connected if
+                     all(b == 0 for b in e.bond)),
+                    self.connected[0])
+
     def aligned_position(self):
         """
         Returns the position of the fg aligned by :meth:`place_mol`.
@@ -242,9 +247,7 @@ class Vertex:
 
         """
 
-        aligner_edge = next((e for e in self.connected if
-                             all(b == 0 for b in e.bond)),
-                            self.connected[0])
+        aligner_edge = self.aligner_edge()
         vindex = 0 if self is aligner_edge.v1 else 1
         return aligner_edge.joint_positions[vindex]
 
@@ -302,14 +305,15 @@ class Edge:
         v1.connected.append(self)
         v2.connected.append(self)
 
-    def place_mol(self, macro_mol, cell_params, mol, alignment):
+    def place_mol(self, fg_centroids, cell_params, mol, alignment):
         """
         Places and aligned a building block along the edge.
 
         Parameters
         ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being built.
+        fg_centroids : :class:`dict`
+            Maps the ``fg_id`` of every functional group placed on a
+            vertex to its bonder centroid.
 
         cell_params : :class:`list` of :class:`numpy.array`
             The ``a``, ``b`` and ``c`` vectors of the unit cell.
@@ -328,25 +332,26 @@ class Edge:
 
         """
 
-        coord = self.fg_centroid(macro_mol, cell_params)
+        coord = self.fg_centroid(fg_centroids, cell_params)
         original_position = mol.position_matrix()
 
         mol.set_bonder_centroid(coord)
-        d = self.fg_direction(macro_mol, cell_params)*alignment
+        d = self.fg_direction(fg_centroids, cell_params)*alignment
         mol.set_orientation2(d)
 
         rdkit_mol = rdkit.Mol(mol.mol)
         mol.set_position_from_matrix(original_position)
         return rdkit_mol
 
-    def fg_direction(self, macro_mol, cell_params):
+    def fg_direction(self, fg_centroids, cell_params):
         """
         Calculates the direction vector between the fgs.
 
         Parameters
         ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being assembled.
+        fg_centroids : :class:`dict`
+            Maps the ``fg_id`` of every functional group placed on a
+            vertex to its bonder centroid.
 
         cell_params : :class:`list` of :class:`numpy.array`
             The ``a``, ``b`` and ``c`` vectors of the unit cell.
@@ -362,7 +367,7 @@ class Edge:
         for i, position in enumerate(self.joint_positions):
             vertex = self.connected[i]
             fg = vertex.fg_map[position]
-            coords.append(macro_mol.fg_centroid(fg))
+            coords.append(np.array(fg_centroids[fg]))
 
         for d, param in zip(self.bond, cell_params):
                 coords[1] += d*param
@@ -409,7 +414,7 @@ class Edge:
             coord += frac * dim
         return coord
 
-    def fg_centroid(self, macro_mol, cell_params):
+    def fg_centroid(self, fg_centroids, cell_params):
         """
         The centroid of the fgs connected to the edge.
 
@@ -417,8 +422,9 @@ class Edge:
 
         Parameters
         ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being assembled.
+        fg_centroids : :class:`dict`
+            Maps the ``fg_id`` of every functional group placed on a
+            vertex to its bonder centroid.
 
         cell_params : :class:`list` of :class:`numpy.array`
             The ``a``, ``b`` and ``c`` vectors of the unit cell.
@@ -434,21 +440,25 @@ class Edge:
         for i, position in enumerate(self.joint_positions):
             vertex = self.connected[i]
             fg = vertex.fg_map[position]
-            coord += macro_mol.fg_centroid(fg)
+            coord += fg_centroids[fg]
 
         for d, param in zip(self.bond, cell_params):
             coord += d*param
 
         return coord / (i+1)
 
-    def create_fg_map(self, macro_mol, cell_params):
+    def create_fg_map(self, fg_ids, fg_coords, cell_params):
         """
         Creates the attribute :attr:`fg_map`.
 
         Parameters
         ----------
-        macro_mol : :class:`.MacroMolecule`
-            The macromolecule being built.
+        fg_ids : :class:`list` of :class:`int`
+            The ``fg_ids`` of the 2 functional groups of the building
+            block placed on the edge.
+
+        fg_coords : :class:`list` of :class:`numpy.array`
+            The bonder centroid of each functional group in `fg_ids`.
 
         cell_params : :class:`list` of :class:`numpy.array`
             The ``a``, ``b`` and ``c`` vectors of the unit cell.
@@ -459,17 +469,10 @@ class Edge:
 
         """
 
-        # Get all the fg ids.
-        fg_ids = deque(maxlen=2)
-        for a in macro_mol.mol.GetAtoms():
-            if a.HasProp('fg_id') and a.GetIntProp('fg_id') not in fg_ids:
-                fg_ids.append(a.GetIntProp('fg_id'))
-
         v1coord = self.v1.calc_coord(cell_params)
-        fgs = sorted(fg_ids, key=lambda x: euclidean(
-                                             v1coord,
-                                             macro_mol.fg_centroid(x)))
-        self.fg_map = {0: fgs[0], 1: fgs[1]}
+        fgs = sorted(zip(fg_ids, fg_coords),
+                     key=lambda x: euclidean(v1coord, x[1]))
+        self.fg_map = {0: fgs[0][0], 1: fgs[1][0]}
 
 
 def bb_size(macro_mol):
@@ -537,6 +540,31 @@ class COFLattice(Topology):
         self.scale_func = scale_func
         super().__init__()
 
+    def build_context(self):
+        """
+        Returns a copy of the topology for use in a single build.
+
+        The vertices and edges store the functional groups placed on
+        them, so they are copied too.
+
+        Returns
+        -------
+        :class:`COFLattice`
+            The copy of the topology.
+
+        """
+
+        context = super().build_context()
+        # Use a single memo so that the connections between the
+        # copied vertices and edges are kept.
+        memo = {}
+        for name in ('vertices', 'edges'):
+            if hasattr(self, name):
+                setattr(context,
+                        name,
+                        copy.deepcopy(getattr(self, name), memo))
+        return context
+
 
 class LinkerCOFLattice(COFLattice):
     """
@@ -607,6 +635,15 @@ class LinkerCOFLattice(COFLattice):
         """
         Places the building blocks on the topology.
 
+        The coordinates of all vertices and edges are calculated
+        from :attr:`cell_dimensions` in one go. Each distinct
+        orientation of a building block is only placed once, by
+        :meth:`_template`, and every other placement with the same
+        orientation just translates the coordinates of the template.
+        The ``fg_id`` of each placed functional group is found by
+        offsetting its id in the building block, so the assembled
+        molecule never has to be searched.
+
         Parameters
         ----------
         macro_mol : :class:`.MacroMolecule`
@@ -618,16 +655,14 @@ class LinkerCOFLattice(COFLattice):
 
         """
 
-        # Create the rdkit molecule of the assembled molecule.
-        macro_mol.mol = rdkit.Mol()
-
         # Identify which building block is ditopic and which is
         # tri or more topic.
         di = next(bb for bb in macro_mol.building_blocks if
                   len(bb.functional_group_atoms()) == 2)
         multi = next(bb for bb in macro_mol.building_blocks if
                      len(bb.functional_group_atoms()) >= 3)
-        nfgs = len(multi.functional_group_atoms())
+        di_index = macro_mol.building_blocks.index(di)
+        multi_index = macro_mol.building_blocks.index(multi)
 
         # Calculate the size of the unit cell by scaling to the size of
         # building blocks.
@@ -635,40 +670,182 @@ class LinkerCOFLattice(COFLattice):
         cell_params = [size*p for p in self.cell_dimensions]
         macro_mol.cell_dimensions = cell_params
 
+        cell = np.array(cell_params)
+        vertex_coords = np.array(
+                        [v.frac_coord for v in self.vertices]) @ cell
+        edge_coords = np.array(
+                        [e.frac_coord for e in self.edges]) @ cell
+        edge_ids = {e: i for i, e in enumerate(self.edges)}
+
+        cof_mol = rdkit.RWMol()
+        positions = []
+        templates = {}
+        # Maps the fg_id of every fg placed on a vertex to its bonder
+        # centroid. Used to place the building blocks on the edges.
+        fg_centroids = {}
+        # The functional groups of every building block are numbered
+        # from 0, so they are offset by the number of fg ids already
+        # used.
+        fg_offset = 0
+
         # For each vertex in the topology, place a multitopic building
         # block on it. The Vertex object takes care of alignment.
-
         for i, v in enumerate(self.vertices):
             aligner = self.multitopic_aligners[i]
-            mol = v.place_mol(cell_params, multi, aligner)
-            add_fragment_props(mol,
-                               macro_mol.building_blocks.index(multi),
-                               i)
-
-            mol = self.update_fg_id(macro_mol, mol)
-            macro_mol.mol = rdkit.CombineMols(macro_mol.mol, mol)
+            coord = vertex_coords[i]
+            vector = edge_coords[edge_ids[v.aligner_edge()]] - coord
+            key = (multi_index, aligner, tuple(normalize_vector(vector)))
+            if key not in templates:
+                mol = v.place_mol(cell_params, multi, aligner)
+                templates[key] = self._template(mol, coord)
+
+            fg_ids, fg_coords = self._add_template(cof_mol,
+                                                   positions,
+                                                   templates[key],
+                                                   coord,
+                                                   multi_index,
+                                                   i,
+                                                   fg_offset)
+            fg_offset = max(fg_ids) + 1
+            fg_centroids.update(zip(fg_ids, fg_coords))
             macro_mol.bb_counter.update([multi])
 
             # Save the ids of the fgs in the assembled molecule.
             # This is used when creating bonds later in the assembly
             # process.
-            v.create_fg_map(macro_mol, cell_params, nfgs, aligner)
+            v.create_fg_map(fg_ids, fg_coords, cell_params, aligner)
 
         for i, e in enumerate(self.edges):
+            alignment = self.ditopic_directions[i]
+            coord = e.fg_centroid(fg_centroids, cell_params)
+            direction = e.fg_direction(fg_centroids, cell_params)
+            key = (di_index, tuple(normalize_vector(direction*alignment)))
+            if key not in templates:
+                mol = e.place_mol(fg_centroids, cell_params, di, alignment)
+                templates[key] = self._template(mol, coord)
+
+            fg_ids, fg_coords = self._add_template(cof_mol,
+                                                   positions,
+                                                   templates[key],
+                                                   coord,
+                                                   di_index,
+                                                   i,
+                                                   fg_offset)
+            fg_offset = max(fg_ids) + 1
+            macro_mol.bb_counter.update([di])
+            e.create_fg_map(fg_ids, fg_coords, cell_params)
 
-            mol = e.place_mol(macro_mol,
-                              cell_params,
-                              di,
-                              self.ditopic_directions[i])
+        macro_mol.mol = cof_mol.GetMol()
+        conf = rdkit.Conformer(macro_mol.mol.GetNumAtoms())
+        for atom_id, coord in enumerate(np.concatenate(positions)):
+            conf.SetAtomPosition(atom_id, coord.tolist())
+        macro_mol.mol.AddConformer(conf)
 
-            add_fragment_props(mol,
-                               macro_mol.building_blocks.index(di),
-                               i)
-            mol = self.update_fg_id(macro_mol, mol)
-            macro_mol.mol = rdkit.CombineMols(macro_mol.mol, mol)
-            macro_mol.bb_counter.update([di])
+    @staticmethod
+    def _template(mol, origin):
+        """
+        Turns a placed building block into a template.
+
+        Parameters
+        ----------
+        mol : :class:`rdkit.Chem.rdchem.Mol`
+            A building block placed by :meth:`Vertex.place_mol` or
+            :meth:`Edge.place_mol`.
+
+        origin : :class:`numpy.array`
+            The coordinate the building block was placed on.
+
+        Returns
+        -------
+        :class:`tuple`
+            The first element is a copy of `mol` without conformers.
+            The second element is a :class:`numpy.ndarray` of shape
+            ``[n, 3]`` holding the coordinates of `mol` relative to
+            `origin`. The third element is a :class:`list` of the
+            ``fg_ids`` in `mol`, in the order in which they appear
+            in its atoms. The fourth element is a
+            :class:`numpy.ndarray` holding the bonder centroid of each
+            of these functional groups, relative to `origin`.
+
+        """
+
+        coords = mol.GetConformer().GetPositions() - origin
+
+        bonders = {}
+        for atom in mol.GetAtoms():
+            if atom.HasProp('fg_id'):
+                fg_bonders = bonders.setdefault(atom.GetIntProp('fg_id'),
+                                                [])
+                if atom.HasProp('bonder'):
+                    fg_bonders.append(atom.GetIdx())
+
+        fg_ids = list(bonders)
+        fg_coords = np.array([coords[bonders[fg]].mean(axis=0) for
+                              fg in fg_ids])
+
+        mol = rdkit.Mol(mol)
+        mol.RemoveAllConformers()
+        return mol, coords, fg_ids, fg_coords
+
+    @staticmethod
+    def _add_template(cof_mol, positions, template, origin,
+                      bb_index, mol_index, fg_offset):
+        """
+        Adds a building block template to the assembled molecule.
+
+        Parameters
+        ----------
+        cof_mol : :class:`rdkit.Chem.rdchem.RWMol`
+            The molecule being assembled. The atoms of the template
+            are added to it.
+
+        positions : :class:`list` of :class:`numpy.ndarray`
+            The coordinates of the building blocks already in
+            `cof_mol`. The coordinates of the template are appended.
+
+        template : :class:`tuple`
+            A template made by :meth:`_template`.
+
+        origin : :class:`numpy.array`
+            The coordinate the template is placed on.
+
+        bb_index : :class:`int`
+            The index of the building block in
+            :attr:`.MacroMolecule.building_blocks`.
+
+        mol_index : :class:`int`
+            The index of the placement, as used by
+            :func:`.add_fragment_props`.
+
+        fg_offset : :class:`int`
+            Added to the ``fg_ids`` of the template, so that they
+            do not clash with the ``fg_ids`` already in `cof_mol`.
+
+        Returns
+        -------
+        :class:`tuple`
+            The first element is a :class:`list` holding the
+            ``fg_ids`` the functional groups of the template are given
+            in `cof_mol`. The second element is a
+            :class:`numpy.ndarray` holding the bonder centroids of
+            these functional groups.
+
+        """
+
+        mol, coords, fg_ids, fg_coords = template
+
+        offset = cof_mol.GetNumAtoms()
+        cof_mol.InsertMol(mol)
+        for atom_id in range(offset, cof_mol.GetNumAtoms()):
+            atom = cof_mol.GetAtomWithIdx(atom_id)
+            atom.SetIntProp('bb_index', bb_index)
+            atom.SetIntProp('mol_index', mol_index)
+            if atom.HasProp('fg_id'):
+                atom.SetIntProp('fg_id',
+                                atom.GetIntProp('fg_id')+fg_offset)
 
-            e.create_fg_map(macro_mol, cell_params)
+        positions.append(coords + origin)
+        return [fg+fg_offset for fg in fg_ids], fg_coords + origin
 
 
 class NoLinkerCOFLattice(COFLattice):
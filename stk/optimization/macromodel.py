@@ -4,8 +4,13 @@ Defines optimization functions which use MacroModel.
 """
 
 import os
+import asyncio
 import subprocess as sp
 import time
+import random
+import itertools as it
+from contextlib import nullcontext, asynccontextmanager
+from functools import partial
 import rdkit.Chem.AllChem as rdkit
 import warnings
 import psutil
@@ -13,8 +18,9 @@ import re
 from uuid import uuid4
 import logging
 import gzip
+from types import SimpleNamespace
 
-from ..utilities import MAEExtractor, flatten
+from ..utilities import MAEExtractor, flatten, CACHE_SETTINGS, JobRunner
 
 
 logger = logging.getLogger(__name__)
@@ -185,6 +191,109 @@ def macromodel_opt(mol,
                               conformer)
 
 
+async def macromodel_opt_async(mol,
+                               macromodel_path,
+                               settings=None,
+                               md=None,
+                               conformer=-1,
+                               runner=None):
+    """
+    Optimizes the molecule using MacroModel, without blocking.
+
+    This coroutine does the same as :func:`macromodel_opt`, except
+    that MacroModel is run by a :class:`.JobRunner`. This allows a
+    single process to run many optimizations at once.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule who's structure must be optimized.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    settings : :class:`dict`, optional
+        The settings of the optimization. See :func:`macromodel_opt`.
+
+    md : :class:`dict`, optional
+        The settings of the MD conformer search. See
+        :func:`_macromodel_md_opt`.
+
+    conformer : :class:`int`, optional
+        The id of the conformer to be optimized.
+
+    runner : :class:`.JobRunner`, optional
+        The runner used to run MacroModel. If ``None``, a new one is
+        used.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    if settings is None:
+        settings = {}
+    if md is None:
+        md = {}
+    if runner is None:
+        runner = JobRunner()
+
+    vals = {
+             'restricted': True,
+             'timeout': None,
+             'force_field': 16,
+             'max_iter': 2500,
+             'gradient': 0.05,
+             'md': False
+            }
+    vals.update(settings)
+
+    try:
+        mol._file = '{}.mol'.format(uuid4().int)
+        mol.write(mol._file, conformer)
+        await _create_mae_async(mol, macromodel_path, runner)
+        _generate_com(mol, vals)
+        await _run_bmin_async(mol, macromodel_path, vals['timeout'], runner)
+        _convert_maegz_to_mae(mol)
+        mol.update_from_mae(mol._file.replace('.mol', '.mae'),
+                            conformer)
+
+        if vals['restricted'] == 'both':
+            new_vals = dict(vals)
+            new_vals['md'] = False
+            new_vals['restricted'] = False
+            await macromodel_opt_async(mol=mol,
+                                       macromodel_path=macromodel_path,
+                                       settings=new_vals,
+                                       md={},
+                                       conformer=conformer,
+                                       runner=runner)
+
+        if vals['md']:
+            await _macromodel_md_opt_async(mol,
+                                           macromodel_path,
+                                           md,
+                                           conformer,
+                                           runner)
+
+    except _ForceFieldError as ex:
+        if vals['force_field'] == 14:
+            raise ex
+
+        logger.warning(('Minimization with OPLS3 failed on "{}". '
+                        'Trying OPLS_2005.').format(mol.name))
+
+        vals['force_field'] = 14
+        return await macromodel_opt_async(mol,
+                                          macromodel_path,
+                                          vals,
+                                          md,
+                                          conformer,
+                                          runner)
+
+
 def macromodel_cage_opt(mol,
                         macromodel_path,
                         settings=None,
@@ -337,6 +446,76 @@ def macromodel_cage_opt(mol,
                                    conformer)
 
 
+async def macromodel_cage_opt_async(mol,
+                                    macromodel_path,
+                                    settings=None,
+                                    md=None,
+                                    conformer=-1,
+                                    runner=None):
+    """
+    Optimizes the cage using MacroModel, without blocking.
+
+    This coroutine does the same as :func:`macromodel_cage_opt`,
+    except that MacroModel is run by a :class:`.JobRunner`.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule who's structure must be optimized.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    settings : :class:`dict`, optional
+        The settings of the optimization. See
+        :func:`macromodel_cage_opt`.
+
+    md : :class:`dict`, optional
+        The settings of the MD conformer search. See
+        :func:`_macromodel_md_opt`.
+
+    conformer : :class:`int`, optional
+        The id of the conformer to be optimized.
+
+    runner : :class:`.JobRunner`, optional
+        The runner used to run MacroModel. If ``None``, a new one is
+        used.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    if settings is None:
+        settings = {}
+    if runner is None:
+        runner = JobRunner()
+
+    # The MD is only run once the windows of the optimized cage have
+    # been checked.
+    await macromodel_opt_async(mol,
+                               macromodel_path,
+                               {**settings, 'md': False},
+                               conformer=conformer,
+                               runner=runner)
+    if not settings.get('md', False):
+        return
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        windows = mol.windows(conformer)
+
+    if (windows is not None and
+       len(windows) == mol.topology.n_windows):
+        await _macromodel_md_opt_async(mol,
+                                       macromodel_path,
+                                       md,
+                                       conformer,
+                                       runner)
+
+
 def _macromodel_md_opt(mol,
                        macromodel_path,
                        settings=None,
@@ -447,6 +626,231 @@ def _macromodel_md_opt(mol,
                                   conformer)
 
 
+async def _macromodel_md_opt_async(mol,
+                                   macromodel_path,
+                                   settings,
+                                   conformer,
+                                   runner):
+    """
+    Does the same as :func:`_macromodel_md_opt`, without blocking.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule who's structure must be optimized.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    settings : :class:`dict`
+        The settings of the MD. See :func:`_macromodel_md_opt`. May be
+        ``None``.
+
+    conformer : :class:`int`
+        The id of the conformer to be optimized.
+
+    runner : :class:`.JobRunner`
+        The runner used to run MacroModel.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    if settings is None:
+        settings = {}
+
+    vals = {
+               'timeout': None,
+               'force_field': 16,
+               'temp': 300,
+               'confs': 50,
+               'time_step': 1.0,
+               'eq_time': 10,
+               'sim_time': 200,
+               'max_iter': 2500,
+               'gradient': 0.05
+              }
+
+    vals.update(settings)
+
+    logger.info('Running MD on "{}".'.format(mol.name))
+    try:
+        mol._file = '{}.mol'.format(uuid4().int)
+        mol.write(mol._file, conformer)
+        await _create_mae_async(mol, macromodel_path, runner)
+        _generate_md_com(mol, vals)
+        await _run_bmin_async(mol, macromodel_path, vals['timeout'], runner)
+        conformer_mae = MAEExtractor(mol._file).path
+        mol.update_from_mae(conformer_mae, conformer)
+
+    except _ForceFieldError as ex:
+        if vals['force_field'] == 14:
+            raise ex
+
+        logger.warning(('Minimization with OPLS3 failed on "{}". '
+                        'Trying OPLS_2005.').format(mol.name))
+
+        vals['force_field'] = 14
+        return await _macromodel_md_opt_async(mol,
+                                              macromodel_path,
+                                              vals,
+                                              conformer,
+                                              runner)
+
+
+def macromodel_batch_opt(mols,
+                         macromodel_path,
+                         settings=None,
+                         conformer=-1):
+    """
+    Optimizes many molecules with a single MacroModel job.
+
+    All molecules are written into one multi-structure ``.mae`` file
+    and minimized by a single ``bmin`` job, which loops over the
+    structures in the file. This means that ``bmin`` is started, and
+    a license checked out, only once for the entire batch. The
+    minimized structures are then split back onto their molecules.
+
+    Unlike :func:`macromodel_opt`, only unrestricted optimizations
+    are supported, as the fixed bond parameters of a restricted
+    optimization differ between molecules.
+
+    Parameters
+    ----------
+    mols : :class:`list` of :class:`.Molecule`
+        The molecules to be optimized.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine. For example, on a Linux machine this may be something
+        like ``'/opt/schrodinger2017-2'``.
+
+    settings : :class:`dict`, optional
+        A dictionary which maps the names of optimization parameters to
+        their values. Valid values are:
+
+            'timeout' : :class:`float` (default = ``None``)
+                The amount in seconds the whole batch is allowed to
+                run before being terminated. ``None`` means there is no
+                timeout.
+
+            'force_field' : :class:`int` (default = ``16``)
+                The number of the force field to be used.
+
+            'max_iter' : :class:`int` (default = ``2500``)
+                The maximum number of iterations done during the
+                optimization of each molecule.
+
+            'gradient' : :class:`float` (default = ``0.05``)
+                The gradient at which optimization is stopped.
+
+    conformer : :class:`int`, optional
+        The id of the conformer to be optimized in each molecule.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    if settings is None:
+        settings = {}
+
+    vals = {
+             'timeout': None,
+             'force_field': 16,
+             'max_iter': 2500,
+             'gradient': 0.05
+            }
+    vals.update(settings)
+
+    # :func:`_run_bmin` only needs the name of the input file and a
+    # name to use in log messages.
+    file_root = str(uuid4().int)
+    batch = SimpleNamespace(_file=file_root+'.mol',
+                            name=f'batch of {len(mols)} molecules')
+
+    try:
+        with open(file_root+'.sdf', 'w') as f:
+            for mol in mols:
+                f.write(mol.mdl_mol_block(conformer))
+        _structconvert(file_root+'.sdf',
+                       file_root+'.mae',
+                       macromodel_path)
+        _generate_batch_com(file_root, vals)
+        _run_bmin(batch, macromodel_path, vals['timeout'])
+
+    except _ForceFieldError as ex:
+        if vals['force_field'] == 14:
+            raise ex
+
+        logger.warning(('Minimization with OPLS3 failed on "{}". '
+                        'Trying OPLS_2005.').format(batch.name))
+        vals['force_field'] = 14
+        return macromodel_batch_opt(mols,
+                                    macromodel_path,
+                                    vals,
+                                    conformer)
+
+    with gzip.open(file_root+'-out.maegz', 'rt') as f:
+        header, *structures = f.read().split('f_m_ct')
+
+    if len(structures) != len(mols):
+        raise _OptimizationError(
+            (f'{len(mols)} molecules were optimized but '
+             f'{len(structures)} structures were found in '
+             f'"{file_root}-out.maegz".'))
+
+    for i, (mol, structure) in enumerate(zip(mols, structures)):
+        mae = f'{file_root}_{i}.mae'
+        with open(mae, 'w') as f:
+            f.write('f_m_ct'.join([header, structure]))
+        mol.update_from_mae(mae, conformer)
+
+
+def _generate_batch_com(file_root, settings):
+    """
+    Creates a ``.com`` file minimizing every structure of a file.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the ``.mae`` file holding the structures, without
+        the extension.
+
+    settings : :class:`dict`
+        A dictionary of settings for the optimization. See
+        :func:`macromodel_batch_opt` documentation.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    # The ``BGIN`` and ``END`` commands make ``bmin`` repeat the
+    # commands between them for each structure in the input file.
+    main_string = "\n".join([
+        _com_line('MMOD', 0, 1, 0, 0, 0, 0, 0, 0),
+
+        _com_line('FFLD',
+                  settings['force_field'], 1, 0, 0, 1, 0, 0, 0),
+
+        _com_line('BGIN', 0, 0, 0, 0, 0, 0, 0, 0),
+        _com_line('READ', 0, 0, 0, 0, 0, 0, 0, 0),
+        _com_line('CONV', 2, 0, 0, 0, settings['gradient'], 0, 0, 0),
+        _com_line('MINI', 1, 0, settings['max_iter'], 0, 0, 0, 0, 0),
+        _com_line('END', 0, 1, 0, 0, 0, 0, 0, 0)])
+
+    with open(file_root+'.com', 'w') as com:
+        com.write(file_root+'.mae\n')
+        com.write(file_root+'-out.maegz\n')
+        com.write(main_string)
+
+
 def _run_bmin(macro_mol, macromodel_path, timeout):
 
     logger.info('Running bmin on "{}".'.format(macro_mol.name))
@@ -455,67 +859,167 @@ def _run_bmin(macro_mol, macromodel_path, timeout):
     # ``subprocess.Popen``. The command is the full path of the
     # ``bmin`` program. ``bmin`` is located in the Schrodinger
     # installation folder.
+    opt_cmd = _bmin_cmd(macro_mol, macromodel_path)
+
+    # Hold a license token, if a LicensePool is used, while bmin runs,
+    # so that only as many jobs run as there are licenses.
+    for attempt in it.count():
+        with _license_token():
+            opt_proc = psutil.Popen(opt_cmd,
+                                    stdout=sp.PIPE,
+                                    stderr=sp.STDOUT,
+                                    universal_newlines=True)
+            try:
+                proc_out, _ = opt_proc.communicate(timeout=timeout)
+
+            except sp.TimeoutExpired:
+                logger.warning(('Minimization took too long'
+                                ' and was terminated '
+                                f'by force on "{macro_mol.name}".'))
+                _kill_bmin(macro_mol, macromodel_path)
+                proc_out = ""
+
+            if _bmin_finished(macro_mol, proc_out):
+                break
+
+        _license_backoff(attempt, macro_mol.name)
+
+    _check_bmin_output(macro_mol)
+
+
+async def _run_bmin_async(macro_mol, macromodel_path, timeout, runner):
+    """
+    Does the same as :func:`_run_bmin`, without blocking.
+
+    Parameters
+    ----------
+    macro_mol : :class:`.Molecule`
+        The molecule or job being run. Only its ``_file`` and `name`
+        attributes are used.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    timeout : :class:`float`
+        The amount in seconds ``bmin`` is allowed to run before being
+        terminated. ``None`` means there is no timeout.
+
+    runner : :class:`.JobRunner`
+        The runner used to run ``bmin``.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    logger.info('Running bmin on "{}".'.format(macro_mol.name))
+    opt_cmd = _bmin_cmd(macro_mol, macromodel_path)
+
+    # Stopping a job through job control blocks, so it is done in
+    # another thread.
+    loop = asyncio.get_running_loop()
+    stop = partial(loop.run_in_executor,
+                   None,
+                   _kill_bmin,
+                   macro_mol,
+                   macromodel_path)
+
+    for attempt in it.count():
+        async with _license_token_async():
+            result = await runner.run(opt_cmd, timeout, stop)
+            if _bmin_finished(macro_mol, result.stdout):
+                break
+
+        await asyncio.sleep(_license_wait(attempt, macro_mol.name))
+
+    _check_bmin_output(macro_mol)
+
+
+def _bmin_cmd(macro_mol, macromodel_path):
     file_root, ext = os.path.splitext(macro_mol._file)
-    log_file = file_root + '.log'
     opt_app = os.path.join(macromodel_path, "bmin")
     # The first member of the list is the command, the following ones
     # are any additional arguments.
+    return [opt_app, file_root, "-WAIT", "-LOCAL"]
 
-    opt_cmd = [opt_app, file_root, "-WAIT", "-LOCAL"]
 
-    incomplete = True
-    while incomplete:
-        opt_proc = psutil.Popen(opt_cmd,
-                                stdout=sp.PIPE,
-                                stderr=sp.STDOUT,
-                                universal_newlines=True)
-        try:
-            proc_out, _ = opt_proc.communicate(timeout=timeout)
-
-        except sp.TimeoutExpired:
-            logger.warning(('Minimization took too long'
-                            ' and was terminated '
-                            f'by force on "{macro_mol.name}".'))
-            _kill_bmin(macro_mol, macromodel_path)
-            proc_out = ""
-
-        logger.debug(
-            f'Output of bmin on "{macro_mol.name}" was: {proc_out}.')
-
-        with open(log_file, 'r') as log:
-            log_content = log.read()
-
-        # Check the log for error reports.
-        if ("termination due to error condition           21-" in
-           log_content):
-            raise _OptimizationError(("`bmin` crashed due to"
-                                      " an error condition. "
-                                      "See .log file."))
-
-        if ("FATAL do_nosort_typing: NO MATCH found for atom " in
-           log_content):
-            raise _ForceFieldError(
-                            'The log implies the force field failed.')
-
-        if (("FATAL gen_lewis_structure(): could not find best Lewis"
-             " structure") in log_content and
-            ("skipping input structure  due to "
-             "forcefield interaction errors") in log_content):
-            raise _LewisStructureError(
-                    '`bmin` failed due to poor Lewis structure.')
-
-        # If optimization fails because a wrong Schrodinger path was
-        # given, raise.
-        if 'The system cannot find the path specified' in proc_out:
-            raise _PathError(('Wrong Schrodinger path supplied to'
-                              ' `macromodel_opt` function.'))
+def _bmin_finished(macro_mol, proc_out):
+    """
+    Checks the output of a ``bmin`` run for errors.
+
+    Parameters
+    ----------
+    macro_mol : :class:`.Molecule`
+        The molecule or job which was run.
+
+    proc_out : :class:`str`
+        The console output of ``bmin``.
+
+    Returns
+    -------
+    :class:`bool`
+        ``True`` if ``bmin`` ran. ``False`` if it has to be run again
+        because no license was available.
+
+    Raises
+    ------
+    :class:`_OptimizationError`
+        If ``bmin`` crashed.
+
+    :class:`_ForceFieldError`
+        If the force field could not be applied.
+
+    :class:`_LewisStructureError`
+        If no Lewis structure could be found.
+
+    :class:`_PathError`
+        If the Schrodinger path is wrong.
+
+    """
 
-        # If optimization fails because the license is not found, rerun
-        # the function.
-        if _license_found(proc_out, macro_mol):
-            incomplete = False
+    logger.debug(
+        f'Output of bmin on "{macro_mol.name}" was: {proc_out}.')
 
+    file_root, ext = os.path.splitext(macro_mol._file)
+    with open(file_root + '.log', 'r') as log:
+        log_content = log.read()
+
+    # Check the log for error reports.
+    if ("termination due to error condition           21-" in
+       log_content):
+        raise _OptimizationError(("`bmin` crashed due to"
+                                  " an error condition. "
+                                  "See .log file."))
+
+    if ("FATAL do_nosort_typing: NO MATCH found for atom " in
+       log_content):
+        raise _ForceFieldError(
+                        'The log implies the force field failed.')
+
+    if (("FATAL gen_lewis_structure(): could not find best Lewis"
+         " structure") in log_content and
+        ("skipping input structure  due to "
+         "forcefield interaction errors") in log_content):
+        raise _LewisStructureError(
+                '`bmin` failed due to poor Lewis structure.')
+
+    # If optimization fails because a wrong Schrodinger path was
+    # given, raise.
+    if 'The system cannot find the path specified' in proc_out:
+        raise _PathError(('Wrong Schrodinger path supplied to'
+                          ' `macromodel_opt` function.'))
+
+    # If optimization fails because the license is not found, it is
+    # run again once a license may be free.
+    return _license_found(proc_out, macro_mol)
+
+
+def _check_bmin_output(macro_mol):
     # Make sure the .maegz file created by the optimization is present.
+    file_root, ext = os.path.splitext(macro_mol._file)
+    log_file = file_root + '.log'
     maegz = file_root + '-out.maegz'
     _wait_for_file(maegz)
     if not os.path.exists(log_file) or not os.path.exists(maegz):
@@ -530,15 +1034,15 @@ def _kill_bmin(macro_mol, macromodel_path):
     app = os.path.join(macromodel_path, 'jobcontrol')
     cmd = [app, '-stop', name]
 
-    incomplete = True
-    while incomplete:
+    for attempt in it.count():
         out = sp.run(cmd, stdout=sp.PIPE,
                      stderr=sp.STDOUT, universal_newlines=True)
 
         # If no license if found, keep re-running the function until it
         # is.
         if _license_found(out.stdout):
-            incomplete = False
+            break
+        _license_backoff(attempt, name)
 
     # This loop causes the function to wait until the job has been
     # killed via job control. This means the output files will have
@@ -555,6 +1059,95 @@ def _kill_bmin(macro_mol, macromodel_path):
             break
 
 
+def _license_token():
+    """
+    Holds a token of the installed :class:`.LicensePool`.
+
+    Returns
+    -------
+    :class:`contextlib.AbstractContextManager`
+        Holds a token inside a ``with`` block. If no
+        :class:`.LicensePool` is installed in :data:`.CACHE_SETTINGS`,
+        nothing is held.
+
+    """
+
+    licenses = CACHE_SETTINGS['LICENSES']
+    return nullcontext() if licenses is None else licenses.token()
+
+
+def _license_token_async():
+    """
+    Holds a token of the installed :class:`.LicensePool`, without blocking.
+
+    Returns
+    -------
+    :class:`contextlib.AbstractAsyncContextManager`
+        Holds a token inside an ``async with`` block. If no
+        :class:`.LicensePool` is installed in :data:`.CACHE_SETTINGS`,
+        nothing is held.
+
+    """
+
+    licenses = CACHE_SETTINGS['LICENSES']
+    return _no_token() if licenses is None else licenses.token_async()
+
+
+@asynccontextmanager
+async def _no_token():
+    yield
+
+
+def _license_backoff(attempt, name):
+    """
+    Waits before trying again to get a MacroModel license.
+
+    Parameters
+    ----------
+    attempt : :class:`int`
+        The number of attempts which already failed, minus one.
+
+    name : :class:`str`
+        The name of the molecule or job, used for logging.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    time.sleep(_license_wait(attempt, name))
+
+
+def _license_wait(attempt, name):
+    """
+    Returns how long to wait before trying again to get a license.
+
+    The wait doubles with every failed attempt, up to a minute, and is
+    randomized so that jobs which failed together do not all try again
+    at the same time.
+
+    Parameters
+    ----------
+    attempt : :class:`int`
+        The number of attempts which already failed, minus one.
+
+    name : :class:`str`
+        The name of the molecule or job, used for logging.
+
+    Returns
+    -------
+    :class:`float`
+        The number of seconds to wait.
+
+    """
+
+    wait = min(60, 2**attempt) * random.uniform(0.5, 1)
+    logger.warning(f'No MacroModel license was available for "{name}", '
+                   f'trying again in {wait:.1f} s.')
+    return wait
+
+
 def _license_found(output, mol=None):
     """
     Checks to see if minimization failed due to a missing license.
@@ -757,6 +1350,36 @@ def _create_mae(mol, macromodel_path):
     return mae_file
 
 
+async def _create_mae_async(mol, macromodel_path, runner):
+    """
+    Does the same as :func:`_create_mae`, without blocking.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule which is to be optimized.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    runner : :class:`.JobRunner`
+        The runner used to run ``structconvert``.
+
+    Returns
+    -------
+    :class:`str`
+        The full path of the newly created ``.mae`` file.
+
+    """
+
+    _, ext = os.path.splitext(mol._file)
+    logger.debug(f'Converting {ext} of "{mol.name}" to .mae.')
+    mae_file = mol._file.replace(ext, '.mae')
+    await _structconvert_async(mol._file, mae_file, macromodel_path, runner)
+    return mae_file
+
+
 def _convert_maegz_to_mae(mol):
     """
     Converts a ``.maegz`` file to a ``.mae`` file.
@@ -789,20 +1412,17 @@ def _convert_maegz_to_mae(mol):
 
 def _structconvert(iname, oname, macromodel_path):
 
-    convrt_app = os.path.join(macromodel_path,
-                              'utilities',
-                              'structconvert')
-    convrt_cmd = [convrt_app, iname, oname]
+    convrt_cmd = _structconvert_cmd(iname, oname, macromodel_path)
 
-    incomplete = True
-    while incomplete:
+    for attempt in it.count():
 
         # Execute the file conversion.
         try:
-            convrt_return = sp.run(convrt_cmd,
-                                   stdout=sp.PIPE,
-                                   stderr=sp.STDOUT,
-                                   universal_newlines=True)
+            with _license_token():
+                convrt_return = sp.run(convrt_cmd,
+                                       stdout=sp.PIPE,
+                                       stderr=sp.STDOUT,
+                                       universal_newlines=True)
 
         # If conversion fails because a wrong Schrodinger path was
         # given, raise.
@@ -810,16 +1430,102 @@ def _structconvert(iname, oname, macromodel_path):
             raise _PathError(('Wrong Schrodinger path supplied to'
                               ' `structconvert` function.'))
 
-        if 'File does not exist' in convrt_return.stdout:
-            raise _ConversionError(
-                    (f'structconvert input file, {iname}, missing. '
-                     f'Console output was {convrt_return.stdout}'))
-
         # If no license if found, keep re-running the function until it
         # is.
-        if _license_found(convrt_return.stdout):
-            incomplete = False
+        if _structconvert_finished(iname, convrt_return):
+            break
+        _license_backoff(attempt, iname)
 
+    _check_structconvert_output(oname, convrt_return)
+    return convrt_return
+
+
+async def _structconvert_async(iname, oname, macromodel_path, runner):
+    """
+    Does the same as :func:`_structconvert`, without blocking.
+
+    Parameters
+    ----------
+    iname : :class:`str`
+        The path of the file to convert.
+
+    oname : :class:`str`
+        The path of the converted file.
+
+    macromodel_path : :class:`str`
+        The full path of the Schrodinger suite within the user's
+        machine.
+
+    runner : :class:`.JobRunner`
+        The runner used to run ``structconvert``.
+
+    Returns
+    -------
+    :class:`subprocess.CompletedProcess`
+        The result of the conversion.
+
+    """
+
+    convrt_cmd = _structconvert_cmd(iname, oname, macromodel_path)
+
+    for attempt in it.count():
+        try:
+            async with _license_token_async():
+                convrt_return = await runner.run(convrt_cmd)
+
+        except FileNotFoundError:
+            raise _PathError(('Wrong Schrodinger path supplied to'
+                              ' `structconvert` function.'))
+
+        if _structconvert_finished(iname, convrt_return):
+            break
+        await asyncio.sleep(_license_wait(attempt, iname))
+
+    _check_structconvert_output(oname, convrt_return)
+    return convrt_return
+
+
+def _structconvert_cmd(iname, oname, macromodel_path):
+    convrt_app = os.path.join(macromodel_path,
+                              'utilities',
+                              'structconvert')
+    return [convrt_app, iname, oname]
+
+
+def _structconvert_finished(iname, convrt_return):
+    """
+    Checks the output of a ``structconvert`` run for errors.
+
+    Parameters
+    ----------
+    iname : :class:`str`
+        The path of the file which was converted.
+
+    convrt_return : :class:`subprocess.CompletedProcess`
+        The result of the conversion.
+
+    Returns
+    -------
+    :class:`bool`
+        ``True`` if the conversion ran. ``False`` if it has to be run
+        again because no license was available.
+
+    Raises
+    ------
+    :class:`_ConversionError`
+        If the input file does not exist.
+
+    """
+
+    if 'File does not exist' in convrt_return.stdout:
+        raise _ConversionError(
+                (f'structconvert input file, {iname}, missing. '
+                 f'Console output was {convrt_return.stdout}'))
+
+    return _license_found(convrt_return.stdout)
+
+
+def _check_structconvert_output(oname, convrt_return):
     # If force field failed, raise.
     if 'number 1' in convrt_return.stdout:
         raise _ForceFieldError(convrt_return.stdout)
@@ -830,8 +1536,6 @@ def _structconvert(iname, oname, macromodel_path):
          (f'Conversion output file {oname} was not found.'
           f' Console output was {convrt_return.stdout}.'))
 
-    return convrt_return
-
 
 def _fix_params_in_com_file(mol, main_string, restricted):
     """
@@ -4,16 +4,26 @@ Defines optimization functions which use MOPAC.
 """
 
 import os
+import re
 import subprocess as sp
 import psutil
 import time
 import logging
+import numpy as np
 import rdkit.Chem.AllChem as rdkit
 from uuid import uuid4
+from functools import partial
+
+from ..utilities import JobRunner
 
 logger = logging.getLogger(__name__)
 
 
+class _BatchError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
 def mopac_opt(mol, mopac_path, settings=None):
     """
     Optimizes the molecule using MOPAC.
@@ -92,19 +102,7 @@ def mopac_opt(mol, mopac_path, settings=None):
 
     """
 
-    if settings is None:
-        settings = {}
-
-    vals = {
-            'hamiltonian': 'PM7',
-            'method': 'OPT',
-            'gradient': 0.01,
-            'eps': 80.1,
-            'charge': 0,
-            'fileout': 'PDBOUT',
-            'timeout': 172800,
-            }
-    vals.update(settings)
+    vals = _opt_settings(settings)
 
     mol._file = '{}.mol'.format(uuid4().int)
 
@@ -120,6 +118,315 @@ def mopac_opt(mol, mopac_path, settings=None):
     _convert_mopout_to_mol(mol)
 
 
+async def mopac_opt_async(mol, mopac_path, settings=None, runner=None):
+    """
+    Optimizes the molecule using MOPAC, without blocking.
+
+    This coroutine does the same as :func:`mopac_opt`, except that
+    MOPAC is run by a :class:`.JobRunner`. This allows a single
+    process to run many optimizations at once.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule to be optimized.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC executable.
+
+    settings : :class:`dict`, optional
+        The settings of the optimization. See :func:`mopac_opt`.
+
+    runner : :class:`.JobRunner`, optional
+        The runner used to run MOPAC. If ``None``, a new one is used.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    if runner is None:
+        runner = JobRunner()
+
+    vals = _opt_settings(settings)
+    mol._file = '{}.mol'.format(uuid4().int)
+    mol.write(mol._file)
+    _create_mop(mol, vals)
+
+    file_root, ext = os.path.splitext(mol._file)
+    logger.info(f'Running MOPAC - {mol.name}.')
+    await runner.run(cmd=[mopac_path, file_root],
+                     timeout=vals['timeout'],
+                     stop=partial(_kill_mopac, mol))
+    _convert_mopout_to_mol(mol)
+
+
+def mopac_batch_opt(mols, mopac_path, settings=None, conformer=-1):
+    """
+    Optimizes many molecules with a single MOPAC run.
+
+    All molecules are written into one ``.mop`` file, one job after
+    another, so that MOPAC is only started once. The optimized
+    structures are then read back from the ``.out`` file and placed
+    on their molecules. For small molecules this is much faster than
+    calling :func:`mopac_opt` on each one, because starting MOPAC
+    takes longer than the optimization itself.
+
+    Parameters
+    ----------
+    mols : :class:`list` of :class:`.Molecule`
+        The molecules to be optimized.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC executable.
+
+    settings : :class:`dict`, optional
+        The settings of the optimization. See :func:`mopac_opt`. The
+        `timeout` applies to the whole run.
+
+    conformer : :class:`int`, optional
+        The id of the conformer to be optimized in each molecule.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    Raises
+    ------
+    :class:`_BatchError`
+        If MOPAC did not produce a structure for some of the
+        molecules. The other molecules are still updated.
+
+    """
+
+    vals = _opt_settings(settings)
+    file_root = str(uuid4().int)
+    _create_batch_mop(file_root, mols, _mop_line(vals), conformer)
+    _run_mopac_batch(file_root, mopac_path, vals['timeout'])
+
+    failed = []
+    for mol, job in zip(mols, _mopac_jobs(file_root, len(mols))):
+        geometry = _job_geometry(job)
+        if geometry is None or len(geometry) != mol.mol.GetNumAtoms():
+            failed.append(mol.name)
+            continue
+        mol.set_position_from_matrix(geometry.T, conformer)
+
+    if failed:
+        raise _BatchError(
+            f'MOPAC did not optimize {failed} in batch "{file_root}".')
+
+
+def _opt_settings(settings):
+    """
+    Adds the default values of the optimization settings.
+
+    Parameters
+    ----------
+    settings : :class:`dict`
+        The settings given to :func:`mopac_opt`. May be ``None``.
+
+    Returns
+    -------
+    :class:`dict`
+        All settings of the optimization.
+
+    """
+
+    vals = {
+            'hamiltonian': 'PM7',
+            'method': 'OPT',
+            'gradient': 0.01,
+            'eps': 80.1,
+            'charge': 0,
+            'fileout': 'PDBOUT',
+            'timeout': 172800,
+            }
+    if settings is not None:
+        vals.update(settings)
+    return vals
+
+
+def _create_batch_mop(file_root, mols, mop_line, conformer=-1):
+    """
+    Creates a ``.mop`` file holding a job for each molecule.
+
+    Each job is given the title ``file_root_i``, where ``i`` is the
+    index of the molecule in `mols`. The titles are echoed in the
+    output of MOPAC, which allows the output to be split into jobs
+    by :func:`_mopac_jobs`.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the ``.mop`` file, without the extension.
+
+    mols : :class:`list` of :class:`.Molecule`
+        The molecules to be written.
+
+    mop_line : :class:`str`
+        The MOPAC keywords used by every job.
+
+    conformer : :class:`int`, optional
+        The conformer of each molecule to write.
+
+    Returns
+    -------
+    :class:`str`
+        The path of the ``.mop`` file.
+
+    """
+
+    mop_file = file_root + '.mop'
+    logger.info(f'Creating .mop file with {len(mols)} jobs - '
+                f'{file_root}.')
+
+    with open(mop_file, 'w') as mop:
+        for i, mol in enumerate(mols):
+            mop.write(mop_line + '\n')
+            mop.write(f'{file_root}_{i}\n\n')
+
+            conf = mol.mol.GetConformer(conformer)
+            for atom in mol.mol.GetAtoms():
+                x, y, z = conf.GetAtomPosition(atom.GetIdx())
+                mop.write(f'{atom.GetSymbol()}   {x}   +1  {y}   '
+                          f'+1  {z}   +1 \n')
+            # A blank line ends the geometry of a job.
+            mop.write('\n')
+
+    return mop_file
+
+
+def _run_mopac_batch(file_root, mopac_path, timeout):
+    """
+    Runs MOPAC on the ``.mop`` file made by :func:`_create_batch_mop`.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the ``.mop`` file, without the extension.
+
+    mopac_path : :class:`str`
+        The full path to the MOPAC executable.
+
+    timeout : :class:`float`
+        The number of seconds the run is allowed to take. ``None``
+        means there is no timeout.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    logger.info(f'Running MOPAC batch - {file_root}.')
+    proc = psutil.Popen([mopac_path, file_root],
+                        stdout=sp.PIPE,
+                        stderr=sp.STDOUT,
+                        universal_newlines=True)
+    try:
+        proc.communicate(timeout=timeout)
+    except sp.TimeoutExpired:
+        logger.warning('MOPAC batch took too long and was terminated '
+                       f'by force - {file_root}.')
+        with open(file_root + '.end', 'w') as end:
+            end.write('SHUT')
+        proc.communicate()
+
+
+def _mopac_jobs(file_root, num_jobs):
+    """
+    Splits the ``.out`` file of a batch run into its jobs.
+
+    Parameters
+    ----------
+    file_root : :class:`str`
+        The name of the ``.mop`` file, without the extension.
+
+    num_jobs : :class:`int`
+        The number of jobs in the ``.mop`` file.
+
+    Returns
+    -------
+    :class:`list` of :class:`str`
+        The output of each job, in the order of the ``.mop`` file.
+        A job which does not appear in the output is an empty string.
+
+    """
+
+    try:
+        with open(file_root + '.out') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return ['' for i in range(num_jobs)]
+
+    starts = []
+    for i in range(num_jobs):
+        title = re.escape(f'{file_root}_{i}')
+        match = re.search(rf'^\s*{title}\s*$', content, re.MULTILINE)
+        starts.append(match.start() if match else None)
+
+    found = sorted(x for x in starts if x is not None)
+    ends = dict(zip(found, found[1:] + [len(content)]))
+    return [content[start:ends[start]] if start is not None else ''
+            for start in starts]
+
+
+def _job_energy(job):
+    """
+    Finds the total energy in the output of a MOPAC job.
+
+    Parameters
+    ----------
+    job : :class:`str`
+        The output of a job, from :func:`_mopac_jobs`.
+
+    Returns
+    -------
+    :class:`float`
+        The total energy, in ``eV``. ``None`` if it is missing.
+
+    """
+
+    match = re.findall(r'TOTAL ENERGY\s*=\s*(-?\d+\.?\d*)', job)
+    return float(match[-1]) if match else None
+
+
+def _job_geometry(job):
+    """
+    Finds the final structure in the output of a MOPAC job.
+
+    Parameters
+    ----------
+    job : :class:`str`
+        The output of a job, from :func:`_mopac_jobs`.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        An ``[n, 3]`` array of the atomic coordinates found in the
+        last ``CARTESIAN COORDINATES`` block. ``None`` if there is no
+        such block.
+
+    """
+
+    start = job.rfind('CARTESIAN COORDINATES')
+    if start == -1:
+        return None
+
+    atom = re.compile(r'^\s*\d+\s+[A-Z][a-z]?\s+'
+                      r'(-?\d+\.\d+)\s+(-?\d+\.\d+)\s+(-?\d+\.\d+)\s*$')
+    coords = []
+    for line in job[start:].split('\n')[1:]:
+        match = atom.match(line)
+        if match:
+            coords.append([float(x) for x in match.groups()])
+        elif coords and line.strip():
+            break
+    return np.array(coords)
+
+
 def _run_mopac(mol, mopac_path, settings, timeout=7200):
 
     name, ext = os.path.splitext(mol._file)
@@ -238,9 +545,9 @@ def _create_mop(mol, settings):
     """
     name, ext = os.path.splitext(mol._file)
     mop_file = name + '.mop'
-    mol = mol.mol
 
     logger.info('\nCreating .mop file - {}.'.format(mol.name))
+    mol = mol.mol
 
     # Generate the mop file containing the MOPAC run info
     with open(mop_file, 'w') as mop:
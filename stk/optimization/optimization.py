@@ -28,20 +28,34 @@ file, not any of the helper functions or classes.
 """
 
 import rdkit.Chem.AllChem as rdkit
-import multiprocessing as mp
 from functools import partial, wraps
+from inspect import signature
 import numpy as np
 import logging
-from threading import Thread
+import time
 
-from .macromodel import macromodel_opt, macromodel_cage_opt
-from ..utilities import daemon_logger, logged_call
+from .macromodel import (macromodel_opt,
+                         macromodel_opt_async,
+                         macromodel_cage_opt,
+                         macromodel_cage_opt_async,
+                         macromodel_batch_opt)
+from .mopac import mopac_opt, mopac_opt_async, mopac_batch_opt
+from .scheduling import CostModel
+from ..utilities import (cache_stats,
+                         reset_cache_stats,
+                         merge_cache_stats,
+                         WorkerPool)
 
 
 logger = logging.getLogger(__name__)
 
 
-def _optimize_all(func_data, population, processes):
+def _optimize_all(func_data,
+                  population,
+                  processes,
+                  stores=(),
+                  pool=None,
+                  cost_model=None):
     """
     Run opt function on all population members in parallel.
 
@@ -56,7 +70,22 @@ def _optimize_all(func_data, population, processes):
         optimized.
 
     processes : :class:`int`
-        The number of parallel processes to create.
+        The number of parallel processes to create. Ignored if `pool`
+        is provided.
+
+    stores : :class:`list`, optional
+        Each newly optimized molecule is written to these
+        :class:`.MoleculeStore` or :class:`.OptimizationCheckpoint`
+        instances as soon as it is done.
+
+    pool : :class:`.WorkerPool`, optional
+        The workers which carry out the optimizations. If ``None``, a
+        new pool is created for this call only.
+
+    cost_model : :class:`.CostModel`, optional
+        If provided, the most expensive optimizations are started
+        first and timeouts are based on the estimated runtimes. The
+        runtime of each optimization is recorded in the model.
 
     Returns
     -------
@@ -64,10 +93,10 @@ def _optimize_all(func_data, population, processes):
 
     """
 
-    manager = mp.Manager()
-    logq = manager.Queue()
-    log_thread = Thread(target=daemon_logger, args=(logq, ))
-    log_thread.start()
+    if pool is None:
+        with WorkerPool(processes) as pool:
+            return _optimize_all(func_data, population, processes,
+                                 stores, pool, cost_model)
 
     # Using the name of the function stored in `func_data` get the
     # function object from one of the functions defined within the
@@ -77,21 +106,200 @@ def _optimize_all(func_data, population, processes):
     # require.
     p_func = _OptimizationFunc(partial(func, **func_data.params))
 
-    # Apply the function to every member of the population, in
-    # parallel.
-    with mp.get_context('spawn').Pool(processes) as pool:
-        optimized = pool.starmap(logged_call,
-                                 ((logq, p_func, mem) for
-                                  mem in population))
-    # Make sure the cache is updated with the optimized versions.
-    for member in optimized:
+    # Molecules which were optimized before this call are not sent to
+    # the workers at all.
+    members = []
+    for member in population:
+        if member.optimized:
+            logger.info(f'Skipping {member.name}.')
+        else:
+            members.append(member)
+
+    if cost_model is None:
+        jobs = [(p_func, member) for member in members]
+        chunksize = max(1, len(members) // (4*pool.processes))
+    else:
+        # Sending one job at a time keeps the workers from picking
+        # up a cheap job ahead of an expensive one.
+        members = cost_model.order(func_data, members)
+        jobs = [(_timed_func(func,
+                             func_data,
+                             cost_model.timeout(func_data, member)),
+                 member) for member in members]
+        chunksize = 1
+
+    # Apply the function to the remaining members, in parallel.
+    # Results are handled as soon as they arrive, so that finished
+    # optimizations are kept even if a later one fails.
+    optimized = pool.imap_unordered(_optimize_and_report,
+                                    jobs,
+                                    chunksize)
+    for i, (changes, stats, seconds) in optimized:
+        merge_cache_stats(stats)
+        member = members[i]
+        # Make sure both the member and the cache hold the optimized
+        # version.
+        _apply_changes(member, changes)
         member.update_cache()
+        for store in stores:
+            store.put(member, func_data)
+        if cost_model is not None:
+            cost_model.record(func_data, member, seconds)
+
+
+def _timed_func(func, func_data, timeout):
+    """
+    Creates an optimization function with a timeout.
+
+    Parameters
+    ----------
+    func : :class:`function`
+        The optimization function.
+
+    func_data : :class:`.FunctionData`
+        The arguments the optimization function is called with.
+
+    timeout : :class:`float`
+        The timeout in seconds. It is only used if `func` takes a
+        `settings` :class:`dict`, in which case it replaces any
+        ``'timeout'`` in `func_data`. ``None`` if the timeout in
+        `func_data` should be used.
+
+    Returns
+    -------
+    :class:`_OptimizationFunc`
+        The optimization function.
+
+    """
+
+    params = dict(func_data.params)
+    if timeout is not None and 'settings' in signature(func).parameters:
+        params['settings'] = dict(params.get('settings') or {},
+                                  timeout=timeout)
+    return _OptimizationFunc(partial(func, **params))
+
+
+def _optimize_and_report(job):
+    """
+    Optimizes a molecule in a worker process.
+
+    Only the changes made by the optimization are sent back, rather
+    than the whole molecule.
+
+    Parameters
+    ----------
+    job : :class:`tuple`
+        The optimization function, an :class:`_OptimizationFunc`, and
+        the molecule to optimize.
+
+    Returns
+    -------
+    :class:`tuple`
+        The changes made to the molecule, as returned by
+        :func:`_changes`, the :func:`.cache_stats` counted by the
+        worker during the optimization, so that the parent process
+        can add them to its own, and the runtime of the optimization
+        in seconds.
+
+    """
+
+    func, mol = job
+    reset_cache_stats()
+    before = _layout(mol), set(mol.energy.values)
+    start = time.perf_counter()
+    mol = func(mol)
+    seconds = time.perf_counter() - start
+    return _changes(mol, *before), cache_stats(), seconds
+
+
+def _layout(mol):
+    """
+    Returns the number of atoms and the conformer ids of `mol`.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        A molecule.
+
+    Returns
+    -------
+    :class:`tuple`
+        The number of atoms and a :class:`list` of the conformer ids.
+
+    """
+
+    return (mol.mol.GetNumAtoms(),
+            [conf.GetId() for conf in mol.mol.GetConformers()])
+
+
+def _changes(mol, layout, energy_keys):
+    """
+    Collects the changes an optimization made to a molecule.
+
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The optimized molecule.
+
+    layout : :class:`tuple`
+        The :func:`_layout` of `mol` before the optimization.
+
+    energy_keys : :class:`set`
+        The keys of :attr:`.Energy.values` before the optimization.
+
+    Returns
+    -------
+    :class:`dict`
+        The new value of :attr:`.Molecule.optimized`, the new energy
+        values and the new coordinates of each conformer. If the
+        optimization added or removed atoms or conformers, the whole
+        ``rdkit`` molecule is included instead of the coordinates.
+
+    """
+
+    changes = {'optimized': mol.optimized,
+               'energy_values': {key: value for
+                                 key, value in mol.energy.values.items()
+                                 if key not in energy_keys}}
+
+    if _layout(mol) == layout:
+        changes['conformers'] = [(conf.GetId(), conf.GetPositions()) for
+                                 conf in mol.mol.GetConformers()]
+    else:
+        changes['mol'] = mol.mol.ToBinary(
+                                rdkit.PropertyPickleOptions.AllProps)
+    return changes
+
+
+def _apply_changes(mol, changes):
+    """
+    Applies the changes returned by :func:`_changes` to a molecule.
 
-    logq.put(None)
-    log_thread.join()
+    Parameters
+    ----------
+    mol : :class:`.Molecule`
+        The molecule before it was optimized.
+
+    changes : :class:`dict`
+        The changes made to a copy of `mol` by an optimization.
+
+    Returns
+    -------
+    None : :class:`NoneType`
 
+    """
+
+    mol.optimized = changes['optimized']
+    mol.energy.values.update(changes['energy_values'])
+    if 'mol' in changes:
+        mol.mol = rdkit.Mol(changes['mol'])
+        mol.save_atom_props()
+    else:
+        for conf_id, positions in changes['conformers']:
+            mol.set_position_from_matrix(positions.T, conf_id)
 
-def _optimize_all_serial(func_data, population):
+
+def _optimize_all_serial(func_data, population, stores=()):
     """
     Run opt function on all population members sequentially.
 
@@ -105,6 +313,11 @@ def _optimize_all_serial(func_data, population):
         The :class:`.Population` instance who's members are to be
         optimized.
 
+    stores : :class:`list`, optional
+        Each newly optimized molecule is written to these
+        :class:`.MoleculeStore` or :class:`.OptimizationCheckpoint`
+        instances as soon as it is done.
+
     Returns
     -------
     None : :class:`NoneType`
@@ -121,7 +334,59 @@ def _optimize_all_serial(func_data, population):
 
     # Apply the function to every member of the population.
     for member in population:
+        skip = member.optimized
         p_func(member)
+        if not skip:
+            for store in stores:
+                store.put(member, func_data)
+
+
+def _optimize_all_async(func_data, population, runner, stores=()):
+    """
+    Run opt function on all population members concurrently.
+
+    Only the external programs run in parallel, each as a subprocess
+    started by `runner`. Everything else happens in this process, so
+    no molecules need to be sent to worker processes.
+
+    Parameters
+    ----------
+    func_data : :class:`.FunctionData`
+        The :class:`.FunctionData` object which represents the chosen
+        optimization function. There must be a coroutine version of
+        the function, with the same name followed by ``_async``.
+
+    population : :class:`.Population`
+        The :class:`.Population` instance who's members are to be
+        optimized.
+
+    runner : :class:`.JobRunner`
+        Runs the external programs used by the optimization function.
+
+    stores : :class:`list`, optional
+        Each newly optimized molecule is written to these
+        :class:`.MoleculeStore` or :class:`.OptimizationCheckpoint`
+        instances as soon as it is done.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    func = globals()[func_data.name + '_async']
+    p_func = _OptimizationFunc(partial(func,
+                                       runner=runner,
+                                       **func_data.params))
+
+    async def optimize(member):
+        skip = member.optimized
+        await p_func.call_async(member)
+        if not skip:
+            for store in stores:
+                store.put(member, func_data)
+
+    runner.run_all(optimize(member) for member in population)
 
 
 class _OptimizationFunc:
@@ -175,6 +440,41 @@ class _OptimizationFunc:
             mol.optimized = True
             return mol
 
+    async def call_async(self, mol):
+        """
+        Decorates and awaits a coroutine optimization function.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            The molecule to be optimized.
+
+        Returns
+        -------
+        :class:`.Molecule`
+            The optimized molecule.
+
+        """
+
+        if mol.optimized:
+            logger.info(f'Skipping {mol.name}.')
+            return mol
+
+        try:
+            logger.info(f'Optimizing {mol.name}.')
+            await self.__wrapped__(mol)
+
+        except Exception as ex:
+            errormsg = (f'Optimization function '
+                        f'"{self.__wrapped__.func.__name__}()" '
+                        f'failed on molecule "{mol.name}".')
+            logger.error(errormsg, exc_info=True)
+
+        # Unlike in __call__, a cancelled optimization is not marked as
+        # done, so the cancellation is not swallowed by a ``finally``.
+        mol.optimized = True
+        return mol
+
 
 def do_not_optimize(mol):
     """
@@ -0,0 +1,295 @@
+"""
+Defines :class:`CostModel`, which is used to schedule optimizations.
+
+"""
+
+import json
+import logging
+from collections import defaultdict, deque
+
+
+logger = logging.getLogger(__name__)
+
+
+class CostModel:
+    """
+    Estimates how long optimizations take.
+
+    The cost of optimizing a molecule is assumed to grow linearly with
+    its size, the number of its atoms plus the number of its bonds. The
+    time taken per unit of size is learnt from the runtimes recorded
+    with :meth:`record`, separately for each optimization function
+    and topology.
+
+    :meth:`.Population.optimize` uses a :class:`CostModel` to start
+    the most expensive optimizations first, so that a few large
+    molecules do not hold up the end of a parallel run. It also gives
+    each optimization a timeout based on its estimated runtime, if the
+    optimization function takes a `settings` :class:`dict` with a
+    ``'timeout'``.
+
+    Attributes
+    ----------
+    margin : :class:`float`
+        Timeouts are this many times longer than the estimated
+        runtime.
+
+    min_timeout : :class:`float`
+        The shortest timeout given, in seconds.
+
+    history : :class:`int`
+        The number of recent runtimes used for each optimization
+        function and topology.
+
+    runtimes : :class:`dict`
+        Maps the name of an optimization function and the name of a
+        topology to a :class:`collections.deque` of recorded
+        ``(size, seconds)`` pairs.
+
+    """
+
+    def __init__(self, margin=5, min_timeout=600, history=100):
+        """
+        Initializes a :class:`CostModel`.
+
+        Parameters
+        ----------
+        margin : :class:`float`, optional
+            Timeouts are this many times longer than the estimated
+            runtime.
+
+        min_timeout : :class:`float`, optional
+            The shortest timeout given, in seconds.
+
+        history : :class:`int`, optional
+            The number of recent runtimes used for each optimization
+            function and topology.
+
+        """
+
+        self.margin = margin
+        self.min_timeout = min_timeout
+        self.history = history
+        self.runtimes = defaultdict(self._new_runtimes)
+
+    def _new_runtimes(self):
+        return deque(maxlen=self.history)
+
+    @staticmethod
+    def size(mol):
+        """
+        Returns the size of a molecule, as used by the model.
+
+        Parameters
+        ----------
+        mol : :class:`.Molecule`
+            A molecule.
+
+        Returns
+        -------
+        :class:`int`
+            The number of atoms plus the number of bonds in `mol`.
+
+        """
+
+        return mol.mol.GetNumAtoms() + mol.mol.GetNumBonds()
+
+    @staticmethod
+    def _group(func_data, mol):
+        topology = getattr(mol, 'topology', None)
+        return (func_data.name,
+                mol.__class__.__name__ if topology is None else
+                topology.__class__.__name__)
+
+    def _rate(self, func_data, mol):
+        """
+        Returns the estimated number of seconds per unit of size.
+
+        Runtimes of the same optimization function and topology are
+        used if there are any, otherwise runtimes of the same
+        optimization function with any topology.
+
+        Parameters
+        ----------
+        func_data : :class:`.FunctionData`
+            The optimization function.
+
+        mol : :class:`.Molecule`
+            The molecule being optimized.
+
+        Returns
+        -------
+        :class:`float`
+            The estimated rate, or ``None`` if there are no runtimes
+            to base it on.
+
+        """
+
+        group = self._group(func_data, mol)
+        if self.runtimes.get(group):
+            samples = self.runtimes[group]
+        else:
+            samples = [sample for (name, _), runtimes in
+                       self.runtimes.items() if name == func_data.name
+                       for sample in runtimes]
+
+        size = sum(size for size, _ in samples)
+        if size == 0:
+            return None
+        return sum(seconds for _, seconds in samples) / size
+
+    def estimate(self, func_data, mol):
+        """
+        Estimates how long optimizing a molecule takes.
+
+        Parameters
+        ----------
+        func_data : :class:`.FunctionData`
+            The optimization function.
+
+        mol : :class:`.Molecule`
+            The molecule being optimized.
+
+        Returns
+        -------
+        :class:`float`
+            The estimated runtime in seconds, or ``None`` if nothing
+            is known about `func_data`.
+
+        """
+
+        rate = self._rate(func_data, mol)
+        return None if rate is None else rate*self.size(mol)
+
+    def timeout(self, func_data, mol):
+        """
+        Returns a timeout for optimizing a molecule.
+
+        Parameters
+        ----------
+        func_data : :class:`.FunctionData`
+            The optimization function.
+
+        mol : :class:`.Molecule`
+            The molecule being optimized.
+
+        Returns
+        -------
+        :class:`float`
+            The timeout in seconds, or ``None`` if nothing is known
+            about `func_data`.
+
+        """
+
+        estimate = self.estimate(func_data, mol)
+        if estimate is None:
+            return None
+        return max(self.min_timeout, self.margin*estimate)
+
+    def order(self, func_data, mols):
+        """
+        Sorts molecules from the most to the least expensive.
+
+        Molecules are sorted by size while nothing is known about
+        `func_data`.
+
+        Parameters
+        ----------
+        func_data : :class:`.FunctionData`
+            The optimization function.
+
+        mols : :class:`list` of :class:`.Molecule`
+            The molecules to sort.
+
+        Returns
+        -------
+        :class:`list` of :class:`.Molecule`
+            The sorted molecules.
+
+        """
+
+        def cost(mol):
+            rate = self._rate(func_data, mol)
+            return self.size(mol)*(1 if rate is None else rate)
+
+        return sorted(mols, key=cost, reverse=True)
+
+    def record(self, func_data, mol, seconds):
+        """
+        Records how long optimizing a molecule took.
+
+        Parameters
+        ----------
+        func_data : :class:`.FunctionData`
+            The optimization function.
+
+        mol : :class:`.Molecule`
+            The optimized molecule.
+
+        seconds : :class:`float`
+            The runtime of the optimization.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        group = self._group(func_data, mol)
+        self.runtimes[group].append((self.size(mol), seconds))
+        logger.debug(f'Optimizing "{mol.name}" with {func_data.name}() '
+                     f'took {seconds:.1f} s.')
+
+    def dump(self, path):
+        """
+        Writes the recorded runtimes to a ``.json`` file.
+
+        Parameters
+        ----------
+        path : :class:`str`
+            The path of the file.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        runtimes = [[name, topology, list(samples)] for
+                    (name, topology), samples in self.runtimes.items()]
+        with open(path, 'w') as f:
+            json.dump({'margin': self.margin,
+                       'min_timeout': self.min_timeout,
+                       'history': self.history,
+                       'runtimes': runtimes}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Creates a :class:`CostModel` from a file written by :meth:`dump`.
+
+        Parameters
+        ----------
+        path : :class:`str`
+            The path of the file.
+
+        Returns
+        -------
+        :class:`CostModel`
+            The model, holding the runtimes recorded in the file.
+
+        """
+
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        model = cls(data['margin'], data['min_timeout'], data['history'])
+        for name, topology, samples in data['runtimes']:
+            model.runtimes[(name, topology)].extend(
+                                        tuple(sample) for sample in samples)
+        return model
+
+    def __repr__(self):
+        return (f'CostModel(margin={self.margin}, '
+                f'min_timeout={self.min_timeout}, '
+                f'history={self.history})')
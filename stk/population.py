@@ -9,13 +9,18 @@ from os.path import join
 import numpy as np
 import json
 from glob import iglob
-import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import psutil
 
-from .molecular import Molecule
-from .utilities import dedupe
+from .molecular import Molecule, CACHE_SETTINGS
+from .utilities import (dedupe,
+                        cache_stats,
+                        reset_cache_stats,
+                        merge_cache_stats)
 from .optimization.optimization import (_optimize_all_serial,
-                                        _optimize_all)
+                                        _optimize_all,
+                                        _optimize_all_async)
 
 
 class Population:
@@ -90,7 +95,8 @@ class Population:
                  building_blocks,
                  topologies,
                  processes=None,
-                 duplicates=False):
+                 duplicates=False,
+                 pool=None):
         """
         Creates all possible molecules from provided building blocks.
 
@@ -126,13 +132,19 @@ class Population:
             The topologies of macromolecules being made.
 
         processes : :class:`int`, optional
-            The number of parallel processes to create when building
-            the molecules.
+            The number of threads used to build the molecules. Builds
+            do not modify the building blocks or topologies they
+            share, so they can run at the same time.
 
         duplicates : :class:`bool`, optional
             If ``False``, duplicate structures are removed from
             the population.
 
+        pool : :class:`.WorkerPool`, optional
+            If provided, the molecules are built by its worker
+            processes instead of by threads and `processes` is
+            ignored.
+
         Returns
         -------
         :class:`Population`
@@ -145,8 +157,18 @@ class Population:
         for *bbs, topology in it.product(*building_blocks, topologies):
             args.append((bbs, topology))
 
-        with mp.Pool(processes) as pool:
-            mols = pool.starmap(macromol_class, args)
+        if pool is not None:
+            mols = []
+            for mol, stats in pool.map(partial(_build_and_report,
+                                               macromol_class),
+                                       args):
+                merge_cache_stats(stats)
+                mols.append(mol)
+        else:
+            with ThreadPoolExecutor(processes) as executor:
+                mols = list(executor.map(partial(_build,
+                                                 macromol_class),
+                                         args))
 
         # Update the cache.
         for i, mol in enumerate(mols):
@@ -705,7 +727,13 @@ class Population:
 
         return np.min([key(member) for member in self], axis=0)
 
-    def optimize(self, func_data, processes=psutil.cpu_count()):
+    def optimize(self,
+                 func_data,
+                 processes=psutil.cpu_count(),
+                 runner=None,
+                 pool=None,
+                 cost_model=None,
+                 checkpoint=None):
         """
         Optimizes the structures of molecules in the population.
 
@@ -716,6 +744,19 @@ class Population:
         In this case creating a parallel process pool creates
         unncessary overhead.
 
+        If a :class:`.MoleculeStore` is held by
+        :data:`.CACHE_SETTINGS`, molecules already optimized with
+        `func_data` are loaded from the store instead of being
+        optimized. Newly optimized molecules are written to the store.
+        If a :class:`.SharedMoleculeCache` is held by
+        :data:`.CACHE_SETTINGS`, the worker processes use it too.
+
+        If a :class:`.JobRunner` is given, the external programs used
+        by the optimization function are run concurrently from this
+        process, instead of creating a process for each one. This
+        requires a coroutine version of the optimization function,
+        such as :func:`.mopac_opt_async` for :func:`.mopac_opt`.
+
         Notes
         -----
         This function modifies the structures of molecules held by the
@@ -733,16 +774,57 @@ class Population:
             The number of parallel processes to create. Optimization
             will run serially if ``1``.
 
+        runner : :class:`.JobRunner`, optional
+            Runs the external programs of the optimization function.
+            If provided, `processes` is ignored.
+
+        pool : :class:`.WorkerPool`, optional
+            The worker processes used to optimize the molecules. Using
+            the same pool for many calls avoids starting new processes
+            each time. If provided, `processes` is ignored.
+
+        cost_model : :class:`.CostModel`, optional
+            Used to start the most expensive parallel optimizations
+            first and to set their timeouts. It learns from the
+            runtimes of the optimizations.
+
+        checkpoint : :class:`.OptimizationCheckpoint`, optional
+            Each optimized molecule is written to it as soon as it is
+            done. Molecules already held by it are restored instead
+            of being optimized, so that an interrupted call can be
+            resumed.
+
         Returns
         -------
         None : :class:`NoneType`
 
         """
 
-        if processes == 1:
-            _optimize_all_serial(func_data, self)
+        store = CACHE_SETTINGS['STORE'] if CACHE_SETTINGS['ON'] else None
+        stores = [x for x in (checkpoint, store) if x is not None]
+        for member in self:
+            for source in stores:
+                if (not member.optimized and
+                        source.update(member, func_data)):
+                    member.optimized = True
+
+        if runner is not None:
+            _optimize_all_async(func_data, self, runner, stores)
+        elif pool is not None:
+            _optimize_all(func_data,
+                          self,
+                          processes,
+                          stores,
+                          pool,
+                          cost_model)
+        elif processes == 1:
+            _optimize_all_serial(func_data, self, stores)
         else:
-            _optimize_all(func_data, self, processes)
+            _optimize_all(func_data,
+                          self,
+                          processes,
+                          stores,
+                          cost_model=cost_model)
 
     def remove_duplicates(self,
                           between_subpops=True,
@@ -1073,3 +1155,50 @@ class Population:
 
     def __repr__(self):
         return str(self)
+
+
+def _build(macromol_class, args):
+    """
+    Builds a macromolecule from its building blocks and topology.
+
+    Parameters
+    ----------
+    macromol_class : :class:`type`
+        The class of the :class:`.MacroMolecule` being built.
+
+    args : :class:`tuple`
+        The building blocks and topology of the macromolecule.
+
+    Returns
+    -------
+    :class:`.MacroMolecule`
+        The built macromolecule.
+
+    """
+
+    return macromol_class(*args)
+
+
+def _build_and_report(macromol_class, args):
+    """
+    Builds a macromolecule in a worker process.
+
+    Parameters
+    ----------
+    macromol_class : :class:`type`
+        The class of the :class:`.MacroMolecule` being built.
+
+    args : :class:`tuple`
+        The building blocks and topology of the macromolecule.
+
+    Returns
+    -------
+    :class:`tuple`
+        The built macromolecule and the :func:`.cache_stats` counted
+        by the worker during the build, so that the parent process
+        can add them to its own.
+
+    """
+
+    reset_cache_stats()
+    return _build(macromol_class, args), cache_stats()
@@ -0,0 +1,79 @@
+"""
+Tests functions which run many molecules in one MOPAC or MacroModel job.
+
+The jobs are run by stand-ins of MOPAC and MacroModel, found in
+``data/batch``, which mimic the formats of their input and output
+files.
+
+"""
+
+import os
+import copy
+from os.path import join, abspath
+import numpy as np
+
+from .. import (StructUnit2,
+                mopac_energies,
+                macromodel_energies,
+                mopac_batch_opt,
+                macromodel_batch_opt)
+from ..utilities import FunctionData
+
+mopac_path = abspath(join('data', 'batch', 'mopac'))
+mm_path = abspath(join('data', 'batch', 'schrodinger'))
+outdir = 'batch_tests_output'
+if not os.path.exists(outdir):
+    os.mkdir(outdir)
+
+
+def molecules():
+    return [
+        copy.deepcopy(StructUnit2.smiles_init('NCCCCCCN', 'amine')),
+        copy.deepcopy(StructUnit2.smiles_init('O=CCCC=O', 'aldehyde')),
+        copy.deepcopy(StructUnit2.smiles_init('NCCN', 'amine'))
+    ]
+
+
+def test_mopac_batch():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    try:
+        mols = molecules()
+        energies = mopac_energies(mols, mopac_path)
+        assert energies == [-1.5*mol.mol.GetNumAtoms() for mol in mols]
+        for mol, energy in zip(mols, energies):
+            key = FunctionData('mopac', settings=None)
+            assert mol.energy.values == {key: energy}
+
+        positions = [mol.position_matrix() for mol in mols]
+        mopac_batch_opt(mols, mopac_path)
+        for mol, position in zip(mols, positions):
+            shifted = position + np.array([[1], [0], [0]])
+            assert np.allclose(mol.position_matrix(), shifted)
+
+    finally:
+        os.chdir(cwd)
+
+
+def test_macromodel_batch():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    try:
+        mols = molecules()
+        files = set(os.listdir())
+        energies = macromodel_energies(mols, 16, mm_path)
+        assert energies == [mol.mol.GetNumAtoms() for mol in mols]
+        # The files of the job are removed.
+        assert set(os.listdir()) == files
+        for mol, energy in zip(mols, energies):
+            key = FunctionData('macromodel', forcefield=16, conformer=-1)
+            assert mol.energy.values == {key: energy}
+
+        positions = [mol.position_matrix() for mol in mols]
+        macromodel_batch_opt(mols, mm_path)
+        for mol, position in zip(mols, positions):
+            shifted = position + np.array([[1], [0], [0]])
+            assert np.allclose(mol.position_matrix(), shifted, atol=1e-3)
+
+    finally:
+        os.chdir(cwd)
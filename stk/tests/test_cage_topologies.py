@@ -3,6 +3,7 @@ from ..molecular import StructUnit3, StructUnit2, Cage, CACHE_SETTINGS
 import os
 from os.path import join
 from functools import wraps
+import numpy as np
 
 
 test_dir = 'cage_topology_tests'
@@ -136,6 +137,105 @@ def test_FourPlusSix():
     c.write(join(test_dir, 'FourPlusSix.mol'))
 
 
+def test_pair_fgs():
+    CACHE_SETTINGS['ON'] = False
+    try:
+        bb1 = StructUnit2(join(data_dir, 'amine2.mol'))
+        bb2 = StructUnit3(join(data_dir, 'aldehyde3.mol'))
+        top = FourPlusSix()
+        c = Cage([bb1, bb2], top)
+        assert c.bonds_made == 12
+        # Building must not leave state on the class level vertices.
+        assert all(not position.fg_ids for position in top.positions_A)
+
+        context = top.build_context()
+        context.place_mols(c)
+        # Each fg must be paired with a different position.
+        for position in context.positions_A:
+            fgs, positions = zip(*position.fg_position_pairs)
+            assert sorted(fgs) == sorted(position.fg_ids)
+            assert len(set(positions)) == len(positions)
+    finally:
+        CACHE_SETTINGS['ON'] = True
+
+
+def test_symmetry_ops():
+    for topology, n in ((FourPlusSix, 12),
+                        (EightPlusTwelve, 24),
+                        (Dodecahedron, 60)):
+        ops = topology.symmetry_ops
+        assert len(ops) == n
+        coords = np.array([v.coord for v in topology.positions_A])
+        for op in ops:
+            assert np.allclose(op @ op.T, np.identity(3))
+            assert np.isclose(np.linalg.det(op), 1)
+            # Every vertex must be mapped onto a vertex.
+            rotated = coords @ op.T
+            distances = np.linalg.norm(
+                                rotated[:, None] - coords[None], axis=2)
+            assert np.allclose(distances.min(axis=1), 0)
+
+
+def test_unit_geometry():
+    for vertex in FourPlusSix.positions_A:
+        coords = np.array([edge.coord for edge in vertex.connected])
+        assert np.allclose(vertex.edge_centroid(2), 2*coords.mean(axis=0))
+        assert np.allclose(vertex.edge_coord_matrix(2), 2*coords)
+        normal = vertex.edge_plane_normal(2)
+        # The normal points away from the origin.
+        assert normal @ vertex.coord > 0
+        for direction in vertex.edge_direction_vectors(2):
+            assert np.isclose(normal @ direction, 0, atol=1e-3)
+
+    # Making topologies must not change the class level vertices.
+    connected = [len(v.connected) for v in FourPlusFour.positions_A]
+    FourPlusFour()
+    FourPlusFour()
+    assert connected == [len(v.connected) for
+                         v in FourPlusFour.positions_A] == [3]*8
+
+
+def test_symmetric_placement():
+    CACHE_SETTINGS['ON'] = False
+    ops = FourPlusSix.symmetry_ops
+    try:
+        bb1 = StructUnit2(join(data_dir, 'amine2.mol'))
+        bb2 = StructUnit3(join(data_dir, 'aldehyde3.mol'))
+        c1 = Cage([bb1, bb2], FourPlusSix())
+        FourPlusSix.symmetry_ops = None
+        c2 = Cage([bb1, bb2], FourPlusSix())
+
+        assert c1.bonds_made == c2.bonds_made == 12
+        assert c1.mol.GetNumAtoms() == c2.mol.GetNumAtoms()
+        assert c1.bb_counter == c2.bb_counter
+    finally:
+        FourPlusSix.symmetry_ops = ops
+        CACHE_SETTINGS['ON'] = True
+
+
+def test_symmetric_coordinates():
+    # Sites generated by symmetry lie close to where the orientation
+    # procedure places them. A wrong rotation moves atoms by many A.
+    CACHE_SETTINGS['ON'] = False
+    try:
+        bb1 = StructUnit2(join(data_dir, 'amine2.mol'))
+        bb2 = StructUnit3(join(data_dir, 'aldehyde3.mol'))
+        for topology in (FourPlusSix, EightPlusTwelve, Dodecahedron):
+            ops = topology.symmetry_ops
+            try:
+                c1 = Cage([bb1, bb2], topology())
+                topology.symmetry_ops = None
+                c2 = Cage([bb1, bb2], topology())
+            finally:
+                topology.symmetry_ops = ops
+
+            deviations = np.linalg.norm(
+                    c1.position_matrix() - c2.position_matrix(), axis=0)
+            assert deviations.max() < 0.5
+    finally:
+        CACHE_SETTINGS['ON'] = True
+
+
 @protect_cache
 def test_multiFourPlusSix():
     bb1 = StructUnit2(join(data_dir, 'amine2.mol'))
@@ -67,3 +67,30 @@ def test_nolinkerhoneycomb():
     cof.write(path)
     island = cof.island([3, 3, 1])
     rdkit.MolToMolFile(island, path.replace('.sdf', '_island.sdf'))
+
+
+def test_fg_maps():
+    bb2 = StructUnit3(join('data', 'cof', 'aldehyde6f.mol'))
+    top = Hexagonal()
+    cof = Periodic([bb1, bb2], top)
+    assert not hasattr(top.vertices[0], 'fg_map')
+    assert cof.bonds_made == 17
+    assert len(cof.periodic_bonds) == 7
+    assert cof.bb_counter[bb2] == 4
+    assert cof.bb_counter[bb1] == 12
+
+    # Reassemble the unit cell with a separate context, so that its
+    # fg maps can be inspected.
+    top = top.build_context()
+    top.place_mols(cof)
+
+    vertex_fgs = [fg for v in top.vertices for fg in v.fg_map.values()]
+    edge_fgs = [fg for e in top.edges for fg in e.fg_map.values()]
+    assert len(set(vertex_fgs)) == 6*len(top.vertices)
+    assert set(edge_fgs).isdisjoint(vertex_fgs)
+    assert len(set(edge_fgs)) == 2*len(top.edges)
+
+    # Every fg on a vertex is joined to exactly one edge.
+    joined = [e.v1.fg_map[e.joint_positions[0]] for e in top.edges]
+    joined += [e.v2.fg_map[e.joint_positions[1]] for e in top.edges]
+    assert sorted(joined) == sorted(vertex_fgs)
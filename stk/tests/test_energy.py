@@ -1,7 +1,10 @@
 from os.path import join
+import pickle
+import copy
+import rdkit.Chem.AllChem as rdkit
 from ..population import Population
 from ..utilities import FunctionData
-from ..molecular import Molecule
+from ..molecular import Molecule, func_key, Energy, StructUnit2
 import numpy as np
 
 
@@ -34,3 +37,68 @@ def test_pseudoformation():
 
 def test_logging():
     assert len(mol.energy.values) != 0
+
+
+def test_function_data_hash():
+    func1 = FunctionData('formation',
+                         func=FunctionData('rdkit', forcefield='uff'),
+                         products=[('H2O', 2)],
+                         weights={'a': 1, 'b': [1, 2]})
+    func2 = FunctionData('formation',
+                         weights={'b': [1, 2], 'a': 1},
+                         products=[('H2O', 2)],
+                         func=FunctionData('rdkit', forcefield='uff'))
+    func3 = FunctionData('formation',
+                         func=FunctionData('rdkit', forcefield='mmff'),
+                         products=[('H2O', 2)],
+                         weights={'a': 1, 'b': [1, 2]})
+
+    assert func1 == func2 and hash(func1) == hash(func2)
+    assert func1 != func3 and hash(func1) != hash(func3)
+
+    values = {func1: 1, func3: 3}
+    assert values[func2] == 1
+    assert values[pickle.loads(pickle.dumps(func3))] == 3
+
+    # Parameters which compare equal without being the same object
+    # must give the same hash.
+    func4 = FunctionData('pseudoformation', building_blocks=[mol])
+    func5 = FunctionData('pseudoformation',
+                         building_blocks=[pickle.loads(pickle.dumps(mol))])
+    assert func4 == func5 and hash(func4) == hash(func5)
+    assert hash(FunctionData('a', x=np.zeros(3)))
+
+
+def test_func_key():
+    energy = mol.energy
+    # Bound methods are made once per Energy instance.
+    assert energy.rdkit is energy.rdkit
+    assert pickle.loads(pickle.dumps(energy)).values == energy.values
+
+    key = FunctionData('rdkit', forcefield='uff', conformer=-1)
+    assert func_key(Energy.rdkit, (energy, 'uff')) == key
+    assert func_key(Energy.rdkit, (energy, ), {'forcefield': 'uff'}) == key
+    assert func_key(Energy.rdkit, None, {'forcefield': 'uff'}) == key
+
+    # Excluded parameters are not part of the key.
+    key = FunctionData('macromodel', forcefield=16, conformer=-1)
+    assert func_key(Energy.macromodel, (energy, 16, 'path')) == key
+
+
+def test_rdkit_conformers():
+    bb = copy.deepcopy(StructUnit2.smiles_init('NCCCCCN', 'amine'))
+    conformers = list(rdkit.EmbedMultipleConfs(bb.mol, 4, randomSeed=4))
+
+    energies = bb.energy.rdkit_conformers('uff')
+    assert len(energies) == 4
+    for conformer, energy in zip(conformers, energies):
+        key = FunctionData('rdkit', forcefield='uff', conformer=conformer)
+        assert bb.energy.values[key] == energy
+        assert np.isclose(bb.energy.rdkit('uff', conformer), energy)
+
+    mmff = bb.energy.rdkit_conformers('mmff', conformers[1:])
+    assert len(mmff) == 3
+    optimized = bb.energy.rdkit_conformers('mmff',
+                                           conformers[1:],
+                                           optimize=True)
+    assert np.all(optimized < mmff)
@@ -0,0 +1,295 @@
+"""
+Tests the running of external programs by :class:`.JobRunner` and
+:class:`.LicensePool`.
+
+MOPAC and MacroModel are replaced by the stand-ins found in
+``data/batch``.
+
+"""
+
+import os
+import sys
+import time
+import copy
+import asyncio
+import multiprocessing as mp
+from threading import Thread
+from glob import glob
+import pytest
+import psutil
+from os.path import join, abspath
+import numpy as np
+
+from .. import (JobRunner,
+                LicensePool,
+                CACHE_SETTINGS,
+                StructUnit2,
+                Population,
+                EnergyError,
+                run_energies,
+                mopac_properties)
+from ..utilities import FunctionData
+
+mopac_path = abspath(join('data', 'batch', 'mopac'))
+mm_path = abspath(join('data', 'batch', 'schrodinger'))
+outdir = 'jobs_tests_output'
+if not os.path.exists(outdir):
+    os.mkdir(outdir)
+
+
+def sleep(seconds):
+    return [sys.executable, '-c', f'import time; time.sleep({seconds})']
+
+
+def test_job_runner():
+    runner = JobRunner(max_jobs=2, grace=0.2)
+    start = time.time()
+    results = runner.run_all(runner.run(sleep(0.5)) for i in range(4))
+    assert 1 <= time.time() - start < 1.9
+    assert [result.returncode for result in results] == [0, 0, 0, 0]
+
+    # Programs which run out of time are asked to stop and then
+    # killed.
+    stopped = []
+    start = time.time()
+    result, = runner.run_all([
+        runner.run(sleep(30),
+                   timeout=0.2,
+                   stop=lambda: stopped.append(True))
+    ])
+    assert time.time() - start < 5
+    assert stopped == [True]
+    assert result.returncode != 0
+    assert runner.timeouts == 1
+
+    # Cancelled programs are killed.
+    async def cancel():
+        task = asyncio.ensure_future(runner.run(sleep(30)))
+        await asyncio.sleep(0.5)
+        children = [child for child in psutil.Process().children() if
+                    'time.sleep(30)' in ' '.join(child.cmdline())]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return children
+
+    children = asyncio.run(cancel())
+    assert len(children) == 1
+    gone, alive = psutil.wait_procs(children, timeout=1)
+    assert not alive
+
+    # Coroutines can also be run from inside an event loop.
+    async def nested():
+        inner = runner.run_all([runner.run(sleep(0))])
+        awaited = await runner.gather([runner.run(sleep(0))])
+        return inner + awaited
+
+    assert [r.returncode for r in asyncio.run(nested())] == [0, 0]
+
+
+def test_mopac_jobs():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    try:
+        mols = [
+            copy.deepcopy(StructUnit2.smiles_init(smiles, fg))
+            for smiles, fg in (('NCCCCCCN', 'amine'),
+                               ('O=CCCC=O', 'aldehyde'),
+                               ('NCCN', 'amine'))
+        ]
+        positions = [mol.position_matrix() for mol in mols]
+        runner = JobRunner(max_jobs=2)
+
+        Population(*mols).optimize(
+            FunctionData('mopac_opt', mopac_path=mopac_path),
+            runner=runner)
+        for mol, position in zip(mols, positions):
+            shifted = position + np.array([[1], [0], [0]])
+            assert mol.optimized
+            assert np.allclose(mol.position_matrix(), shifted, atol=1e-3)
+
+        energies = run_energies(
+                        mols,
+                        FunctionData('mopac', mopac_path=mopac_path),
+                        runner)
+        dipoles = run_energies(
+                        mols,
+                        FunctionData('mopac_dipole', mopac_path=mopac_path),
+                        runner)
+        for mol, energy, dipole in zip(mols, energies, dipoles):
+            n = mol.mol.GetNumAtoms()
+            assert np.isclose(energy, -1.5*n)
+            assert np.isclose(dipole, 0.1*n)
+            assert mol.energy.values == {
+                FunctionData('mopac', settings=None): energy,
+                FunctionData('mopac_dipole', settings=None): dipole
+            }
+
+        with pytest.raises(EnergyError):
+            run_energies(mols, FunctionData('rdkit', forcefield='uff'), runner)
+
+    finally:
+        os.chdir(cwd)
+
+
+def test_macromodel_jobs():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    settings = dict(CACHE_SETTINGS)
+    try:
+        mols = [
+            copy.deepcopy(StructUnit2.smiles_init(smiles, fg))
+            for smiles, fg in (('NCCCCCCN', 'amine'),
+                               ('NCCN', 'amine'))
+        ]
+        positions = [mol.position_matrix() for mol in mols]
+        runner = JobRunner(max_jobs=2)
+
+        with LicensePool(1, poll=0.05) as licenses:
+            licenses.install()
+            Population(*mols).optimize(
+                FunctionData('macromodel_opt',
+                             macromodel_path=mm_path,
+                             settings={'restricted': False}),
+                runner=runner)
+            energies = run_energies(
+                            mols,
+                            FunctionData('macromodel',
+                                         forcefield=16,
+                                         macromodel_path=mm_path),
+                            runner)
+            assert licenses.counts() == (1, 0, 0)
+
+        for mol, position in zip(mols, positions):
+            shifted = position + np.array([[1], [0], [0]])
+            assert mol.optimized
+            assert np.allclose(mol.position_matrix(), shifted, atol=1e-3)
+
+        for mol, energy in zip(mols, energies):
+            assert energy == mol.mol.GetNumAtoms()
+            assert mol.energy.values == {
+                FunctionData('macromodel', forcefield=16, conformer=-1):
+                energy
+            }
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+        os.chdir(cwd)
+
+
+def test_mopac_properties():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    try:
+        mols = [
+            copy.deepcopy(StructUnit2.smiles_init(smiles, 'amine'))
+            for smiles in ('NCCCCCCN', 'NCCN')
+        ]
+        runner = JobRunner(max_jobs=6)
+
+        # A neutral, cationic and anionic run for each molecule.
+        runs = len(glob('*.arc'))
+        results = mopac_properties(mols, mopac_path, runner=runner)
+        assert len(glob('*.arc')) - runs == 6
+
+        settings = {'settings': None}
+        for mol, result in zip(mols, results):
+            n = mol.mol.GetNumAtoms()
+            expected = {'energy': -1.5*n,
+                        'dipole': 0.1*n,
+                        'ip': 4,
+                        'ea': -4}
+            assert result.keys() == expected.keys()
+            assert all(np.isclose(result[x], expected[x]) for
+                       x in expected)
+            assert mol.energy.values == {
+                FunctionData('mopac', **settings): result['energy'],
+                FunctionData('mopac_dipole', **settings): result['dipole'],
+                FunctionData('mopac_ip', **settings): result['ip'],
+                FunctionData('mopac_ea', **settings): result['ea']
+            }
+
+        # Known properties are not calculated again.
+        runs = len(glob('*.arc'))
+        assert mopac_properties(mols, mopac_path, ['ip']) == [
+            {'ip': result['ip']} for result in results
+        ]
+        assert len(glob('*.arc')) == runs
+
+        mol = copy.deepcopy(StructUnit2.smiles_init('NCCN', 'amine'))
+        assert np.isclose(mol.energy.mopac_ea(mopac_path), -4)
+        assert len(glob('*.arc')) - runs == 2
+
+    finally:
+        os.chdir(cwd)
+
+
+def hold_license(seconds):
+    with CACHE_SETTINGS['LICENSES'].token():
+        start = time.time()
+        time.sleep(seconds)
+        return start, time.time()
+
+
+def die_holding_license(licenses):
+    token = licenses.token()
+    token.__enter__()
+    os._exit(0)
+
+
+def test_license_pool():
+    settings = dict(CACHE_SETTINGS)
+    try:
+        with LicensePool(2, poll=0.1) as licenses:
+            licenses.install()
+            context = mp.get_context('spawn')
+            with context.Pool(4, licenses.install) as pool:
+                spans = pool.map(hold_license, [0.3]*4)
+
+            # No more jobs run at once than there are tokens.
+            for start, _ in spans:
+                assert sum(s <= start < e for s, e in spans) <= 2
+            assert licenses.counts() == (2, 0, 0)
+
+            # Tokens held by processes which died are given back.
+            process = context.Process(target=die_holding_license,
+                                      args=(licenses, ))
+            process.start()
+            process.join()
+            assert licenses.counts()[1] == 1
+            with licenses.token(), licenses.token():
+                assert licenses.counts() == (0, 2, 0)
+            assert licenses.counts() == (2, 0, 0)
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+
+
+def test_macromodel_licenses():
+    cwd = os.getcwd()
+    os.chdir(outdir)
+    settings = dict(CACHE_SETTINGS)
+    try:
+        with LicensePool(1, poll=0.05) as licenses:
+            licenses.install()
+            mol = copy.deepcopy(StructUnit2.smiles_init('NCCN', 'amine'))
+
+            # MacroModel energies wait for a free token.
+            with licenses.token():
+                thread = Thread(target=mol.energy.macromodel,
+                                args=(16, mm_path))
+                thread.start()
+                thread.join(0.5)
+                assert thread.is_alive()
+            thread.join()
+
+            key = FunctionData('macromodel', forcefield=16, conformer=-1)
+            assert mol.energy.values[key] == mol.mol.GetNumAtoms()
+            assert licenses.counts() == (1, 0, 0)
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+        os.chdir(cwd)
@@ -1,6 +1,8 @@
 import os
+import rdkit.Chem.AllChem as rdkit
 
 from ..molecular import StructUnit2, Polymer, Linear
+from ..molecular.functional_groups import _remove_atoms
 
 if not os.path.exists('linear_topology_tests'):
     os.mkdir('linear_topology_tests')
@@ -20,3 +22,30 @@ def test_assembly():
     p1.write(path)
     p2.write(path.replace('1', '2'))
     p3.write(path.replace('1', '3'))
+
+
+def test_long_chain():
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)nc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=CC1=CN=C(C=O)C1', 'aldehyde')
+
+    p = Polymer([bb1, bb2], Linear('AB', [0.5, 0.5], 50))
+    assert p.bonds_made == 99
+
+    # The fg ids must increase along the x-axis.
+    x_coords = p.fg_centroids(range(200))[:, 0]
+    assert all(x2 > x1 for x1, x2 in zip(x_coords, x_coords[1:]))
+
+
+def test_remove_atoms():
+    mol = rdkit.MolFromSmiles('C/C=C/CO')
+    rdkit.Compute2DCoords(mol)
+    mol.SetProp('name', 'butenol')
+
+    # Bond stereochemistry, properties and the positions of the kept
+    # atoms are not lost.
+    removed = _remove_atoms(mol, {4})
+    assert rdkit.MolToSmiles(removed) == 'C/C=C/C'
+    assert removed.GetProp('name') == 'butenol'
+    positions = mol.GetConformer().GetPositions()
+    assert (removed.GetConformer().GetPositions() ==
+            positions[:4]).all()
@@ -1,7 +1,11 @@
 import os
+import json
+import numpy as np
 
 from ..molecular import (StructUnit2, MacroMolecule, Polymer, Linear,
-                         Molecule, CACHE_SETTINGS)
+                         Molecule, CACHE_SETTINGS, MoleculeCache)
+from ..utilities import (cache_stats, reset_cache_stats,
+                         merge_cache_stats, dump_cache_stats)
 
 if not os.path.exists('macromolecule_tests_output'):
     os.mkdir('macromolecule_tests_output')
@@ -28,6 +32,14 @@ def test_bb_distortion():
     assert isinstance(mol.bb_distortion(), float)
 
 
+def test_fg_centroids():
+    fg_ids = [2, 0, 1]
+    centroids = mol.fg_centroids(fg_ids)
+    assert centroids.shape == (3, 3)
+    for fg_id, centroid in zip(fg_ids, centroids):
+        assert np.allclose(centroid, mol.fg_centroid(fg_id), atol=1e-8)
+
+
 def test_comparison():
     """
     Checks ``==``, ``>``, ``>=``, etc. operators.
@@ -58,6 +70,98 @@ def test_caching():
     mol3 = Polymer([bb1, bb2], Linear('AB', [1, 0.5], 3))
     assert mol is not mol3
 
+    mol4 = Polymer(topology=Linear('AB', [0.5, 0.5], 3),
+                   building_blocks=[bb1, bb2])
+    assert mol is mol4
+
+
+class _Member:
+    def __init__(self, fitness):
+        self.fitness = fitness
+
+
+def test_bounded_cache():
+    settings = dict(CACHE_SETTINGS)
+    try:
+        CACHE_SETTINGS['MAX_ENTRIES'] = 3
+        cache = MoleculeCache()
+        for i in range(3):
+            cache[i] = _Member(i)
+        # Touch the oldest entry, so that 1 becomes least recently
+        # used.
+        cache[0]
+        cache[3] = _Member(3)
+        assert list(cache) == [2, 0, 3]
+
+        CACHE_SETTINGS['EVICTION'] = 'least-fit'
+        cache[4] = _Member(-1)
+        assert set(cache) == {2, 3, 4}
+        cache[5] = _Member(10)
+        assert set(cache) == {2, 3, 5}
+
+        # Fitness values are checked again before an entry is
+        # evicted.
+        cache[7] = _Member(20)
+        assert set(cache) == {3, 5, 7}
+        cache.entries[3][0]().fitness = 50
+        cache[8] = _Member(30)
+        assert set(cache) == {3, 7, 8}
+
+        CACHE_SETTINGS['MAX_ENTRIES'] = None
+        CACHE_SETTINGS['MAX_BYTES'] = 1
+        cache[6] = mol
+        assert list(cache) == [6]
+        assert cache.nbytes == len(mol.mol.ToBinary())
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+
+
+def test_weakref_cache():
+    settings = dict(CACHE_SETTINGS)
+    try:
+        CACHE_SETTINGS['WEAKREF'] = True
+        cache = MoleculeCache()
+        members = [_Member(i) for i in range(3)]
+        for i, member in enumerate(members):
+            cache[i] = member
+        assert len(cache) == 3
+
+        del members[0]
+        assert len(cache) == 2
+        assert 0 not in cache
+        assert cache.get(1) is members[0]
+        assert list(cache) == [2, 1]
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+
+
+def test_cache_stats():
+    reset_cache_stats()
+    topology = Linear('AB', [0, 1], 2)
+    Polymer.cache.pop(Polymer.gen_key([bb1, bb2], topology), None)
+    polymer = Polymer([bb1, bb2], topology)
+    assert Polymer([bb2, bb1], topology) is polymer
+
+    stats = cache_stats()['Polymer']
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['topologies']['Linear']['builds'] == 1
+    assert sum(stats['topologies']['Linear']['histogram'].values()) == 1
+    assert stats['build_time'] > 0
+
+    path = os.path.join('macromolecule_tests_output', 'cache_stats.json')
+    dump_cache_stats(path)
+    with open(path, 'r') as f:
+        merge_cache_stats(json.load(f))
+
+    stats = cache_stats()['Polymer']
+    assert stats['hits'] == 2
+    assert stats['topologies']['Linear']['builds'] == 2
+
 
 def test_json_init():
     try:
@@ -3,9 +3,18 @@ from collections import Counter
 import numpy as np
 from types import SimpleNamespace
 import os
+import pickle
+from multiprocessing.reduction import ForkingPickler
 
-from ..molecular import Cage, MacroMolecule, Molecule, CACHE_SETTINGS
+from os.path import join
+from ..molecular import (Cage, MacroMolecule, Molecule, CACHE_SETTINGS,
+                         StructUnit2, StructUnit3, FourPlusSix,
+                         Polymer, Linear, pool_energies)
 from ..population import Population
+from ..utilities import (FunctionData,
+                         WorkerPool,
+                         cache_stats,
+                         reset_cache_stats)
 
 
 class Mol:
@@ -68,6 +77,124 @@ def test_init():
                Population())
 
 
+def test_init_all():
+    data_dir = join('data', 'cage_topologies')
+    amines = [StructUnit2(join(data_dir, 'amine2.mol')),
+              StructUnit2(join(data_dir, 'amine2_1.mol'))]
+    aldehydes = [StructUnit3(join(data_dir, 'aldehyde3.mol')),
+                 StructUnit3(join(data_dir, 'aldehyde3_1.mol'))]
+    bbs = amines + aldehydes
+    positions = [bb.position_matrix() for bb in bbs]
+
+    try:
+        CACHE_SETTINGS['ON'] = False
+        pop = Population.init_all(Cage,
+                                  [amines, aldehydes],
+                                  [FourPlusSix()],
+                                  processes=4,
+                                  duplicates=True)
+    finally:
+        CACHE_SETTINGS['ON'] = True
+
+    assert len(pop) == 4
+    for cage in pop:
+        assert cage.bonds_made == 12
+        assert sum(cage.bb_counter.values()) == 10
+        assert set(cage.bb_counter) == set(cage.building_blocks)
+
+    # Building must not modify the building blocks.
+    for bb, position in zip(bbs, positions):
+        assert bb.mol.GetNumConformers() == 1
+        assert np.allclose(bb.position_matrix(), position)
+
+
+def worker_pid(_):
+    return os.getpid()
+
+
+def test_worker_pool():
+    data_dir = join('data', 'cage_topologies')
+    amines = [StructUnit2(join(data_dir, 'amine2.mol')),
+              StructUnit2(join(data_dir, 'amine2_1.mol'))]
+    aldehydes = [StructUnit3(join(data_dir, 'aldehyde3.mol'))]
+
+    with WorkerPool(2) as pool:
+        pids = set(pool.map(worker_pid, range(8)))
+        reset_cache_stats()
+        pop = Population.init_all(Cage,
+                                  [amines, aldehydes],
+                                  [FourPlusSix()],
+                                  pool=pool)
+        assert len(pop) == 2
+
+        # The builds counted by the workers are added to the counts
+        # of this process.
+        stats = cache_stats()['Cage']
+        assert stats['misses'] == 2
+        assert stats['topologies']['FourPlusSix']['builds'] == 2
+        assert all(cage.bonds_made == 12 for cage in pop)
+        assert all(Cage.cache[cage.key] is cage for cage in pop)
+
+        # Members which are already optimized are not sent to the
+        # workers, the others are replaced by the optimized versions.
+        skipped, optimized = pop
+        skipped.optimized = True
+        skipped_state = vars(skipped)
+        pop.optimize(FunctionData('do_not_optimize'), pool=pool)
+        assert all(cage.optimized for cage in pop)
+        assert vars(skipped) is skipped_state
+        assert Cage.cache[optimized.key] is optimized
+
+        func_data = FunctionData('rdkit', forcefield='uff')
+        energies = pool_energies(list(pop), func_data, pool)
+        key = FunctionData('rdkit', forcefield='uff', conformer=-1)
+        for cage, energy in zip(pop, energies):
+            assert cage.energy.values[key] == energy
+
+        # No new workers were started by any of the calls.
+        pids.update(pool.map(worker_pid, range(8)))
+        assert len(pids) <= 2
+
+
+def test_worker_transfer():
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], 3))
+
+    with WorkerPool(1) as pool:
+        # Building blocks are sent by reference and resolve to the
+        # same instances when sent back.
+        blob = ForkingPickler.dumps(polymer)
+        assert len(blob) < len(pickle.dumps(polymer))
+        copy = ForkingPickler.loads(blob)
+        assert all(a is b for a, b in
+                   zip(copy.building_blocks, polymer.building_blocks))
+        assert copy.atom_props == polymer.atom_props
+        assert copy.bonder_ids == polymer.bonder_ids
+
+        # Only the changes made by the optimization are sent back.
+        before = polymer.position_matrix()
+        Population(polymer).optimize(FunctionData('rdkit_optimization'),
+                                     pool=pool)
+        assert polymer.optimized
+        assert not np.allclose(polymer.position_matrix(), before)
+
+
+def test_default_processes():
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], 1))
+    polymer.optimized = False
+
+    # As with multiprocessing, a number of None starts one worker
+    # per CPU.
+    Population(polymer).optimize(FunctionData('do_not_optimize'),
+                                 processes=None)
+    assert polymer.optimized
+    with WorkerPool(None) as pool:
+        assert pool.processes == os.cpu_count()
+
+
 def test_add_members_duplicates():
     """
     Members in population added to `members` of the other.
@@ -0,0 +1,73 @@
+import os
+
+from ..molecular import StructUnit2, Polymer, Linear
+from ..optimization import CostModel
+from ..optimization.optimization import _timed_func, mopac_opt
+from ..population import Population
+from ..utilities import FunctionData, WorkerPool
+
+if not os.path.exists('scheduling_tests_output'):
+    os.mkdir('scheduling_tests_output')
+
+
+def polymers(*lengths):
+    Polymer.cache.clear()
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    return [Polymer([bb1, bb2], Linear('AB', [0, 0], n)) for
+            n in lengths]
+
+
+def test_cost_model():
+    small, large = polymers(1, 3)
+    func_data = FunctionData('mopac_opt', mopac_path='mopac')
+    model = CostModel(margin=2, min_timeout=1)
+
+    # Without any runtimes, molecules are ordered by size.
+    first, second = model.order(func_data, [small, large])
+    assert first is large and second is small
+    assert model.estimate(func_data, small) is None
+    assert model.timeout(func_data, small) is None
+
+    model.record(func_data, small, CostModel.size(small))
+    assert model.estimate(func_data, large) == CostModel.size(large)
+    assert model.timeout(func_data, large) == 2*CostModel.size(large)
+
+    # Runtimes of other topologies are used when there are none for
+    # the topology of the molecule.
+    model.runtimes[('mopac_opt', 'FourPlusSix')].append((1, 100))
+    assert model.estimate(func_data, small) == CostModel.size(small)
+
+    path = os.path.join('scheduling_tests_output', 'model.json')
+    model.dump(path)
+    loaded = CostModel.load(path)
+    assert loaded.runtimes == model.runtimes
+    assert loaded.margin == 2
+
+    # The timeout replaces the one given in the settings.
+    func = _timed_func(mopac_opt,
+                       FunctionData('mopac_opt',
+                                    mopac_path='mopac',
+                                    settings={'timeout': 10,
+                                              'gradient': 0.1}),
+                       123)
+    assert func.__wrapped__.keywords['settings'] == {'timeout': 123,
+                                                     'gradient': 0.1}
+
+
+def test_scheduled_optimization():
+    mols = polymers(1, 2, 3)
+    model = CostModel()
+    func_data = FunctionData('do_not_optimize')
+
+    # With a single worker, molecules are optimized in the order in
+    # which they are sent.
+    with WorkerPool(1) as pool:
+        Population(*mols).optimize(func_data,
+                                   pool=pool,
+                                   cost_model=model)
+
+    assert all(mol.optimized for mol in mols)
+    sizes = [size for size, _ in model.runtimes[('do_not_optimize',
+                                                 'Linear')]]
+    assert sizes == sorted(map(CostModel.size, mols), reverse=True)
@@ -0,0 +1,260 @@
+import os
+import pickle
+import multiprocessing as mp
+import numpy as np
+
+from ..molecular import (StructUnit2, Polymer, Linear, CACHE_SETTINGS,
+                         MoleculeStore, SharedMoleculeCache,
+                         PropertyStore, SharedEnergyMemo,
+                         OptimizationCheckpoint)
+from ..population import Population
+from ..utilities import FunctionData, cache_stats, reset_cache_stats
+
+if not os.path.exists('store_tests_output'):
+    os.mkdir('store_tests_output')
+
+
+def new_store(name):
+    path = os.path.join('store_tests_output', name)
+    if os.path.exists(path):
+        os.remove(path)
+    return MoleculeStore(path)
+
+
+def test_store():
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    topology = Linear('AB', [0, 0], 2)
+
+    store = new_store('molecules.db')
+    settings = dict(CACHE_SETTINGS)
+    try:
+        CACHE_SETTINGS['STORE'] = store
+        Polymer.cache.clear()
+        polymer = Polymer([bb1, bb2], topology)
+        assert store.load(Polymer, polymer.key, [bb1, bb2], topology)
+
+        # Once evicted from the in-memory cache, the molecule is
+        # loaded from the store rather than built again.
+        Polymer.cache.clear()
+        loaded = Polymer([bb2, bb1], Linear('AB', [0, 0], 2))
+        assert loaded is not polymer
+        assert loaded.key == polymer.key
+        assert loaded.bonds_made == polymer.bonds_made
+        assert loaded.bonder_ids == polymer.bonder_ids
+        assert loaded.bb_counter == polymer.bb_counter
+        assert loaded.energy.molecule is loaded
+        assert np.allclose(loaded.position_matrix(),
+                           polymer.position_matrix())
+
+        # Optimized structures are stored separately for each
+        # optimization function.
+        func_data = FunctionData('do_not_optimize')
+        Population(loaded).optimize(func_data, processes=1)
+        assert loaded.optimized
+        assert not store.update(loaded, FunctionData('raiser',
+                                                     param1=1))
+
+        Polymer.cache.clear()
+        fresh = Polymer([bb1, bb2], topology)
+        assert not fresh.optimized
+        fresh.mol = fresh.shift(np.array([10, 0, 0]))
+        Population(fresh).optimize(func_data, processes=1)
+        assert fresh.optimized
+        assert np.allclose(fresh.position_matrix(),
+                           polymer.position_matrix())
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+        store.close()
+
+
+def build_polymer(n):
+    reset_cache_stats()
+    Polymer.cache.clear()
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], n))
+    stats = cache_stats()['Polymer']
+    return polymer.bonds_made, stats['topologies'], stats['shared_loads']
+
+
+def test_shared_cache():
+    settings = dict(CACHE_SETTINGS)
+    try:
+        with SharedMoleculeCache() as shared:
+            shared.install()
+            assert CACHE_SETTINGS['SHARED'] is shared
+            bonds_made, _, shared_loads = build_polymer(3)
+            assert shared_loads == 0
+            assert build_polymer(3) == (bonds_made, {}, 1)
+
+            context = mp.get_context('spawn')
+            with context.Pool(2, shared.install) as pool:
+                results = pool.map(build_polymer, [4]*4)
+
+            # Each molecule is built once, by one of the workers.
+            assert len({x[0] for x in results}) == 1
+            assert sum(x[2] for x in results) == 3
+            assert sum(x[1]['Linear']['builds'] for
+                       x in results if x[1]) == 1
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+
+
+def test_property_store():
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], 2))
+
+    path = os.path.join('store_tests_output', 'properties.db')
+    if os.path.exists(path):
+        os.remove(path)
+    store = PropertyStore(path)
+    settings = dict(CACHE_SETTINGS)
+    try:
+        CACHE_SETTINGS['PROPERTIES'] = store
+        energy = polymer.energy.rdkit('uff')
+        func_data = FunctionData('rdkit', forcefield='uff', conformer=-1)
+        assert store.get(polymer, func_data) == (True, energy)
+
+        # Stored values are used instead of calculating them again,
+        # also by other processes.
+        store.put(polymer, func_data, 12.)
+        assert polymer.energy.rdkit('uff') == 12.
+        assert polymer.energy.values[func_data] == 12.
+        assert pickle.loads(pickle.dumps(store)).get(
+                                polymer, func_data) == (True, 12.)
+
+        # Changing the geometry changes the key.
+        polymer.mol = polymer.shift(np.array([0, 0, 1]))
+        assert store.get(polymer, func_data) == (False, None)
+        assert np.isclose(polymer.energy.rdkit('uff'), energy)
+
+        # Values are stored under the geometry they were calculated
+        # from, even if the calculation moves the atoms.
+        before = store.geometry_hash(polymer)
+        energies = polymer.energy.rdkit_conformers('uff', optimize=True)
+        assert store.geometry_hash(polymer) != before
+        func_data = FunctionData('rdkit_conformers',
+                                 forcefield='uff',
+                                 conformers=None,
+                                 optimize=True,
+                                 max_iters=200)
+        found, value = store.get(polymer, func_data, before)
+        assert found and np.array_equal(value, energies)
+        assert store.get(polymer, func_data) == (False, None)
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+        store.close()
+
+
+def pseudoformation(n):
+    Polymer.cache.clear()
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], n))
+    func = FunctionData('rdkit', forcefield='uff')
+    return polymer.energy.pseudoformation(func, [(n, bb1), (n, bb2)])
+
+
+def test_energy_memo():
+    Polymer.cache.clear()
+    func = FunctionData('rdkit', forcefield='uff')
+    fkey = FunctionData('rdkit', forcefield='uff', conformer=-1)
+    bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+    bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+    polymer = Polymer([bb1, bb2], Linear('AB', [0, 0], 2))
+    bbs = [(2, bb1), (2, bb2)]
+    expected = polymer.energy.pseudoformation(func, bbs)
+    assert np.isclose(polymer.energy.pseudoformation(func, bbs, True),
+                      expected)
+
+    settings = dict(CACHE_SETTINGS)
+    try:
+        with SharedEnergyMemo() as memo:
+            memo.install()
+            context = mp.get_context('spawn')
+            with context.Pool(2, memo.install) as pool:
+                results = pool.map(pseudoformation, [2, 2, 3, 3])
+
+            # Only the energies of the building blocks are shared.
+            # The workers embed their own geometries, so their
+            # energies are only compared with each other.
+            assert len(memo) == 2
+            assert not memo.claims
+            assert np.isclose(results[0], results[1])
+            assert memo.get_or_claim(bb1, fkey)[0]
+
+            # Energies of a molecule whose structure changed are not
+            # returned.
+            position = bb1.position_matrix()
+            bb1.set_position_from_matrix(position + 1)
+            assert memo.get_or_claim(bb1, fkey) == (False, None)
+            assert memo.claims
+            memo.release(bb1, fkey)
+            assert not memo.claims
+            bb1.set_position_from_matrix(position)
+
+            # Energies held by the memo are used in place of
+            # calculating them.
+            memo.put(bb1, fkey, bb1.energy.values[fkey] + 10)
+            memo.put(bb2, fkey, bb2.energy.values[fkey])
+            bb1.energy.values.clear()
+            assert np.isclose(polymer.energy.pseudoformation(func, bbs),
+                              expected + 20)
+            assert np.isclose(
+                polymer.energy.pseudoformation(func, bbs, True),
+                expected + 20)
+            bb1.energy.values.clear()
+
+    finally:
+        CACHE_SETTINGS.clear()
+        CACHE_SETTINGS.update(settings)
+
+
+def test_checkpoint():
+    path = os.path.join('store_tests_output', 'optimization.ckpt')
+    if os.path.exists(path):
+        os.remove(path)
+
+    def polymers():
+        Polymer.cache.clear()
+        bb1 = StructUnit2.smiles_init('Nc1ccc(N)cc1', 'amine')
+        bb2 = StructUnit2.smiles_init('O=Cc1ccc(C=O)cc1', 'aldehyde')
+        return [Polymer([bb1, bb2], Linear('AB', [0, 0], n)) for
+                n in (1, 2)]
+
+    func_data = FunctionData('rdkit_optimization')
+    first, _ = polymers()
+    with OptimizationCheckpoint(path) as checkpoint:
+        Population(first).optimize(func_data,
+                                   processes=1,
+                                   checkpoint=checkpoint)
+        assert len(checkpoint) == 1
+
+    # A record cut short by a crash is dropped.
+    with open(path, 'ab') as f:
+        f.write(b'\x10\x00\x00')
+
+    # Molecules finished before the crash are restored rather than
+    # optimized again, the others are optimized.
+    restored, other = polymers()
+    restored.mol = restored.shift(np.array([10, 0, 0]))
+    with OptimizationCheckpoint(path) as checkpoint:
+        assert len(checkpoint) == 1
+        Population(restored, other).optimize(func_data,
+                                             processes=1,
+                                             checkpoint=checkpoint)
+        assert len(checkpoint) == 2
+
+    assert restored.optimized and other.optimized
+    assert np.allclose(restored.position_matrix(),
+                       first.position_matrix())
+    with OptimizationCheckpoint(path) as checkpoint:
+        assert len(checkpoint) == 2
@@ -1,2 +1,4 @@
 from .utilities import *
 from .mplogging import *
+from .jobs import *
+from .pool import *
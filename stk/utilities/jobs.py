@@ -0,0 +1,443 @@
+"""
+Defines tools for running external programs concurrently.
+
+Programs such as MOPAC or MacroModel spend almost all of their time in
+their own process. Instead of blocking a Python process for each
+program being run, :class:`JobRunner` runs them as ``asyncio``
+subprocesses, so that a single process can drive many of them at once.
+
+Programs which need a license, such as MacroModel, can only run as
+many times at once as there are licenses. A :class:`LicensePool` hands
+out that many tokens to the processes of a node, so that jobs wait
+their turn instead of repeatedly failing to check out a license.
+
+"""
+
+import asyncio
+import logging
+import os
+import subprocess as sp
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
+from multiprocessing.managers import BaseManager
+import psutil
+
+from .utilities import CACHE_SETTINGS
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """
+    Runs external programs concurrently from a single process.
+
+    The coroutine :meth:`run` starts a program and waits for it to
+    finish without blocking other coroutines. At most :attr:`max_jobs`
+    programs run at the same time. :meth:`run_all` runs a group of
+    such coroutines to completion from synchronous code and
+    :meth:`gather` does the same from inside an event loop.
+
+    For example, to optimize many molecules with MOPAC at once
+
+    .. code-block:: python
+
+        runner = JobRunner(max_jobs=100)
+        runner.run_all(mopac_opt_async(mol, mopac_path, runner=runner)
+                       for mol in mols)
+
+    Attributes
+    ----------
+    max_jobs : :class:`int`
+        The maximum number of programs which run at the same time.
+
+    grace : :class:`float`
+        The number of seconds a program has to exit after it was asked
+        to stop, before it is killed.
+
+    timeouts : :class:`int`
+        The number of programs which ran out of time.
+
+    """
+
+    def __init__(self, max_jobs=psutil.cpu_count(), grace=10):
+        """
+        Initializes a :class:`JobRunner`.
+
+        Parameters
+        ----------
+        max_jobs : :class:`int`, optional
+            The maximum number of programs which run at the same time.
+
+        grace : :class:`float`, optional
+            The number of seconds a program has to exit after it was
+            asked to stop, before it is killed.
+
+        """
+
+        self.max_jobs = max_jobs
+        self.grace = grace
+        self.timeouts = 0
+        # A semaphore can only be used by the event loop it was first
+        # used in, so each event loop gets its own.
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_jobs)
+        return self._semaphores[loop]
+
+    async def run(self, cmd, timeout=None, stop=None):
+        """
+        Runs a program and waits for it to finish.
+
+        If the program runs out of time, `stop` is called so that it
+        can exit cleanly. If the program does not exit within
+        :attr:`grace` seconds it is killed. The program is also killed
+        if the coroutine is cancelled.
+
+        Parameters
+        ----------
+        cmd : :class:`list` of :class:`str`
+            The program and its arguments.
+
+        timeout : :class:`float`, optional
+            The number of seconds the program is allowed to run.
+            ``None`` means there is no timeout.
+
+        stop : :class:`function`, optional
+            Called without arguments to ask the program to stop, when
+            it runs out of time.
+
+        Returns
+        -------
+        :class:`subprocess.CompletedProcess`
+            The return code and combined ``stdout`` and ``stderr`` of
+            the program. The output is empty if the program ran out of
+            time.
+
+        """
+
+        async with self._semaphore():
+            proc = await asyncio.create_subprocess_exec(
+                                                *cmd,
+                                                stdout=sp.PIPE,
+                                                stderr=sp.STDOUT)
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(),
+                                                   timeout)
+
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f'"{" ".join(cmd)}" took too long and '
+                               'is being stopped.')
+                if stop is not None:
+                    stop()
+                try:
+                    await asyncio.wait_for(proc.wait(), self.grace)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                stdout = b''
+
+            except asyncio.CancelledError:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
+
+        return sp.CompletedProcess(args=cmd,
+                                   returncode=proc.returncode,
+                                   stdout=stdout.decode(errors='replace'))
+
+    async def gather(self, coroutines):
+        """
+        Runs coroutines concurrently until all of them are done.
+
+        This is the coroutine version of :meth:`run_all`, for code
+        which already runs inside an event loop.
+
+        Parameters
+        ----------
+        coroutines : :class:`iterable` of :class:`coroutine`
+            The coroutines to run. They will usually use :meth:`run`
+            to start programs.
+
+        Returns
+        -------
+        :class:`list`
+            The result of each coroutine, in the order of
+            `coroutines`. If a coroutine raised, the exception is
+            placed in the :class:`list` instead.
+
+        """
+
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    def run_all(self, coroutines):
+        """
+        Runs coroutines concurrently until all of them are done.
+
+        If this is called from inside a running event loop, the
+        coroutines are run by a new event loop in another thread and
+        the calling event loop is blocked until they are done. Inside
+        an event loop, :meth:`gather` should be awaited instead.
+
+        Parameters
+        ----------
+        coroutines : :class:`iterable` of :class:`coroutine`
+            The coroutines to run. They will usually use :meth:`run`
+            to start programs.
+
+        Returns
+        -------
+        :class:`list`
+            The result of each coroutine, in the order of
+            `coroutines`. If a coroutine raised, the exception is
+            placed in the :class:`list` instead.
+
+        """
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.gather(coroutines))
+
+        # asyncio.run() cannot be used while an event loop is running
+        # in this thread.
+        with ThreadPoolExecutor(1) as executor:
+            return executor.submit(asyncio.run,
+                                   self.gather(coroutines)).result()
+
+    def __repr__(self):
+        return f'JobRunner(max_jobs={self.max_jobs}, grace={self.grace})'
+
+
+class _Tokens:
+    """
+    Hands out tokens in the order in which they were asked for.
+
+    Lives in the process of a :class:`_LicenseManager`. Tokens held
+    or waited for by processes which no longer exist are reclaimed.
+
+    """
+
+    def __init__(self, tokens):
+        self._condition = threading.Condition()
+        self._free = tokens
+        self._next = 0
+        # Map the tickets of waiting and holding processes to their
+        # pids.
+        self._queue = OrderedDict()
+        self._holders = {}
+
+    def ticket(self, pid):
+        with self._condition:
+            ticket = self._next
+            self._next += 1
+            self._queue[ticket] = pid
+            return ticket
+
+    def _reclaim(self):
+        for ticket, pid in list(self._holders.items()):
+            if not psutil.pid_exists(pid):
+                del self._holders[ticket]
+                self._free += 1
+        for ticket, pid in list(self._queue.items()):
+            if not psutil.pid_exists(pid):
+                del self._queue[ticket]
+
+    def acquire(self, ticket, poll):
+        with self._condition:
+            while True:
+                self._reclaim()
+                if ticket not in self._queue:
+                    return False
+                if self._free > 0 and next(iter(self._queue)) == ticket:
+                    self._holders[ticket] = self._queue.pop(ticket)
+                    self._free -= 1
+                    self._condition.notify_all()
+                    return True
+                self._condition.wait(poll)
+
+    def release(self, ticket):
+        with self._condition:
+            # A ticket which is still waiting is withdrawn.
+            self._queue.pop(ticket, None)
+            if self._holders.pop(ticket, None) is not None:
+                self._free += 1
+                self._condition.notify_all()
+
+    def counts(self):
+        with self._condition:
+            return self._free, len(self._holders), len(self._queue)
+
+
+class _LicenseManager(BaseManager):
+    pass
+
+
+_LicenseManager.register('Tokens', _Tokens)
+
+
+class LicensePool:
+    """
+    Limits how many licensed programs run at once on a node.
+
+    The tokens are held by a small coordinator process, so that all
+    processes of the node, such as the workers of a
+    :class:`.WorkerPool`, share them. Tokens are granted strictly in
+    the order in which they were asked for. Tokens held by processes
+    which died are given back automatically.
+
+    A :class:`LicensePool` is used by every MacroModel job once it
+    is installed in :data:`.CACHE_SETTINGS`, which also makes worker
+    pools created afterwards use it:
+
+    .. code-block:: python
+
+        with LicensePool(8) as licenses:
+            licenses.install()
+            pop.optimize(FunctionData('macromodel_opt', ...))
+
+    Attributes
+    ----------
+    tokens : :class:`int`
+        The number of tokens.
+
+    poll : :class:`float`
+        The number of seconds between checks for tokens held by
+        processes which died.
+
+    """
+
+    def __init__(self, tokens, poll=1):
+        """
+        Initializes a :class:`LicensePool`.
+
+        Parameters
+        ----------
+        tokens : :class:`int`
+            The number of tokens, usually the number of licenses
+            which may be used by this node.
+
+        poll : :class:`float`, optional
+            The number of seconds between checks for tokens held by
+            processes which died.
+
+        """
+
+        self.tokens = tokens
+        self.poll = poll
+        self._manager = _LicenseManager()
+        self._manager.start()
+        self._tokens = self._manager.Tokens(tokens)
+
+    @contextmanager
+    def token(self):
+        """
+        Waits for a token and holds it inside a ``with`` block.
+
+        Returns
+        -------
+        :class:`contextlib.AbstractContextManager`
+            Holds the token until the ``with`` block is left.
+
+        """
+
+        ticket = self._tokens.ticket(os.getpid())
+        while not self._tokens.acquire(ticket, self.poll):
+            ticket = self._tokens.ticket(os.getpid())
+        try:
+            yield
+        finally:
+            self._tokens.release(ticket)
+
+    @asynccontextmanager
+    async def token_async(self):
+        """
+        Waits for a token and holds it inside an ``async with`` block.
+
+        Unlike :meth:`token`, waiting does not block the event loop.
+
+        Returns
+        -------
+        :class:`contextlib.AbstractAsyncContextManager`
+            Holds the token until the ``async with`` block is left.
+
+        """
+
+        loop = asyncio.get_running_loop()
+        ticket = self._tokens.ticket(os.getpid())
+        try:
+            while not await loop.run_in_executor(None,
+                                                 self._tokens.acquire,
+                                                 ticket,
+                                                 self.poll):
+                ticket = self._tokens.ticket(os.getpid())
+            yield
+        finally:
+            # Also withdraws the ticket if waiting was cancelled.
+            self._tokens.release(ticket)
+
+    def counts(self):
+        """
+        Returns how the tokens are currently used.
+
+        Returns
+        -------
+        :class:`tuple` of :class:`int`
+            The number of free tokens, the number of held tokens and
+            the number of processes waiting for a token.
+
+        """
+
+        return self._tokens.counts()
+
+    def install(self):
+        """
+        Makes this process use the pool.
+
+        This is meant to be used as the `initializer` of a
+        :class:`multiprocessing.pool.Pool`.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        CACHE_SETTINGS['LICENSES'] = self
+
+    def close(self):
+        """
+        Shuts down the coordinator, if it was started by this instance.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def __getstate__(self):
+        state = dict(vars(self))
+        # Managers cannot be pickled, only their proxies can.
+        state['_manager'] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f'LicensePool(tokens={self.tokens})'
@@ -0,0 +1,284 @@
+"""
+Defines a pool of worker processes which is kept between uses.
+
+Starting a worker process means importing ``stk`` and all of its
+dependencies again, which can take longer than the work it is given.
+A :class:`WorkerPool` starts its workers once, so that they can be
+reused by many calls to :meth:`.Population.optimize`,
+:meth:`.Population.init_all` or :func:`.pool_energies`, for example
+once per generation of a GA run. Workers keep their imports and their
+molecule caches between uses.
+
+Objects which many tasks share, such as building blocks, can be sent
+to the workers by reference with :func:`reduce_by_reference`. Each
+one is then pickled only once per pool.
+
+"""
+
+import logging
+import pickle
+import multiprocessing as mp
+from threading import Thread
+import psutil
+
+from .utilities import CACHE_SETTINGS, install_cache_settings
+from .mplogging import daemon_logger, logged_call
+
+
+logger = logging.getLogger(__name__)
+
+
+# Maps the reference of each object sent by reference to the object,
+# in this process.
+_referenced = {}
+
+
+class WorkerPool:
+    """
+    A pool of worker processes which can be used many times.
+
+    Log messages from the workers are handled by the parent process.
+    The workers use the shared caches and stores held by
+    :data:`.CACHE_SETTINGS` when the pool is created.
+
+    The pool should be closed once it is no longer needed, which is
+    easiest done by using it as a context manager
+
+    .. code-block:: python
+
+        with WorkerPool(processes=8) as pool:
+            for generation in range(50):
+                ...
+                pop.optimize(func_data, pool=pool)
+
+    Attributes
+    ----------
+    processes : :class:`int`
+        The number of worker processes.
+
+    log_queue : :class:`multiprocessing.Queue`
+        The queue into which the workers place log records.
+
+    registry : :class:`multiprocessing.managers.DictProxy`
+        Maps the reference of each object sent to the workers by
+        reference to the pickled object.
+
+    """
+
+    def __init__(self, processes=psutil.cpu_count()):
+        """
+        Initializes a :class:`WorkerPool`.
+
+        Parameters
+        ----------
+        processes : :class:`int`, optional
+            The number of worker processes to start. If ``None``, one
+            is started per CPU.
+
+        """
+
+        self._manager = mp.Manager()
+        self.log_queue = self._manager.Queue()
+        self._log_thread = Thread(target=daemon_logger,
+                                  args=(self.log_queue, ))
+        self._log_thread.start()
+
+        # Objects sent by reference are kept here, so that workers
+        # can load them the first time they need them.
+        self.registry = self._manager.dict()
+        self._registry = CACHE_SETTINGS['REGISTRY']
+        CACHE_SETTINGS['REGISTRY'] = self.registry
+
+        settings = {key: CACHE_SETTINGS[key] for
+                    key in ('ON',
+                            'SHARED',
+                            'PROPERTIES',
+                            'ENERGIES',
+                            'REGISTRY',
+                            'LICENSES')}
+        self._pool = mp.get_context('spawn').Pool(processes,
+                                                  install_cache_settings,
+                                                  (settings, ))
+        # The pool resolves a number of ``None`` to the CPU count.
+        self.processes = self._pool._processes
+
+    def map(self, func, iterable, chunksize=None):
+        """
+        Applies `func` to every item of `iterable` in the workers.
+
+        Parameters
+        ----------
+        func : :class:`function`
+            A function taking a single argument. It must be possible
+            to pickle it, so it cannot be a ``lambda``.
+
+        iterable : :class:`iterable`
+            The arguments `func` is called with.
+
+        chunksize : :class:`int`, optional
+            The number of items sent to a worker at a time.
+
+        Returns
+        -------
+        :class:`list`
+            The value returned by `func` for each item of `iterable`,
+            in the same order.
+
+        """
+
+        return self._pool.starmap(logged_call,
+                                  ((self.log_queue, func, item) for
+                                   item in iterable),
+                                  chunksize)
+
+    def imap_unordered(self, func, iterable, chunksize=1):
+        """
+        Applies `func` to every item of `iterable` in the workers.
+
+        Unlike :meth:`map`, results are yielded as soon as they are
+        done, so that they can be used while other items are still
+        being worked on.
+
+        Parameters
+        ----------
+        func : :class:`function`
+            A function taking a single argument. It must be possible
+            to pickle it, so it cannot be a ``lambda``.
+
+        iterable : :class:`iterable`
+            The arguments `func` is called with.
+
+        chunksize : :class:`int`, optional
+            The number of items sent to a worker at a time.
+
+        Yields
+        ------
+        :class:`tuple`
+            The index of an item in `iterable` and the value returned
+            by `func` for it, in the order in which they are done.
+
+        """
+
+        yield from self._pool.imap_unordered(
+                                  _indexed_call,
+                                  ((self.log_queue, func, i, item) for
+                                   i, item in enumerate(iterable)),
+                                  chunksize)
+
+    def close(self):
+        """
+        Waits for the workers to finish and shuts them down.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        if self._pool is None:
+            return
+
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+        CACHE_SETTINGS['REGISTRY'] = self._registry
+        _referenced.clear()
+        self.log_queue.put(None)
+        self._log_thread.join()
+        self._manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self._pool is not None:
+            self._pool.terminate()
+        self.close()
+
+    def __repr__(self):
+        return f'WorkerPool(processes={self.processes})'
+
+
+def _indexed_call(args):
+    """
+    Calls a function in a worker and tags the result with an index.
+
+    Parameters
+    ----------
+    args : :class:`tuple`
+        The log queue, the function, the index of the item and the
+        item the function is called with.
+
+    Returns
+    -------
+    :class:`tuple`
+        The index and the value returned by the function.
+
+    """
+
+    log_queue, func, i, item = args
+    return i, logged_call(log_queue, func, item)
+
+
+def reduce_by_reference(obj, ref):
+    """
+    Lets `obj` be sent to the workers of a :class:`WorkerPool` as `ref`.
+
+    This is meant to be used by reducers registered with
+    :meth:`multiprocessing.reduction.ForkingPickler.register`, which
+    only pickles objects sent between processes. The first time `obj`
+    is sent, it is pickled into :attr:`WorkerPool.registry`. After
+    that, only `ref` is sent. Each process loads an object from the
+    registry at most once and always gives back the same instance for
+    the same `ref`.
+
+    Parameters
+    ----------
+    obj : :class:`object`
+        The object to send.
+
+    ref : :class:`object`
+        A hashable reference to `obj`. Objects which are not the same
+        must have different references.
+
+    Returns
+    -------
+    :class:`tuple`
+        The reduce value of `obj`, or ``None`` if no
+        :class:`WorkerPool` is open, in which case `obj` should be
+        pickled as usual.
+
+    """
+
+    registry = CACHE_SETTINGS['REGISTRY']
+    if registry is None:
+        return None
+
+    if ref not in _referenced:
+        _referenced[ref] = obj
+        if ref not in registry:
+            registry[ref] = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return _dereference, (ref, )
+
+
+def _dereference(ref):
+    """
+    Returns the object sent as `ref`.
+
+    Parameters
+    ----------
+    ref : :class:`object`
+        The reference of an object sent by :func:`reduce_by_reference`.
+
+    Returns
+    -------
+    :class:`object`
+        The object.
+
+    """
+
+    obj = _referenced.get(ref)
+    if obj is None:
+        blob = CACHE_SETTINGS['REGISTRY'][ref]
+        obj = _referenced[ref] = pickle.loads(blob)
+    return obj
@@ -15,7 +15,11 @@ import os
 import subprocess as sp
 import gzip
 import re
-from collections import deque
+import json
+import math
+import numbers
+import threading
+from collections import deque, defaultdict, Counter
 import tarfile
 
 # Holds the elements Van der Waals radii in Angstroms.
@@ -74,6 +78,215 @@ periodic_table = {
               117: 'Uus', 118: 'Uuo'}
 
 
+# Controls caching when making molecules. "ON" toggles caching.
+# "MAX_ENTRIES" and "MAX_BYTES" bound the size of each cache, with
+# ``None`` meaning unbounded. "EVICTION" is either "lru" or
+# "least-fit". If "WEAKREF" is ``True``, caches only hold weak
+# references, so molecules are dropped once nothing else, such as a
+# :class:`.Population`, refers to them. "STORE" optionally holds a
+# :class:`.MoleculeStore`, which keeps molecules between runs.
+# "SHARED" optionally holds a :class:`.SharedMoleculeCache`, which
+# shares molecules between processes. "PROPERTIES" optionally holds a
+# :class:`.PropertyStore`, which keeps the results of energy
+# calculations between runs. "ENERGIES" optionally holds a
+# :class:`.SharedEnergyMemo`, which shares the energies of building
+# blocks and products between processes. "REGISTRY" is set by an open
+# :class:`.WorkerPool` and holds the building blocks sent to its
+# workers, so that they are only sent once. "LICENSES" optionally
+# holds a :class:`.LicensePool`, which limits how many MacroModel jobs
+# run at once.
+CACHE_SETTINGS = {'ON': True,
+                  'MAX_ENTRIES': None,
+                  'MAX_BYTES': None,
+                  'EVICTION': 'lru',
+                  'WEAKREF': False,
+                  'STORE': None,
+                  'SHARED': None,
+                  'PROPERTIES': None,
+                  'ENERGIES': None,
+                  'REGISTRY': None,
+                  'LICENSES': None}
+
+
+# Maps the name of each class which caches molecules to the
+# :class:`CacheStats` of its cache.
+CACHE_STATS = {}
+
+
+class CacheStats:
+    """
+    Counts how a molecule cache is used.
+
+    Attributes
+    ----------
+    hits : :class:`int`
+        The number of molecules returned from the cache.
+
+    misses : :class:`int`
+        The number of molecules not found in the cache.
+
+    evictions : :class:`int`
+        The number of molecules removed from the cache to keep it
+        within its limits.
+
+    store_loads : :class:`int`
+        The number of molecules loaded from a :class:`.MoleculeStore`
+        instead of being built.
+
+    shared_loads : :class:`int`
+        The number of molecules loaded from a
+        :class:`.SharedMoleculeCache` instead of being built.
+
+    build_time : :class:`float`
+        The total number of seconds spent making molecules.
+
+    topologies : :class:`dict`
+        Maps the name of a topology class to a :class:`dict` of the
+        form
+
+        .. code-block:: python
+
+            {'builds': 12,
+             'build_time': 3.2,
+             'histogram': {'0.25': 10, '0.5': 2}}
+
+        The histogram maps the upper bound, in seconds, of a power
+        of 2 sized bin to the number of builds which took at most
+        that long and longer than half of it.
+
+    lock : :class:`threading.Lock`
+        Guards updates to the counters.
+
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all counters to zero.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.store_loads = 0
+            self.shared_loads = 0
+            self.build_time = 0.
+            self.topologies = defaultdict(self._topology_entry)
+
+    @staticmethod
+    def _topology_entry():
+        return {'builds': 0, 'build_time': 0., 'histogram': Counter()}
+
+    def count(self, counter):
+        """
+        Increments one of the counters.
+
+        Parameters
+        ----------
+        counter : :class:`str`
+            The name of the counter, for example ``'hits'``.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_build(self, seconds, topology=None):
+        """
+        Records the time taken to make a molecule.
+
+        Parameters
+        ----------
+        seconds : :class:`float`
+            The number of seconds taken.
+
+        topology : :class:`.Topology`, optional
+            The topology of the molecule, if it has one.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        bound = 2.**max(-10, math.ceil(math.log2(max(seconds, 1e-9))))
+        with self.lock:
+            self.build_time += seconds
+            if topology is not None:
+                entry = self.topologies[topology.__class__.__name__]
+                entry['builds'] += 1
+                entry['build_time'] += seconds
+                entry['histogram'][str(bound)] += 1
+
+    def as_dict(self):
+        """
+        Returns the counters as a JSON serializable :class:`dict`.
+
+        Returns
+        -------
+        :class:`dict`
+            The counters.
+
+        """
+
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'store_loads': self.store_loads,
+                'shared_loads': self.shared_loads,
+                'build_time': self.build_time,
+                'topologies': {
+                    name: dict(entry, histogram=dict(entry['histogram']))
+                    for name, entry in self.topologies.items()
+                }
+            }
+
+    def merge(self, stats):
+        """
+        Adds counters made by :meth:`as_dict` to this instance.
+
+        This is used to collect the counts made by worker processes.
+
+        Parameters
+        ----------
+        stats : :class:`dict`
+            Counters returned by :meth:`as_dict`.
+
+        Returns
+        -------
+        None : :class:`NoneType`
+
+        """
+
+        with self.lock:
+            self.hits += stats['hits']
+            self.misses += stats['misses']
+            self.evictions += stats['evictions']
+            self.store_loads += stats['store_loads']
+            self.shared_loads += stats['shared_loads']
+            self.build_time += stats['build_time']
+            for name, other in stats['topologies'].items():
+                entry = self.topologies[name]
+                entry['builds'] += other['builds']
+                entry['build_time'] += other['build_time']
+                entry['histogram'].update(other['histogram'])
+
+
 class Cell:
     """
     Represents an individual cell in a supercell.
@@ -135,25 +348,72 @@ class FunctionData:
         The parameters of the function or method who's name is held by
         `name`.
 
+    Notes
+    -----
+    The hash is calculated from :attr:`name` and :attr:`params` the
+    first time it is needed and then reused, so :attr:`params` should
+    not be modified once an instance is used as a :class:`dict` key.
+
     """
 
-    __slots__ = ['name', 'params']
+    __slots__ = ['name', 'params', '_hash']
 
     def __init__(self, name, **kwargs):
         self.name = name
         self.params = kwargs
+        self._hash = None
+
+    @classmethod
+    def _hashable(cls, obj):
+        """
+        Converts `obj` into a hashable object.
+
+        Objects which are equal are converted into objects which are
+        equal, so that they have the same hash.
+
+        Parameters
+        ----------
+        obj : :class:`object`
+            A parameter value.
+
+        Returns
+        -------
+        :class:`object`
+            A hashable object.
+
+        """
+
+        if isinstance(obj, dict):
+            return frozenset((key, cls._hashable(value)) for
+                             key, value in obj.items())
+        if isinstance(obj, (list, tuple)):
+            return tuple(cls._hashable(x) for x in obj)
+        if isinstance(obj, (set, frozenset)):
+            return frozenset(cls._hashable(x) for x in obj)
+        if (obj is None or
+                isinstance(obj, (str, bytes, numbers.Number, cls))):
+            return obj
+        # Other objects, such as molecules or numpy arrays, may define
+        # equality in ways which do not match their hash, so they only
+        # contribute their type.
+        return type(obj).__name__
 
     def __hash__(self):
-        return 1
+        if self._hash is None:
+            self._hash = hash((self.name, self._hashable(self.params)))
+        return self._hash
 
     def __eq__(self, other):
+        return self.name == other.name and self.params == other.params
 
-        same_length = len(self) == len(other)
-        same_items = all(x in other.params.items() for x in
-                         self.params.items())
-        same_name = self.name == other.name
+    def __getstate__(self):
+        # The hash is not pickled because the hashes of strings differ
+        # between processes.
+        return self.name, self.params
 
-        return same_length and same_items and same_name
+    def __setstate__(self, state):
+        self.name, self.params = state
+        self._hash = None
 
     def __len__(self):
         return len(self.params.items())
@@ -550,6 +810,21 @@ def archive_output():
     os.rename('output', new_dir)
 
 
+def cache_stats():
+    """
+    Returns the usage counters of all molecule caches.
+
+    Returns
+    -------
+    :class:`dict`
+        Maps the name of each cached class to the :class:`dict`
+        returned by :meth:`CacheStats.as_dict` for its cache.
+
+    """
+
+    return {name: stats.as_dict() for name, stats in CACHE_STATS.items()}
+
+
 def centroid(*coords):
     """
     Calculates the centroid of a group of coordinates.
@@ -609,6 +884,25 @@ def dedupe(iterable, seen=None, key=None):
             yield x
 
 
+def dump_cache_stats(path):
+    """
+    Writes the usage counters of all molecule caches to a JSON file.
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The path of the file to which the counters are written.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    with open(path, 'w') as f:
+        json.dump(cache_stats(), f, indent=4)
+
+
 def flatten(iterable, excluded_types={str}):
     """
     Transforms an nested iterable into a flat one.
@@ -652,6 +946,28 @@ def flatten(iterable, excluded_types={str}):
             yield x
 
 
+def install_cache_settings(settings):
+    """
+    Updates :data:`CACHE_SETTINGS` with `settings`.
+
+    This is meant to be used as the `initializer` of a
+    :class:`multiprocessing.pool.Pool`, so that worker processes use
+    the same shared caches and stores as their parent.
+
+    Parameters
+    ----------
+    settings : :class:`dict`
+        Holds the settings to change.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    CACHE_SETTINGS.update(settings)
+
+
 def kabsch(coords1, coords2):
     """
     Return a rotation matrix to minimize dstance between 2 coord sets.
@@ -747,6 +1063,29 @@ def matrix_centroid(matrix):
     return np.array(np.sum(matrix, axis=0) / len(matrix))[0]
 
 
+def merge_cache_stats(stats):
+    """
+    Adds counters made by :func:`cache_stats` to the caches.
+
+    This is used to collect the counts made in worker processes.
+
+    Parameters
+    ----------
+    stats : :class:`dict`
+        Counters returned by :func:`cache_stats`, usually in a
+        different process.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    for name, class_stats in stats.items():
+        if name in CACHE_STATS:
+            CACHE_STATS[name].merge(class_stats)
+
+
 def mol_from_mae_file(mae_path):
     """
     Creates a rdkit molecule from a ``.mae`` file.
@@ -967,10 +1306,15 @@ def remake(mol):
         new_atom.SetFormalCharge(a.GetFormalCharge())
         emol.AddAtom(new_atom)
 
-    for bond in mol.GetBonds():
-        emol.AddBond(bond.GetBeginAtomIdx(),
-                     bond.GetEndAtomIdx(),
-                     bond.GetBondType())
+    # Bonds are found through their atoms because accessing the bonds
+    # of a molecule by index does not take constant time.
+    for atom in mol.GetAtoms():
+        for bond in atom.GetBonds():
+            if bond.GetBeginAtomIdx() != atom.GetIdx():
+                continue
+            emol.AddBond(bond.GetBeginAtomIdx(),
+                         bond.GetEndAtomIdx(),
+                         bond.GetBondType())
 
     m = emol.GetMol()
     m.AddConformer(rdkit.Conformer(mol.GetConformer()))
@@ -981,6 +1325,20 @@ def remake(mol):
     return m
 
 
+def reset_cache_stats():
+    """
+    Sets the usage counters of all molecule caches to zero.
+
+    Returns
+    -------
+    None : :class:`NoneType`
+
+    """
+
+    for stats in CACHE_STATS.values():
+        stats.reset()
+
+
 def rotation_matrix(vector1, vector2):
     """
     Returns a rotation matrix which transforms `vector1` to `vector2`.